@@ -5,8 +5,14 @@ a = Analysis(
     ['launcher.py'],
     pathex=[],
     binaries=[],
-    datas=[],
-    hiddenimports=[],
+    datas=[('assets', 'assets')],
+    # Downloader modes are imported lazily via importlib (see launcher.MODES)
+    hiddenimports=[
+        'youtube_downloader_mvp',
+        'youtube_downloader_advanced',
+        'youtube_playlist_downloader',
+        'instagram_downloader',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
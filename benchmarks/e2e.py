@@ -0,0 +1,281 @@
+"""
+Offline end-to-end download benchmark
+Starts the synthetic media server, patches yt-dlp with the fake extractor
+and drives the real MVP, Advanced, Playlist and Instagram download paths
+headlessly. Each (mode, items, concurrency) scenario runs in a fresh
+subprocess so CPU time and peak RSS are per scenario; the server runs in
+the parent and is not counted.
+
+Concurrency means parallel mode instances for the single-URL modes and
+max_parallel workers for the playlist mode.
+
+Usage:
+    python benchmarks/e2e.py [--modes simple,playlist] [--items 1,10,500]
+                             [--concurrency 1,4] [--size-kb 1024]
+                             [--protocol progressive|hls|dash]
+                             [--latency-ms 20] [--bandwidth-mbps 200]
+                             [--postprocess] [--output e2e.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from headless import ROOT, HeadlessPage, wait_until
+
+
+MODE_KEYS = ('simple', 'advanced', 'playlist', 'instagram')
+SCENARIO_TIMEOUT = 3600
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def _peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+# ============================================================================
+# DRIVERS (run inside the scenario subprocess)
+# ============================================================================
+
+def _new_mode(key, download_dir):
+    import launcher
+    page = HeadlessPage()
+    mode = launcher.load_mode(key)(page, on_back=lambda _e=None: None)
+    mode.download_path = str(download_dir)
+    return mode
+
+
+def _drive_simple(mode, urls):
+    for url in urls:
+        mode.url_field.value = url
+        mode.download_video(None)
+        wait_until(lambda: not mode.download_btn.disabled, SCENARIO_TIMEOUT)
+
+
+def _drive_advanced(mode, urls):
+    dropdown = mode.get_control("format_dropdown")
+    download_btn = mode.get_control("download_btn")
+    for url in urls:
+        mode.url_field.value = url
+        dropdown.value = None
+        mode.fetch_formats(None)
+        wait_until(lambda: not mode.fetch_btn.disabled, SCENARIO_TIMEOUT)
+        mode.download_video(None)
+        wait_until(lambda: not download_btn.disabled, SCENARIO_TIMEOUT)
+
+
+def _drive_instagram(mode, urls):
+    for url in urls:
+        mode.url_field.value = url
+        mode.media_info = None
+        mode.analyze_media(None)
+        wait_until(lambda: not mode.analyze_btn.disabled, SCENARIO_TIMEOUT)
+        if not mode.media_info:
+            continue
+        mode.download_options.value = "video"
+        mode.start_download(None)
+        wait_until(lambda: not mode.download_btn.disabled, SCENARIO_TIMEOUT)
+
+
+def _prepare_single_url_mode(key, library, items, concurrency, download_dir):
+    drive = {'simple': _drive_simple, 'advanced': _drive_advanced, 'instagram': _drive_instagram}[key]
+    make_url = library.instagram_url if key == 'instagram' else library.video_url
+    urls = [make_url(i) for i in range(items)]
+    instances = [_new_mode(key, download_dir) for _ in range(concurrency)]
+
+    def run():
+        threads = [
+            threading.Thread(target=drive, args=(instance, urls[n::concurrency]), daemon=True)
+            for n, instance in enumerate(instances)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return run
+
+
+def _prepare_playlist_mode(library, items, concurrency, download_dir):
+    mode = _new_mode('playlist', download_dir)
+    mode.max_parallel = concurrency
+
+    def run():
+        mode.url_field.value = library.playlist_url(items)
+        mode.fetch_playlist(None)
+        wait_until(lambda: not mode.fetch_btn.disabled, SCENARIO_TIMEOUT)
+
+        mode.download_selected(None)
+        wait_until(lambda: not mode.downloading, SCENARIO_TIMEOUT)
+    return run
+
+
+def run_scenario(spec):
+    """Run one scenario in this process and return its measurements."""
+    from fake_extractor import FakeLibrary
+    from metrics import metrics
+
+    library = FakeLibrary(
+        spec['server_url'], size=spec['size'], protocol=spec['protocol'],
+        segment_size=spec['segment_size'],
+    )
+    download_dir = Path(tempfile.mkdtemp(prefix='ytdl-e2e-'))
+    mode_key, items, concurrency = spec['mode'], spec['items'], spec['concurrency']
+
+    with library.installed(postprocess=spec['postprocess']):
+        if not spec['postprocess']:
+            # Synthetic bytes cannot go through ffmpeg; skip the pre-download gate as well
+            import utils
+            utils.ffmpeg_probe.get = lambda: utils.FFmpegCapabilities(installed=True, path='ffmpeg')
+
+        # Mode construction is measured by startup.py; only time the downloads here
+        if mode_key == 'playlist':
+            run = _prepare_playlist_mode(library, items, concurrency, download_dir)
+        else:
+            run = _prepare_single_url_mode(mode_key, library, items, concurrency, download_dir)
+
+        cpu_start = _cpu_seconds()
+        start = time.perf_counter()
+        run()
+        if mode_key == 'playlist':
+            # Playlist workers may still be finishing their last job record
+            wait_until(lambda: _jobs_finished(metrics) >= items, 30)
+        wall = time.perf_counter() - start
+        cpu = _cpu_seconds() - cpu_start
+
+    downloaded = sum(f.stat().st_size for f in download_dir.rglob('*') if f.is_file())
+    jobs = {row['status']: row['count'] for row in metrics.to_json()['jobs_total']}
+    shutil.rmtree(download_dir, ignore_errors=True)
+
+    return {
+        'mode': mode_key,
+        'items': items,
+        'concurrency': concurrency,
+        'protocol': spec['protocol'],
+        'ok': jobs.get('ok', 0),
+        'failed': jobs.get('error', 0),
+        'bytes': downloaded,
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'throughput_bps': downloaded / wall if wall else None,
+        'items_per_s': items / wall if wall else None,
+        'peak_rss_bytes': _peak_rss_bytes(),
+    }
+
+
+def _jobs_finished(metrics):
+    return sum(row['count'] for row in metrics.to_json()['jobs_total'])
+
+
+# ============================================================================
+# ORCHESTRATION (parent process)
+# ============================================================================
+
+def spawn_scenario(spec):
+    """Run a scenario in a fresh interpreter and parse its JSON line."""
+    env = dict(os.environ)
+    metrics_dir = tempfile.mkdtemp(prefix='ytdl-e2e-metrics-')
+    env['YTDL_METRICS_DIR'] = metrics_dir
+    try:
+        result = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), '--child', json.dumps(spec)],
+            cwd=ROOT, env=env, capture_output=True, text=True, timeout=SCENARIO_TIMEOUT,
+        )
+    except subprocess.TimeoutExpired:
+        return {**spec, 'error': 'timeout'}
+    finally:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    return {**spec, 'error': (result.stderr.strip().splitlines() or ['no output'])[-1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default=','.join(MODE_KEYS))
+    parser.add_argument('--items', type=_int_list, default=[1, 10, 500])
+    parser.add_argument('--concurrency', type=_int_list, default=[1, 4])
+    parser.add_argument('--size-kb', type=int, default=1024, help='Size of each media file')
+    parser.add_argument('--segment-kb', type=int, default=256, help='HLS/DASH fragment size')
+    parser.add_argument('--protocol', choices=('progressive', 'hls', 'dash'), default='progressive')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Server delay per request')
+    parser.add_argument('--bandwidth-mbps', type=float, default=0.0, help='Shared server cap (0 = unlimited)')
+    parser.add_argument('--postprocess', action='store_true',
+                        help='Keep ffmpeg postprocessors (needs decodable media; off by default)')
+    parser.add_argument('--output', help='Write JSON here instead of stdout')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(json.loads(args.child))))
+        return
+
+    from media_server import MediaServer
+
+    bandwidth = args.bandwidth_mbps * 1e6 / 8 if args.bandwidth_mbps else None
+    results = []
+    with MediaServer(latency=args.latency_ms / 1000, bandwidth=bandwidth) as server:
+        for mode in args.modes.split(','):
+            for items in args.items:
+                for concurrency in args.concurrency:
+                    spec = {
+                        'server_url': server.url,
+                        'mode': mode,
+                        'items': items,
+                        'concurrency': concurrency,
+                        'size': args.size_kb * 1024,
+                        'segment_size': args.segment_kb * 1024,
+                        'protocol': args.protocol,
+                        'postprocess': args.postprocess,
+                    }
+                    result = spawn_scenario(spec)
+                    result.pop('server_url', None)
+                    results.append(result)
+                    outcome = result.get('error') or f"{result['wall_s']:.2f}s, {result['ok']} ok"
+                    print(f"{mode:<10} items={items:<4} concurrency={concurrency:<3} {outcome}", file=sys.stderr)
+
+    report = {
+        'benchmark': 'e2e',
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'server': {
+            'latency_ms': args.latency_ms,
+            'bandwidth_mbps': args.bandwidth_mbps,
+            'protocol': args.protocol,
+            'size_kb': args.size_kb,
+        },
+        'results': results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
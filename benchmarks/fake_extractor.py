@@ -0,0 +1,275 @@
+"""
+Fake extractor for offline benchmarks
+Maps benchmark YouTube/Instagram URLs to synthetic info dicts whose media
+URLs point at the local media server, and patches yt_dlp.YoutubeDL so the
+app's own extract_info/process_ie_result calls are served from it.
+
+Everything after extraction (format selection, the HTTP/HLS/DASH
+downloaders, progress hooks) is real yt-dlp code.
+"""
+
+import re
+from contextlib import contextmanager
+
+import headless  # noqa: F401  (puts the app root on sys.path)
+
+import yt_dlp
+
+
+VIDEO_URL = "https://www.youtube.com/watch?v=bench{index:07d}"
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=BENCH{count}"
+INSTAGRAM_URL = "https://www.instagram.com/p/BENCH{index:07d}/"
+
+_VIDEO_RE = re.compile(r'watch\?v=bench(\d+)')
+_PLAYLIST_RE = re.compile(r'playlist\?list=BENCH(\d+)')
+_INSTAGRAM_RE = re.compile(r'instagram\.com/p/BENCH(\d+)')
+
+PROTOCOLS = ('progressive', 'hls', 'dash')
+
+# Shape of a real YouTube extraction, used with rich=True
+RICH_HEIGHTS = (144, 240, 360, 480, 720, 1080, 1440, 2160)
+RICH_VCODECS = ('avc1.4d401e', 'vp9', 'av01.0.08M.08')
+RICH_CAPTION_LANGS = 150
+RICH_CAPTION_EXTS = ('json3', 'srv1', 'srv2', 'srv3', 'ttml', 'vtt')
+# Signed googlevideo-style query strings make real format/caption URLs long
+RICH_SIGNATURE = 'sig=' + 'A1b2C3d4' * 60
+RICH_THUMBNAILS = 40
+RICH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-us,en;q=0.5',
+    'Sec-Fetch-Mode': 'navigate',
+}
+
+
+class FakeLibrary:
+    """
+    Synthetic catalogue served by a MediaServer.
+
+    Args:
+        server_url: Base URL of the running media server
+        size: Bytes per media file
+        protocol: 'progressive', 'hls' or 'dash'
+        segment_size: Bytes per HLS/DASH fragment
+        duration: Reported duration in seconds
+        rich: Add YouTube-sized metadata (format ladder, captions, thumbnails)
+    """
+
+    def __init__(self, server_url, size=1024 * 1024, protocol='progressive',
+                 segment_size=256 * 1024, duration=60, rich=False):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"protocol must be one of {PROTOCOLS}")
+        self.server_url = server_url.rstrip('/')
+        self.size = size
+        self.protocol = protocol
+        self.segment_size = segment_size
+        self.duration = duration
+        self.rich = rich
+
+    # ------------------------------------------------------------------
+    # URLs
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def video_url(index):
+        return VIDEO_URL.format(index=index)
+
+    @staticmethod
+    def playlist_url(count):
+        return PLAYLIST_URL.format(count=count)
+
+    @staticmethod
+    def instagram_url(index):
+        return INSTAGRAM_URL.format(index=index)
+
+    # ------------------------------------------------------------------
+    # Info dicts
+    # ------------------------------------------------------------------
+
+    def _video_format(self, name):
+        base = {
+            'format_id': f'{self.protocol}-720',
+            'ext': 'mp4',
+            'vcodec': 'avc1.64001F',
+            'acodec': 'mp4a.40.2',
+            'width': 1280,
+            'height': 720,
+            'fps': 30,
+            'tbr': self.size * 8 / 1000 / self.duration,
+            'filesize': self.size,
+        }
+        if self.protocol == 'hls':
+            segments = max(1, -(-self.size // self.segment_size))
+            base.update({
+                'url': f"{self.server_url}/hls/{name}/index.m3u8?segments={segments}&size={self.segment_size}",
+                'protocol': 'm3u8_native',
+            })
+        elif self.protocol == 'dash':
+            segments = max(1, -(-self.size // self.segment_size))
+            base.update({
+                'url': f"{self.server_url}/dash/{name}/",
+                'fragment_base_url': f"{self.server_url}/dash/{name}/",
+                'fragments': [{'path': f"seg{i}.m4s?size={self.segment_size}"} for i in range(segments)],
+                'protocol': 'http_dash_segments',
+            })
+        else:
+            base.update({
+                'url': f"{self.server_url}/media/{name}.mp4?size={self.size}",
+                'protocol': 'https' if self.server_url.startswith('https') else 'http',
+            })
+        return base
+
+    def _audio_format(self, name):
+        audio_size = max(1, self.size // 8)
+        return {
+            'format_id': 'audio-128',
+            'url': f"{self.server_url}/media/{name}.m4a?size={audio_size}",
+            'protocol': 'http',
+            'ext': 'm4a',
+            'vcodec': 'none',
+            'acodec': 'mp4a.40.2',
+            'abr': 128,
+            'tbr': 128,
+            'filesize': audio_size,
+        }
+
+    def _ladder_formats(self, name):
+        """Per-codec DASH video ladder with signed URLs and headers, like YouTube's."""
+        formats = []
+        for codec in RICH_VCODECS:
+            for height in RICH_HEIGHTS:
+                format_id = f"{codec.split('.')[0]}-{height}"
+                formats.append({
+                    'format_id': format_id,
+                    'format_note': f"{height}p",
+                    'url': f"{self.server_url}/media/{name}-{format_id}.mp4?size={self.size}&{RICH_SIGNATURE}",
+                    'protocol': 'https' if self.server_url.startswith('https') else 'http',
+                    'downloader_options': {'http_chunk_size': 10485760},
+                    'ext': 'mp4' if codec.startswith('avc1') else 'webm',
+                    'vcodec': codec,
+                    'acodec': 'none',
+                    'width': height * 16 // 9,
+                    'height': height,
+                    'fps': 30,
+                    'tbr': height * 4.0,
+                    'filesize': height * 40_000,
+                    'dynamic_range': 'SDR',
+                    'http_headers': dict(RICH_HEADERS),
+                })
+        return formats
+
+    def _rich_metadata(self, name):
+        captions = {
+            f"l{lang:03d}": [
+                {'ext': ext, 'url': f"{self.server_url}/captions/{name}?lang=l{lang:03d}&fmt={ext}&{RICH_SIGNATURE[:200]}",
+                 'name': f"Language {lang} (auto-generated)"}
+                for ext in RICH_CAPTION_EXTS
+            ]
+            for lang in range(RICH_CAPTION_LANGS)
+        }
+        return {
+            'description': f"Description of {name}. " * 100,
+            'tags': [f"tag{i}" for i in range(30)],
+            'automatic_captions': captions,
+            'subtitles': {},
+            'thumbnails': [
+                {'url': f"{self.server_url}/thumb/{name}_{i}.jpg", 'id': str(i),
+                 'preference': -i, 'width': 120 + i * 40, 'height': 90 + i * 30}
+                for i in range(RICH_THUMBNAILS)
+            ],
+            'heatmap': [{'start_time': i * 6.0, 'end_time': (i + 1) * 6.0, 'value': 0.5} for i in range(100)],
+            'chapters': [{'start_time': i * 60.0, 'end_time': (i + 1) * 60.0, 'title': f"Chapter {i + 1}"}
+                         for i in range(max(1, self.duration // 60))],
+        }
+
+    def video_info(self, index, webpage_url=None, extractor='bench'):
+        name = f"bench{index:07d}"
+        info = {
+            '_type': 'video',
+            'id': name,
+            'title': f"Benchmark video {index}",
+            'duration': self.duration,
+            'thumbnail': f"{self.server_url}/thumb/{name}.jpg",
+            'webpage_url': webpage_url or self.video_url(index),
+            'extractor': extractor,
+            'extractor_key': extractor.capitalize(),
+            'formats': [self._audio_format(name), self._video_format(name)],
+        }
+        if self.rich:
+            info['formats'] += self._ladder_formats(name)
+            info.update(self._rich_metadata(name))
+        return info
+
+    def playlist_info(self, count):
+        # Flat entries, as returned with extract_flat='in_playlist'
+        return {
+            '_type': 'playlist',
+            'id': f"BENCH{count}",
+            'title': f"Benchmark playlist ({count})",
+            'webpage_url': self.playlist_url(count),
+            'extractor': 'bench',
+            'extractor_key': 'Bench',
+            'entries': [
+                {
+                    '_type': 'url',
+                    'title': f"Benchmark video {i}",
+                    'url': self.video_url(i),
+                    'duration': self.duration,
+                    'thumbnail': f"{self.server_url}/thumb/bench{i:07d}.jpg",
+                }
+                for i in range(count)
+            ],
+        }
+
+    def info_for(self, url):
+        """Raw (unprocessed) info dict for a benchmark URL, or None."""
+        match = _PLAYLIST_RE.search(url)
+        if match:
+            return self.playlist_info(int(match.group(1)))
+        match = _VIDEO_RE.search(url)
+        if match:
+            return self.video_info(int(match.group(1)))
+        match = _INSTAGRAM_RE.search(url)
+        if match:
+            index = int(match.group(1))
+            return self.video_info(index, webpage_url=self.instagram_url(index), extractor='instagram')
+        return None
+
+    # ------------------------------------------------------------------
+    # Patching
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def installed(self, postprocess=True):
+        """
+        Serve benchmark URLs from this library inside the block.
+
+        With postprocess=False, ffmpeg postprocessors and fixups are dropped
+        (synthetic bytes are not decodable media).
+        """
+        library = self
+        original_extract = yt_dlp.YoutubeDL.extract_info
+        original_init = yt_dlp.YoutubeDL.__init__
+
+        def extract_info(ydl, url, download=True, *args, **kwargs):
+            info = library.info_for(url)
+            if info is None:
+                return original_extract(ydl, url, download, *args, **kwargs)
+            if info['_type'] == 'playlist':
+                return info
+            return ydl.process_ie_result(info, download=download)
+
+        def init(ydl, params=None, *args, **kwargs):
+            if params is not None and not postprocess:
+                params = dict(params)
+                params.pop('postprocessors', None)
+                params['fixup'] = 'never'
+            original_init(ydl, params, *args, **kwargs)
+
+        yt_dlp.YoutubeDL.extract_info = extract_info
+        yt_dlp.YoutubeDL.__init__ = init
+        try:
+            yield self
+        finally:
+            yt_dlp.YoutubeDL.extract_info = original_extract
+            yt_dlp.YoutubeDL.__init__ = original_init
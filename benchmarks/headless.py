@@ -0,0 +1,81 @@
+"""
+Headless page stand-in for benchmarks
+Implements the subset of ft.Page that the downloader modes touch, so their
+constructors and download paths can run without a Flet client window.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Make the app modules importable when running `python benchmarks/<script>.py`
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+class HeadlessPage:
+    """
+    Minimal ft.Page replacement.
+
+    Records update()/run_task() calls and the time of the first update so
+    benchmarks can measure "time to first paint" without a renderer.
+    """
+
+    def __init__(self):
+        self.controls = []
+        self.title = ""
+        self.window_width = None
+        self.window_height = None
+        self.theme_mode = None
+        self.theme = None
+        self.bgcolor = None
+        self.padding = None
+        self.fonts = None
+        self.dialog = None
+        self.on_keyboard_event = None
+        self.on_disconnect = None
+        self.on_close = None
+        self.session_id = "headless"
+
+        self.update_count = 0
+        self.task_count = 0
+        self.first_update_at = None
+        self._lock = threading.Lock()
+
+    def add(self, *controls):
+        self.controls.extend(controls)
+        self.update()
+
+    def clean(self):
+        self.controls.clear()
+        self.update()
+
+    def update(self, *controls):
+        with self._lock:
+            self.update_count += 1
+            if self.first_update_at is None:
+                self.first_update_at = time.perf_counter()
+
+    def run_task(self, handler, *args, **kwargs):
+        with self._lock:
+            self.task_count += 1
+        result = handler(*args, **kwargs)
+        if asyncio.iscoroutine(result):
+            asyncio.run(result)
+
+    def run_thread(self, handler, *args, **kwargs):
+        threading.Thread(target=handler, args=args, kwargs=kwargs, daemon=True).start()
+
+
+def wait_until(predicate, timeout=600, interval=0.05):
+    """Poll predicate() until it returns truthy or timeout expires. Returns the final value."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(interval)
+    return predicate()
@@ -0,0 +1,243 @@
+"""
+Local synthetic media server for offline benchmarks
+Serves deterministic bytes over HTTP with Range support, HLS playlists and
+DASH-style fragments, with optional per-request latency and a shared
+bandwidth cap, so download paths can be exercised without the network.
+
+URL layout (every size is in bytes):
+    /media/<name>.<ext>?size=N                   progressive file
+    /hls/<name>/index.m3u8?segments=N&size=M     HLS media playlist
+    /hls/<name>/seg<i>.ts?size=M                 HLS segment
+    /dash/<name>/seg<i>.m4s?size=M               DASH fragment
+    /thumb/<name>.jpg                            thumbnail
+
+Usage:
+    python benchmarks/media_server.py [--port 8765] [--latency-ms 50] [--bandwidth-mbps 100]
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+BLOCK = bytes(range(256)) * 4096  # 1 MiB repeating pattern
+CHUNK_SIZE = 64 * 1024
+DEFAULT_SIZE = 1024 * 1024
+THUMB_SIZE = 16 * 1024
+
+
+# ============================================================================
+# SHAPING
+# ============================================================================
+
+class TokenBucket:
+    """Shared bandwidth cap across every connection (bytes per second)."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        # ~50 ms of burst, but at least one chunk or slow caps would never release a write
+        self.capacity = max((rate or 0) * 0.05, CHUNK_SIZE)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                deficit = (amount - self._tokens) / self.rate
+            time.sleep(deficit)
+
+
+def synthetic_bytes(start, end):
+    """Bytes [start, end) of the endless repeating pattern."""
+    out = bytearray()
+    pos = start
+    while pos < end:
+        offset = pos % len(BLOCK)
+        take = min(end - pos, len(BLOCK) - offset)
+        out += BLOCK[offset:offset + take]
+        pos += take
+    return bytes(out)
+
+
+# ============================================================================
+# HANDLER
+# ============================================================================
+
+class MediaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "BenchMedia/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def _handle(self, send_body):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        path = parsed.path
+
+        if path.endswith('.m3u8'):
+            segments = int(query.get('segments', ['10'])[0])
+            size = int(query.get('size', [str(DEFAULT_SIZE)])[0])
+            body = self._hls_playlist(segments, size).encode()
+            self._send_full(body, 'application/vnd.apple.mpegurl', send_body)
+            return
+
+        if path.startswith('/thumb/'):
+            size = THUMB_SIZE
+            content_type = 'image/jpeg'
+        elif path.startswith(('/media/', '/hls/', '/dash/')):
+            size = int(query.get('size', [str(DEFAULT_SIZE)])[0])
+            content_type = 'audio/mp4' if path.endswith('.m4a') else 'video/mp4'
+        else:
+            self.send_error(404)
+            return
+
+        self._send_range(size, content_type, send_body)
+
+    def _hls_playlist(self, segments, size):
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:4", "#EXT-X-MEDIA-SEQUENCE:0"]
+        for i in range(segments):
+            lines += ["#EXTINF:4.000,", f"seg{i}.ts?size={size}"]
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def _send_full(self, body, content_type, send_body):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self._write(body)
+
+    def _send_range(self, size, content_type, send_body):
+        start, end = 0, size - 1
+        range_header = self.headers.get('Range')
+        if range_header and range_header.startswith('bytes='):
+            first, _, last = range_header[len('bytes='):].split(',')[0].partition('-')
+            if first:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            elif last:
+                start = max(0, size - int(last))
+            if start >= size or start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+
+        self.send_header('Content-Type', content_type)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if not send_body:
+            return
+
+        pos = start
+        while pos <= end:
+            chunk_end = min(pos + CHUNK_SIZE, end + 1)
+            if not self._write(synthetic_bytes(pos, chunk_end)):
+                return
+            pos = chunk_end
+
+    def _write(self, data):
+        self.server.bucket.consume(len(data))
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            return False
+        with self.server.stats_lock:
+            self.server.bytes_served += len(data)
+        return True
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+class MediaServer:
+    """
+    Background HTTP server for synthetic media.
+
+    Args:
+        port: TCP port (0 picks a free one)
+        latency: Seconds slept before answering each request
+        bandwidth: Shared cap in bytes per second (None = unlimited)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, bandwidth=None):
+        self.httpd = ThreadingHTTPServer((host, port), MediaHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.bucket = TokenBucket(bandwidth)
+        self.httpd.bytes_served = 0
+        self.httpd.stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def bytes_served(self):
+        return self.httpd.bytes_served
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay before each response')
+    parser.add_argument('--bandwidth-mbps', type=float, default=0.0, help='Shared cap in megabits/s (0 = unlimited)')
+    args = parser.parse_args()
+
+    bandwidth = args.bandwidth_mbps * 1e6 / 8 if args.bandwidth_mbps else None
+    server = MediaServer(port=args.port, latency=args.latency_ms / 1000, bandwidth=bandwidth)
+    print(f"Serving synthetic media on {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
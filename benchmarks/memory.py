@@ -0,0 +1,113 @@
+"""
+Memory footprint benchmark for large playlists and long sessions
+Traces allocations with profiling.memory_profiler while the real Playlist
+mode loads a 10,000-entry playlist and the Advanced mode analyzes 500
+YouTube-sized videos on one instance (each info dict is kept in
+metadata_cache by core.resolve). Extraction is served by the fake
+extractor with rich=True, so no network or media server is needed.
+
+The report lists traced memory at each checkpoint, the top allocation
+sites at the peak, and what is still retained once the session ends.
+
+Usage:
+    python benchmarks/memory.py [--playlist 10000] [--analyses 500]
+                                [--frames 1] [--top 20] [--output memory.json]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from headless import HeadlessPage, wait_until
+
+
+PHASE_TIMEOUT = 3600
+# No media is downloaded; info dicts only need syntactically valid URLs
+OFFLINE_SERVER = "http://127.0.0.1:9"
+
+
+def _new_mode(key):
+    import launcher
+    return launcher.load_mode(key)(HeadlessPage(), on_back=lambda _e=None: None)
+
+
+def load_playlist(library, count):
+    mode = _new_mode('playlist')
+    mode.url_field.value = library.playlist_url(count)
+    mode.fetch_playlist(None)
+    wait_until(lambda: not mode.fetch_btn.disabled, PHASE_TIMEOUT)
+    return mode
+
+
+def analyze_videos(library, count, checkpoint_every):
+    from profiling import memory_profiler
+
+    mode = _new_mode('advanced')
+    dropdown = mode.get_control("format_dropdown")
+    for i in range(count):
+        url = library.video_url(i)
+        mode.url_field.value = url
+        dropdown.value = None
+        mode.fetch_formats(None)
+        wait_until(lambda: not mode.fetch_btn.disabled, PHASE_TIMEOUT)
+        if checkpoint_every and (i + 1) % checkpoint_every == 0:
+            memory_profiler.checkpoint(f"analyzed[{i + 1}]")
+    return mode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--playlist', type=int, default=10_000, help='Entries in the loaded playlist')
+    parser.add_argument('--analyses', type=int, default=500, help='Videos analyzed in the Advanced mode')
+    parser.add_argument('--checkpoint-every', type=int, default=100, help='Analyses between checkpoints')
+    parser.add_argument('--frames', type=int, default=1, help='Traceback depth kept by tracemalloc')
+    parser.add_argument('--top', type=int, default=20, help='Allocation sites per section')
+    parser.add_argument('--output', help='Write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    from fake_extractor import FakeLibrary
+    from profiling import memory_profiler
+
+    library = FakeLibrary(OFFLINE_SERVER, rich=True)
+    memory_profiler.start(args.frames)
+    memory_profiler.checkpoint("baseline")
+
+    with library.installed(postprocess=False):
+        start = time.perf_counter()
+        playlist_mode = load_playlist(library, args.playlist)
+        playlist_s = time.perf_counter() - start
+        memory_profiler.checkpoint("playlist_phase_done")
+
+        start = time.perf_counter()
+        advanced_mode = analyze_videos(library, args.analyses, args.checkpoint_every)
+        analyses_s = time.perf_counter() - start
+        memory_profiler.checkpoint("analysis_phase_done")
+
+    # Both modes stay alive, as they would in a long-running session
+    summary = memory_profiler.summary(args.top)
+    report = {
+        'benchmark': 'memory',
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {k: v for k, v in vars(args).items() if k != 'output'},
+        'playlist_videos': len(playlist_mode.videos),
+        'playlist_s': playlist_s,
+        'analyses_s': analyses_s,
+        'analyzed_formats_last': len(advanced_mode.all_formats_data or []),
+        **summary,
+    }
+    memory_profiler.report(file=sys.stderr, top=args.top)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Microbenchmarks for metadata processing hot paths
+Times the CPU-side code that runs between extraction and download on large
+synthetic inputs: format indexing/labelling (fetch_formats), MetadataCache
+at 10^5 entries, URL validation, playlist row construction (fetch_playlist)
+and translate_error/format_bytes. Results are JSON and can be compared
+against a previous run.
+
+Usage:
+    python benchmarks/micro.py [--output micro.json] [--compare baseline.json]
+                               [--formats 400] [--playlist 20000] [--repeat 5]
+                               [--fixtures recorded-dir]
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+from headless import HeadlessPage
+
+
+# ============================================================================
+# SYNTHETIC INPUTS
+# ============================================================================
+
+HEIGHTS = (144, 240, 360, 480, 720, 1080, 1440, 2160, 4320)
+VCODECS = ('avc1.640028', 'vp09.00.51.08', 'av01.0.12M.08', 'avc1.4d401f')
+ACODECS = ('mp4a.40.2', 'opus', 'mp4a.40.5')
+
+
+def synthetic_info(n_formats, seed=0, duration=600):
+    """Info dict shaped like a YouTube extraction with n_formats formats."""
+    rng = random.Random(seed)
+    formats = []
+    for i in range(n_formats):
+        kind = i % 5
+        if kind == 0:
+            acodec = rng.choice(ACODECS)
+            formats.append({
+                'format_id': f"a{i}", 'ext': 'm4a' if acodec.startswith('mp4a') else 'webm',
+                'vcodec': 'none', 'acodec': acodec, 'abr': rng.choice((48, 64, 128, 160, 256)),
+                'tbr': rng.uniform(40, 260), 'filesize': rng.randint(1, 20) * 1_000_000,
+                'resolution': 'audio only',
+            })
+        else:
+            height = rng.choice(HEIGHTS)
+            vcodec = rng.choice(VCODECS)
+            progressive = kind == 4
+            formats.append({
+                'format_id': f"v{i}", 'ext': 'mp4' if vcodec.startswith('avc1') else 'webm',
+                'vcodec': vcodec, 'acodec': rng.choice(ACODECS) if progressive else 'none',
+                'height': height, 'width': height * 16 // 9, 'fps': rng.choice((24, 30, 60)),
+                'tbr': rng.uniform(100, 40_000),
+                'filesize': rng.randint(1, 4000) * 1_000_000 if rng.random() > 0.3 else None,
+                'filesize_approx': rng.randint(1, 4000) * 1_000_000 if rng.random() > 0.5 else None,
+                'dynamic_range': 'HDR10' if rng.random() < 0.1 else 'SDR',
+                'resolution': f"{height * 16 // 9}x{height}",
+            })
+    return {'id': 'synthetic', 'title': 'Synthetic video', 'duration': duration, 'formats': formats}
+
+
+def synthetic_playlist(n_entries, seed=0):
+    """Flat playlist info dict with n_entries entries."""
+    rng = random.Random(seed)
+    return {
+        '_type': 'playlist',
+        'title': 'Synthetic playlist',
+        'entries': [
+            {
+                'title': f"Video {i} " + "x" * rng.randint(5, 80),
+                'url': f"https://www.youtube.com/watch?v={i:011d}",
+                'duration': rng.randint(30, 7200),
+                'thumbnail': f"https://i.ytimg.com/vi/{i:011d}/hqdefault.jpg",
+            }
+            for i in range(n_entries)
+        ],
+    }
+
+
+def synthetic_urls(n, seed=0):
+    rng = random.Random(seed)
+    templates = (
+        "https://www.youtube.com/watch?v={id}",
+        "https://youtu.be/{id}",
+        "https://www.youtube.com/playlist?list=PL{id}",
+        "https://www.instagram.com/p/{id}/",
+        "https://www.instagram.com/reel/{id}/",
+        "https://example.com/video/{id}",
+        "not a url {id}",
+    )
+    return [rng.choice(templates).format(id=f"{rng.getrandbits(48):012x}") for _ in range(n)]
+
+
+ERROR_MESSAGES = (
+    "HTTP Error 403: Forbidden",
+    "HTTP Error 429: Too Many Requests",
+    "Video unavailable. This video is private",
+    "Sign in to confirm your age",
+    "Unable to extract uploader id",
+    "[Errno 28] No space left on device",
+    "ffmpeg not found. Please install",
+    "Connection reset by peer",
+    "urlopen error [Errno -2] Name or service not known",
+    "Requested format is not available",
+    "Some completely unexpected failure " + "y" * 200,
+)
+
+
+# ============================================================================
+# TIMING
+# ============================================================================
+
+def measure(name, func, ops, repeat, setup=None):
+    """
+    Run func() `repeat` times (calling setup() before each) and summarise.
+
+    Args:
+        ops: Operations performed by one func() call (for ops/s)
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        func(state) if setup else func()
+        times.append(time.perf_counter() - start)
+
+    median = statistics.median(times)
+    return {
+        'name': name,
+        'ops': ops,
+        'repeat': repeat,
+        'min_s': min(times),
+        'median_s': median,
+        'mean_s': statistics.fmean(times),
+        'ops_per_s': ops / median if median else None,
+    }
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+def bench_formats(n_formats, repeat):
+    from formats import FormatIndex
+
+    info = synthetic_info(n_formats)
+    index = FormatIndex.from_info(info)
+
+    def fetch_formats_path():
+        idx = FormatIndex.from_info(info)
+        idx.rows()
+        idx.quality_options()
+        idx.audio_options()
+
+    return [
+        measure(f"format_index_build[{n_formats}]", lambda: FormatIndex.from_info(info), 1, repeat),
+        measure(f"fetch_formats_labels[{n_formats}]", fetch_formats_path, 1, repeat),
+        measure(f"format_spec_all_heights[{n_formats}]",
+                lambda: [index.format_spec(str(h)) for h in index.heights], len(index.heights), repeat),
+        measure(f"pick_within_budget[{n_formats}]",
+                lambda: index.pick_within_budget('video', max_bytes=500_000_000, max_kbps=8000), 1, repeat),
+    ]
+
+
+def bench_recorded_formats(fixture_dir, repeat):
+    """fetch_formats path over real info dicts from a fixtures.py store."""
+    from fixtures import FixtureStore
+    from formats import FormatIndex
+
+    results = []
+    for url, info in FixtureStore(fixture_dir).infos():
+        if not info.get('formats'):
+            continue
+
+        def fetch_formats_path(info=info):
+            idx = FormatIndex.from_info(info)
+            idx.rows()
+            idx.quality_options()
+            idx.audio_options()
+
+        results.append(measure(f"recorded_fetch_formats[{url}]", fetch_formats_path, 1, repeat))
+    return results
+
+
+def bench_metadata_cache(n, repeat):
+    from utils import MetadataCache
+
+    keys = [f"https://www.youtube.com/watch?v={i:011d}" for i in range(n)]
+    value = {'title': 'x'}
+
+    def filled(ttl=300):
+        cache = MetadataCache(ttl=ttl)
+        for key in keys:
+            cache.set(key, value)
+        return cache
+
+    def half_expired():
+        cache = filled()
+        old = time.time() - 10_000
+        for key in keys[::2]:
+            cache._timestamps[key] = old
+        return cache
+
+    def get_all(cache):
+        for key in keys:
+            cache.get(key)
+
+    def set_all(cache):
+        for key in keys:
+            cache.set(key, value)
+
+    return [
+        measure(f"metadata_cache_set[{n}]", set_all, n, repeat, setup=MetadataCache),
+        measure(f"metadata_cache_get_hit[{n}]", get_all, n, repeat, setup=filled),
+        measure(f"metadata_cache_clear_expired[{n}]", lambda cache: cache.clear_expired(), n, repeat,
+                setup=half_expired),
+    ]
+
+
+def bench_url_validation(n, repeat):
+    from utils import validate_youtube_url, validate_instagram_url
+
+    urls = synthetic_urls(n)
+    return [
+        measure(f"validate_youtube_url[{n}]", lambda: [validate_youtube_url(u) for u in urls], n, repeat),
+        measure(f"validate_instagram_url[{n}]", lambda: [validate_instagram_url(u) for u in urls], n, repeat),
+    ]
+
+
+def bench_playlist_rows(n_entries, repeat):
+    from youtube_playlist_downloader import PlaylistDownloader
+
+    info = synthetic_playlist(n_entries)
+    downloader = PlaylistDownloader(HeadlessPage())
+    url = "https://www.youtube.com/playlist?list=SYNTHETIC"
+
+    def build_rows():
+        for video in downloader.videos_from_info(info, url):
+            downloader.build_video_row(video)
+
+    return [
+        measure(f"playlist_videos_from_info[{n_entries}]",
+                lambda: downloader.videos_from_info(info, url), n_entries, repeat),
+        measure(f"playlist_build_rows[{n_entries}]", build_rows, n_entries, repeat),
+    ]
+
+
+def bench_text_helpers(n, repeat):
+    from utils import translate_error, format_bytes
+
+    errors = [Exception(ERROR_MESSAGES[i % len(ERROR_MESSAGES)]) for i in range(n)]
+    sizes = [int(1.7 ** (i % 60)) for i in range(n)]
+    return [
+        measure(f"translate_error[{n}]", lambda: [translate_error(e) for e in errors], n, repeat),
+        measure(f"format_bytes[{n}]", lambda: [format_bytes(s) for s in sizes], n, repeat),
+    ]
+
+
+# ============================================================================
+# COMPARISON
+# ============================================================================
+
+def compare(results, baseline, threshold):
+    """Print median-time ratios against a previous report; returns regressed names."""
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    regressed = []
+    print(f"{'benchmark':<42} {'baseline':>11} {'current':>11} {'ratio':>7}", file=sys.stderr)
+    for r in results:
+        old = previous.get(r['name'])
+        if not old:
+            print(f"{r['name']:<42} {'-':>11} {r['median_s']:>10.4f}s {'new':>7}", file=sys.stderr)
+            continue
+        ratio = r['median_s'] / old['median_s'] if old['median_s'] else float('inf')
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  SLOWER"
+            regressed.append(r['name'])
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{r['name']:<42} {old['median_s']:>10.4f}s {r['median_s']:>10.4f}s {ratio:>6.2f}x{flag}",
+              file=sys.stderr)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--formats', type=int, default=400, help='Formats per synthetic info dict')
+    parser.add_argument('--cache-entries', type=int, default=100_000)
+    parser.add_argument('--urls', type=int, default=100_000)
+    parser.add_argument('--playlist', type=int, default=20_000, help='Entries in the synthetic playlist')
+    parser.add_argument('--text', type=int, default=100_000, help='Calls for translate_error/format_bytes')
+    parser.add_argument('--fixtures', help='Also run the formats benchmark on info dicts recorded with YTDL_RECORD')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write JSON here instead of stdout')
+    parser.add_argument('--compare', help='Previous micro.py JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Ratio change reported as slower/faster')
+    args = parser.parse_args()
+
+    results = []
+    results += bench_formats(args.formats, args.repeat)
+    if args.fixtures:
+        results += bench_recorded_formats(args.fixtures, args.repeat)
+    results += bench_metadata_cache(args.cache_entries, args.repeat)
+    results += bench_url_validation(args.urls, args.repeat)
+    results += bench_playlist_rows(args.playlist, args.repeat)
+    results += bench_text_helpers(args.text, args.repeat)
+
+    report = {
+        'benchmark': 'micro',
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'fixtures')},
+        'results': results,
+    }
+
+    regressed = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(results, json.load(f), args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Startup benchmark
+Measures import cost per module (`-X importtime` breakdown), time to
+SetupWindow.build_ui, time to the first page.update and per-mode
+construction cost, and prints the result as JSON.
+
+Usage:
+    python benchmarks/startup.py [--output startup.json] [--top 25]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from headless import ROOT, HeadlessPage
+
+
+MODE_KEYS = ('simple', 'advanced', 'playlist', 'instagram')
+
+
+def import_times(module, top=25):
+    """
+    Run `python -X importtime -c "import <module>"` in a fresh interpreter.
+
+    Returns:
+        dict: total wall time and the top modules by cumulative import time (seconds)
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            rows.append({
+                'module': name.strip(),
+                'self_s': int(self_us) / 1e6,
+                'cumulative_s': int(cumulative_us) / 1e6,
+            })
+        except ValueError:
+            continue
+
+    rows.sort(key=lambda r: r['cumulative_s'], reverse=True)
+    return {
+        'module': module,
+        'ok': result.returncode == 0,
+        'wall_s': wall,
+        'top': rows[:top],
+    }
+
+
+def in_process_timings():
+    """Time launcher import, SetupWindow.build_ui, first update and each mode constructor."""
+    timings = {}
+
+    # "Start" is the launcher import, not process start: the -X importtime
+    # subprocess runs happen earlier in this process and must not count
+    t0 = time.perf_counter()
+    import launcher
+    timings['import_launcher_s'] = time.perf_counter() - t0
+
+    build_ui_time = {}
+    original_build_ui = launcher.SetupWindow.build_ui
+
+    def timed_build_ui(self):
+        t = time.perf_counter()
+        original_build_ui(self)
+        build_ui_time['s'] = time.perf_counter() - t
+
+    launcher.SetupWindow.build_ui = timed_build_ui
+    try:
+        page = HeadlessPage()
+        start = time.perf_counter()
+        setup = launcher.SetupWindow(page, run_checks=False)
+        timings['setup_window_s'] = time.perf_counter() - start
+        timings['setup_build_ui_s'] = build_ui_time.get('s')
+        timings['first_update_since_start_s'] = (page.first_update_at - t0) if page.first_update_at else None
+
+        start = time.perf_counter()
+        setup.show_menu()
+        timings['show_menu_s'] = time.perf_counter() - start
+    finally:
+        launcher.SetupWindow.build_ui = original_build_ui
+
+    modes = {}
+    for key in MODE_KEYS:
+        start = time.perf_counter()
+        mode_class = launcher.load_mode(key)
+        import_s = time.perf_counter() - start
+
+        page = HeadlessPage()
+        start = time.perf_counter()
+        mode_class(page, on_back=lambda _e=None: None)
+        modes[key] = {
+            'import_s': import_s,
+            'construct_s': time.perf_counter() - start,
+            'updates': page.update_count,
+        }
+    timings['modes'] = modes
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='Write JSON here instead of stdout')
+    parser.add_argument('--top', type=int, default=25, help='Modules to keep per import breakdown')
+    args = parser.parse_args()
+
+    report = {
+        'benchmark': 'startup',
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'imports': [
+            import_times(module, args.top)
+            for module in ('launcher', 'youtube_downloader_mvp', 'youtube_downloader_advanced',
+                           'youtube_playlist_downloader', 'instagram_downloader', 'yt_dlp')
+        ],
+        'in_process': in_process_timings(),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Headless command-line downloader
+Downloads YouTube videos and playlists without a GUI, using the same engine
+(core.py) as the Simple and Playlist modes. Progress and results are written
+to stdout as JSON lines, one event per line:
+
+    {"event": "queued", "url": ..., "title": ...}
+    {"event": "progress", "url": ..., "downloaded_bytes": ..., "total_bytes": ..., "percent": ...}
+    {"event": "done", "url": ..., "title": ..., "files": [...]}
+    {"event": "error", "url": ..., "error": ...}
+    {"event": "summary", "ok": ..., "failed": ...}
+
+With --daemon (or YTDL_DAEMON) the URLs are submitted to a running
+daemon.py instead and its job updates are reported as the same events.
+With --store they are queued in a shared job store for worker.py processes,
+and the command follows the jobs until they finish.
+
+Usage:
+    python cli.py URL [URL ...] [-i link.txt] [-o ~/Downloads] [-m video|audio|multi]
+                  [-t mp4,mp3] [-j 2] [--clip 0:30-1:45] [--max-size-mb 200] [--max-kbps 2500]
+                  [--extract-processes 4] [--daemon http://127.0.0.1:8765 | --store jobs.db] [--user alice]
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import core
+from fixtures import install_from_env
+from metrics import metrics
+from utils import (validate_youtube_url, check_ffmpeg_installed, parse_clip_spec, parse_budget,
+                   translate_error, MULTI_OUTPUT_TARGETS)
+
+# Serve/record extractor fixtures when YTDL_REPLAY / YTDL_RECORD is set
+install_from_env()
+
+# Minimum seconds between progress events for one download
+PROGRESS_INTERVAL = 0.5
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+class EventWriter:
+    """Thread-safe JSON-lines writer (one event per line, flushed immediately)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps({'event': event, 'time': time.time(), **fields}, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def progress_hook_for(writer, url):
+    """yt-dlp progress hook that emits throttled progress events for one URL."""
+    last = [0.0]
+
+    def hook(d):
+        if d['status'] != 'downloading':
+            return
+        now = time.monotonic()
+        if now - last[0] < PROGRESS_INTERVAL:
+            return
+        last[0] = now
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        downloaded = d.get('downloaded_bytes') or 0
+        writer.emit(
+            'progress', url=url,
+            downloaded_bytes=downloaded,
+            total_bytes=total,
+            percent=round(downloaded / total * 100, 1) if total else None,
+            speed=d.get('speed'),
+            eta=d.get('eta'),
+        )
+
+    return hook
+
+
+# ============================================================================
+# INPUTS
+# ============================================================================
+
+def read_url_file(path):
+    """URLs from a text file like link.txt (blank lines and # comments skipped)."""
+    urls = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                urls.append(line)
+    return urls
+
+
+def expand_inputs(urls, writer):
+    """
+    Validate inputs and expand playlist URLs into their entries (duplicates dropped).
+
+    Returns:
+        Tuple: ((url, title) pairs to download in input order, number of rejected inputs)
+    """
+    items = []
+    rejected = 0
+    for url in urls:
+        is_valid, error_msg = validate_youtube_url(url)
+        if not is_valid:
+            writer.emit('error', url=url, error=error_msg)
+            rejected += 1
+            continue
+
+        if 'list=' not in url:
+            items.append((url, None))
+            continue
+
+        try:
+            info = core.fetch_playlist(url)
+        except Exception as ex:
+            writer.emit('error', url=url, error=translate_error(ex))
+            rejected += 1
+            continue
+        entries = core.entries_from_info(info, url)
+        writer.emit('playlist', url=url, title=info.get('title'), count=len(entries))
+        items.extend((core.entry_url(entry['url']), entry['title']) for entry in entries)
+    seen = set()
+    unique = [item for item in items if not (item[0] in seen or seen.add(item[0]))]
+    return unique, rejected
+
+
+# ============================================================================
+# RUN
+# ============================================================================
+
+def run(items, writer, download_path, mode, targets=None, time_range=None, budget=None, concurrency=2):
+    """
+    Download every (url, title) item with `concurrency` workers.
+
+    Returns:
+        Tuple: (ok_count, failed_count)
+    """
+    urls = [url for url, _title in items]
+    # Extraction runs ahead of the downloads: `concurrency` videos download while the
+    # pool resolves the next ones (without a pool, each worker extracts its own video)
+    lookahead = max(1, concurrency) + core.extraction_pool.processes
+
+    def download_one(index):
+        url = urls[index]
+        if core.extraction_pool.enabled:
+            core.extraction_pool.prefetch(urls[index + 1:index + 1 + lookahead])
+        job = metrics.start_job('cli', url)
+        try:
+            result = core.download(
+                url,
+                download_path,
+                mode=mode,
+                time_range=time_range,
+                budget=budget,
+                targets=targets,
+                progress_hooks=[progress_hook_for(writer, url)],
+                job=job,
+            )
+            job.finish()
+            writer.emit('done', url=url, title=result['title'], files=result['outputs'])
+            return True
+        except Exception as ex:
+            job.finish(ok=False, error=ex)
+            writer.emit('error', url=url, error=translate_error(ex), detail=str(ex))
+            return False
+
+    for url, title in items:
+        writer.emit('queued', url=url, title=title)
+
+    if core.extraction_pool.enabled:
+        core.extraction_pool.prefetch(urls[:lookahead])
+
+    ok = failed = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for success in executor.map(download_one, range(len(urls))):
+            if success:
+                ok += 1
+            else:
+                failed += 1
+    return ok, failed
+
+
+def run_remote(urls, writer, client, payload):
+    """
+    Submit URLs to a daemon and report its job updates as events.
+
+    Returns:
+        Tuple: (ok_count, failed_count)
+    """
+    job_ids = []
+    failed = 0
+    for url in urls:
+        try:
+            jobs = client.submit(url=url, **payload)
+        except Exception as ex:
+            writer.emit('error', url=url, error=str(ex))
+            failed += 1
+            continue
+        for job in jobs:
+            writer.emit('queued', url=job['url'], title=job['title'], job=job['id'])
+            job_ids.append(job['id'])
+    if not job_ids:
+        return 0, failed
+
+    reported = set()
+
+    def on_update(job):
+        if job['status'] == 'running' and job['downloaded_bytes']:
+            writer.emit('progress', url=job['url'], job=job['id'], downloaded_bytes=job['downloaded_bytes'],
+                        total_bytes=job['total_bytes'], percent=job['percent'], speed=job['speed'], eta=job['eta'])
+        elif job['status'] in ('done', 'error', 'cancelled') and job['id'] not in reported:
+            reported.add(job['id'])
+            if job['status'] == 'done':
+                writer.emit('done', url=job['url'], job=job['id'], title=job['title'], files=job['result']['outputs'])
+            else:
+                writer.emit('error', url=job['url'], job=job['id'], error=job['error'] or job['status'])
+
+    final = client.wait(job_ids, on_update)
+    ok = sum(1 for job in final if job['status'] == 'done')
+    return ok, failed + len(final) - ok
+
+
+def _targets(value):
+    targets = [t.strip() for t in value.split(',') if t.strip()]
+    unknown = [t for t in targets if t not in MULTI_OUTPUT_TARGETS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown target(s): {', '.join(unknown)}")
+    return targets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='*', help='Video or playlist URLs')
+    parser.add_argument('-i', '--input', action='append', default=[], help='File with one URL per line (e.g. link.txt)')
+    parser.add_argument('-o', '--output-dir', default=str(Path.home() / "Downloads"))
+    parser.add_argument('-m', '--mode', choices=core.DOWNLOAD_MODES, default='video')
+    parser.add_argument('-t', '--targets', type=_targets, default=None,
+                        help=f"Multi mode outputs: {','.join(MULTI_OUTPUT_TARGETS)}")
+    parser.add_argument('-j', '--concurrency', type=int, default=2, help='Parallel downloads')
+    parser.add_argument('--clip', help='Only download this range, e.g. 0:30-1:45')
+    parser.add_argument('--max-size-mb', help='Pick the best formats within this size')
+    parser.add_argument('--max-kbps', help='Pick the best formats within this bitrate')
+    parser.add_argument('--extract-processes', type=int, default=core.extraction_pool.processes,
+                        help='Run metadata extraction in this many worker processes (0: in the download threads)')
+    parser.add_argument('--daemon', default=os.environ.get('YTDL_DAEMON'),
+                        help='Submit to a running daemon.py at this URL instead of downloading here')
+    parser.add_argument('--store', default=os.environ.get('YTDL_JOB_STORE'),
+                        help='Queue in this job store (worker.py processes download) instead of downloading here')
+    parser.add_argument('--user', default=os.environ.get('USER'), help="Fair-share identity on the daemon")
+    args = parser.parse_args(argv)
+
+    writer = EventWriter()
+    urls = list(args.urls)
+    for path in args.input:
+        try:
+            urls += read_url_file(path)
+        except OSError as ex:
+            writer.emit('error', url=path, error=str(ex))
+    if not urls:
+        parser.error("no URLs given")
+    if args.mode == 'multi' and not args.targets:
+        parser.error("--mode multi needs --targets")
+
+    time_range, range_error = parse_clip_spec(args.clip)
+    if range_error:
+        parser.error(range_error)
+    budget, budget_error = parse_budget(args.max_size_mb, args.max_kbps)
+    if budget_error:
+        parser.error(budget_error)
+
+    if args.daemon or args.store:
+        payload = {
+            'mode': args.mode, 'targets': args.targets, 'clip': args.clip,
+            'max_size_mb': args.max_size_mb, 'max_kbps': args.max_kbps,
+            'output_dir': str(Path(args.output_dir).expanduser().resolve()),
+        }
+        if args.store:
+            from jobstore import JobStore, StoreClient
+            client = StoreClient(JobStore(args.store), user=args.user)
+        else:
+            from daemon import DaemonClient
+            client = DaemonClient(args.daemon, user=args.user)
+        ok, failed = run_remote(urls, writer, client, payload)
+        writer.emit('summary', ok=ok, failed=failed)
+        return 1 if failed else 0
+
+    ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed()
+    if not ffmpeg_ok:
+        writer.emit('error', url=None, error=ffmpeg_error)
+        return 2
+
+    core.extraction_pool.processes = max(0, args.extract_processes)
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    items, rejected = expand_inputs(urls, writer)
+    ok, failed = run(items, writer, args.output_dir, args.mode, args.targets, time_range, budget, args.concurrency)
+    failed += rejected
+    writer.emit('summary', ok=ok, failed=failed)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+"""
+Download engine shared by the GUI modes and the CLI
+Resolution (extract_info + metadata cache), the per-mode format policy,
+picker selections, size/bitrate budgets, clip ranges, chapters, subtitles
+and postprocessing (MP3 extraction, MP4 conversion, multi-output fan-out,
+chapter splitting) with no UI code. Callers pass yt-dlp
+progress hooks; the GUI modes update their controls from them, the CLI
+prints JSON lines.
+
+With YTDL_EXTRACT_PROCESSES=N, extract_info runs in a pool of N worker
+processes (extraction_pool) instead of the calling thread, so resolving a
+big playlist scales with cores rather than one interpreter's GIL.
+"""
+
+import copy
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import yt_dlp
+
+from fixtures import install_from_env
+from formats import FormatIndex
+from tracing import tracer
+from utils import (metadata_cache, MULTI_OUTPUT_SOURCE_FORMAT, run_multi_output, can_stream_copy, has_audio_stream,
+                   apply_time_range, chapter_sections, split_by_chapters, expand_info, project_info,
+                   chosen_format_ids)
+
+
+# ============================================================================
+# FORMAT POLICY
+# ============================================================================
+
+# h264 + aac first so the MP4 plays in QuickTime without re-encoding
+VIDEO_FORMAT = 'bestvideo[vcodec=h264][ext=mp4]+bestaudio[acodec=aac][ext=m4a]/best[ext=mp4]/best'
+AUDIO_FORMAT = 'bestaudio/best'
+
+DOWNLOAD_MODES = ('video', 'audio', 'multi')
+
+QUIET_OPTS = {'quiet': True, 'no_warnings': True}
+
+
+def build_ydl_opts(mode, download_path, progress_hooks=None, convert_mp4=False):
+    """
+    yt-dlp options for a download mode.
+
+    Args:
+        mode: 'video', 'audio' or 'multi'
+        download_path: Output directory
+        progress_hooks: yt-dlp progress hooks
+        convert_mp4: Also run FFmpegVideoConvertor on video downloads (Simple mode)
+
+    Returns:
+        dict: ydl_opts
+    """
+    if mode not in DOWNLOAD_MODES:
+        raise ValueError(f"mode must be one of {DOWNLOAD_MODES}")
+
+    ydl_opts = {
+        'outtmpl': f'{download_path}/%(title)s.%(ext)s',
+        'progress_hooks': list(progress_hooks or []),
+        # Progress goes through the hooks; yt-dlp's own bar would corrupt the CLI's stdout
+        'noprogress': True,
+        **QUIET_OPTS,
+    }
+    if mode == "audio":
+        ydl_opts.update({
+            'format': AUDIO_FORMAT,
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+                'preferredquality': '192',
+            }],
+        })
+    elif mode == "multi":
+        # Fetch the media once; ffmpeg fans it out to every target afterwards
+        ydl_opts.update({
+            'format': MULTI_OUTPUT_SOURCE_FORMAT,
+            'outtmpl': f'{download_path}/%(title)s.source.%(ext)s',
+            'merge_output_format': 'mkv',
+        })
+    else:
+        ydl_opts.update({'format': VIDEO_FORMAT, 'merge_output_format': 'mp4'})
+        if convert_mp4:
+            ydl_opts['postprocessors'] = [{
+                'key': 'FFmpegVideoConvertor',
+                'preferedformat': 'mp4',
+            }]
+    return ydl_opts
+
+
+# ============================================================================
+# EXTRACTION POOL
+# ============================================================================
+
+def _init_extractor():
+    # Pool processes start fresh: serve/record fixtures like the parent does
+    install_from_env()
+
+
+def _extract_slim(url):
+    """extract_info inside a pool process; only the projection is sent back."""
+    try:
+        with yt_dlp.YoutubeDL(QUIET_OPTS) as ydl:
+            return project_info(ydl.extract_info(url, download=False))
+    except Exception as ex:
+        # yt-dlp errors carry exc_info/tracebacks that cannot be pickled back to
+        # the parent; send the message in a plain DownloadError instead
+        raise yt_dlp.utils.DownloadError(str(ex)) from None
+
+
+class ExtractionPool:
+    """
+    Process pool for extract_info (JSON parsing, regexes and signature
+    solving are pure Python and would otherwise contend for the GIL with
+    progress hooks and UI updates).
+
+    Workers return project_info() projections, which are a fraction of the
+    full info dict to pickle. Finished extractions go into metadata_cache,
+    and a URL that is already being extracted is not submitted twice, so
+    prefetch() followed by resolve() costs one extraction. Processes are
+    spawned on first use.
+    """
+
+    def __init__(self, processes=0, initializer=_init_extractor):
+        self.processes = processes
+        self.initializer = initializer
+        self._executor = None
+        self._pending = {}  # url -> Future
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.processes > 0
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: forking a process that runs Flet/UI threads is unsafe (and not the macOS default)
+            self._executor = ProcessPoolExecutor(
+                self.processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=self.initializer,
+            )
+        return self._executor
+
+    def submit(self, url, cache=True):
+        """Future for the projected info dict of url (stored in metadata_cache if cache)."""
+        with self._lock:
+            future = self._pending.get(url)
+            created = future is None
+            if created:
+                future = self._pending[url] = self._pool().submit(_extract_slim, url)
+        if created:
+            # Outside the lock: the callback runs right away if the future is already done
+            future.add_done_callback(lambda done: self._finished(url, done, cache))
+        return future
+
+    def _finished(self, url, future, cache):
+        with self._lock:
+            self._pending.pop(url, None)
+        if cache and not future.cancelled() and future.exception() is None:
+            metadata_cache.set(url, future.result())
+
+    def extract(self, url, cache=True):
+        return self.submit(url, cache).result()
+
+    def prefetch(self, urls):
+        """Start extracting urls in the background (cached ones are skipped)."""
+        for url in urls:
+            if not metadata_cache.get(url):
+                self.submit(url)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            pending, self._pending = list(self._pending.values()), {}
+        for future in pending:
+            future.cancel()
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global extraction pool (disabled unless YTDL_EXTRACT_PROCESSES is set)
+# Use: from core import extraction_pool
+extraction_pool = ExtractionPool(int(os.environ.get('YTDL_EXTRACT_PROCESSES') or 0))
+
+
+# ============================================================================
+# RESOLUTION
+# ============================================================================
+
+def entry_url(url_or_id):
+    """Full watch URL for a flat playlist entry (entries may carry bare IDs)."""
+    if url_or_id.startswith('http'):
+        return url_or_id
+    return f"https://www.youtube.com/watch?v={url_or_id}"
+
+
+def entries_from_info(info, url):
+    """
+    Plain entry dicts for a flat playlist info dict (or a single video).
+
+    Returns:
+        list: [{'title', 'url', 'duration', 'thumbnail'}, ...]
+    """
+    if 'entries' not in info:
+        return [{
+            'title': info.get('title', 'Unknown'),
+            'url': info.get('webpage_url', url),
+            'duration': info.get('duration', 0),
+            'thumbnail': info.get('thumbnail', None),
+        }]
+    return [
+        {
+            'title': entry.get('title', 'Unknown'),
+            'url': entry.get('url', entry.get('id', '')),
+            'duration': entry.get('duration', 0),
+            'thumbnail': entry.get('thumbnail', None),
+        }
+        for entry in info['entries'] if entry
+    ]
+
+
+def fetch_playlist(url):
+    """Flat playlist info dict (entries are not resolved individually)."""
+    ydl_opts = {**QUIET_OPTS, 'extract_flat': 'in_playlist'}
+    with tracer.span("fetch_playlist", url=url), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+def resolve(url, use_cache=True):
+    """
+    Info dict for a video URL, served from metadata_cache when possible.
+
+    Cached entries are slim projections. process_ie_result() fills in and
+    sorts the nested format dicts in place, so cached and pool results are
+    returned as deep copies to keep that out of the cache. With the
+    extraction pool enabled, the projection comes from a pool process.
+    """
+    if use_cache:
+        cached_info = metadata_cache.get(url)
+        if cached_info:
+            return copy.deepcopy(cached_info)
+
+    if extraction_pool.enabled:
+        with tracer.span("extract_info", url=url, pool=True):
+            info = extraction_pool.extract(url, cache=use_cache)
+        return copy.deepcopy(info)
+
+    with tracer.span("extract_info", url=url), yt_dlp.YoutubeDL(QUIET_OPTS) as ydl:
+        info = ydl.extract_info(url, download=False)
+    if use_cache:
+        metadata_cache.set(url, info)
+    return info
+
+
+# ============================================================================
+# DOWNLOAD
+# ============================================================================
+
+def download(url, download_path, mode='video', time_range=None, budget=None, targets=None,
+             progress_hooks=None, job=None, convert_mp4=False, on_convert=None, checkpoint=None,
+             format_id=None, chapters=None, subtitles=None):
+    """
+    Resolve, select and download one video, then run its postprocessing.
+
+    Args:
+        url: Video URL
+        download_path: Output directory
+        mode: 'video', 'audio' or 'multi'
+        time_range: (start, end) seconds for clip-only downloads, or None
+        budget: {'max_bytes', 'max_kbps'} from parse_budget(), or None
+        targets: MULTI_OUTPUT_TARGETS keys (multi mode)
+        progress_hooks: yt-dlp progress hooks
+        job: metrics.JobMetrics to attach (the caller finishes it)
+        convert_mp4: See build_ydl_opts()
+        on_convert: Called before the multi-output fan-out or chapter split starts
+        checkpoint: Called between stages (after resolve, around yt-dlp's postprocessors
+                    such as merging/conversion, before the multi-output fan-out);
+                    raising from it stops the download
+        format_id: Picker selection (a FormatIndex option id); turned into concrete
+                   format IDs from this video's formats. A budget takes precedence
+        chapters: Chapters (dicts from info['chapters']) to save as one file each;
+                  a subset only fetches its own byte ranges, all of them are cut
+                  from one full download. Replaces time_range
+        subtitles: Subtitle languages to save next to the video (SRT)
+
+    Returns:
+        dict: {'url', 'title', 'filename', 'outputs'}
+    """
+    if mode == "multi" and not targets:
+        raise ValueError("multi mode needs at least one output target")
+    if mode == "multi" and chapters:
+        raise ValueError("chapters cannot be combined with multi mode")
+
+    ydl_opts = build_ydl_opts(mode, download_path, progress_hooks, convert_mp4)
+    if not chapters:
+        # Only fetch the requested section when a clip range is set
+        apply_time_range(ydl_opts, time_range)
+    if subtitles:
+        ydl_opts.update({
+            'writesubtitles': True,
+            'subtitleslangs': list(subtitles),
+            'subtitlesformat': 'srt',
+        })
+    if checkpoint:
+        ydl_opts['postprocessor_hooks'] = [lambda d: checkpoint()]
+    if job:
+        job.attach(ydl_opts)
+    tracer.attach(ydl_opts)
+
+    info = resolve(url)
+    if job:
+        job.mark('resolve')
+    if checkpoint:
+        checkpoint()
+
+    if budget:
+        # Budget policy: best video+audio pair that fits this video's formats
+        with tracer.span("format_selection"):
+            spec = FormatIndex.from_info(info).pick_within_budget("audio" if mode == "audio" else "video", **budget)
+        if not spec:
+            raise Exception("Tanlangan hajm/bitreyt chegarasiga mos format topilmadi.")
+        ydl_opts['format'] = spec
+    elif format_id:
+        # Concrete IDs for the picker choice; the mode's selector when nothing matches
+        with tracer.span("format_selection"):
+            ydl_opts['format'] = FormatIndex.from_info(info).format_spec(
+                format_id, "audio" if mode == "audio" else "video", fallback=ydl_opts['format'])
+
+    partial_chapters = bool(chapters) and len(chapters) < len(info.get('chapters') or [])
+    if partial_chapters:
+        # Only fetch the byte ranges of the chosen chapters, one file per section
+        ydl_opts['download_ranges'] = chapter_sections(info['chapters'], chapters)
+        ydl_opts['outtmpl'] = f'{download_path}/%(title)s - %(section_number)02d %(section_title)s.%(ext)s'
+
+    # process_ie_result downloads from the resolved info without re-fetching metadata
+    with tracer.span("download", format=ydl_opts['format']), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = expand_info(info, ydl)
+        result = ydl.process_ie_result(info, download=True)
+        # Named from the processed result: its ext is the selected/merged format's
+        filename = ydl.prepare_filename(result)
+        # For audio, filename will have .mp3 extension
+        if mode == "audio":
+            filename = filename.rsplit('.', 1)[0] + '.mp3'
+
+    # Downloaded: only the formats just used stay whole in the cache (repeat
+    # downloads of other formats re-extract through expand_info)
+    metadata_cache.set(url, project_info(info, chosen_format_ids(result)))
+
+    outputs = [filename]
+    if partial_chapters:
+        outputs = [d['filepath'] for d in result.get('requested_downloads') or [] if d.get('filepath')]
+    elif chapters:
+        # Downloaded once; cut every chapter concurrently with stream copy
+        if checkpoint:
+            checkpoint()
+        if on_convert:
+            on_convert()
+        if job:
+            job.mark('postprocess_start')
+        outputs = split_by_chapters(result['requested_downloads'][0]['filepath'], chapters, keep_source=False)
+        if job:
+            job.mark('postprocess_end', once=False)
+    elif mode == "multi":
+        source_path = result['requested_downloads'][0]['filepath']
+        copy_video, copy_audio = can_stream_copy(result)
+        if checkpoint:
+            checkpoint()
+        if on_convert:
+            on_convert()
+        if job:
+            job.mark('postprocess_start')
+        outputs = run_multi_output(
+            source_path,
+            source_path.rsplit('.source.', 1)[0],
+            targets,
+            copy_video=copy_video,
+            copy_audio=copy_audio,
+            has_audio=has_audio_stream(result),
+        )
+        if job:
+            job.mark('postprocess_end', once=False)
+
+    return {'url': url, 'title': info.get('title'), 'filename': outputs[0], 'outputs': outputs}
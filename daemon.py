@@ -0,0 +1,1046 @@
+#!/usr/bin/env python3
+"""
+Local download daemon with an HTTP job API
+One long-running process owns the download queue, the metadata cache and
+the worker threads; the CLI (--daemon) and the Simple mode (YTDL_DAEMON)
+submit jobs to it instead of downloading in-process. Jobs run through the
+same engine as everywhere else (core.download).
+
+The same DownloadService also runs in-process as the shared engine of the
+multi-session web server (web.py, YTDL_SHARED_ENGINE=1): every browser
+session submits to it through a LocalClient and only follows its own jobs.
+Identical in-flight requests share one job, and finished downloads are
+remembered in an archive so repeats are answered without downloading.
+
+Jobs are scheduled fairly across users (web sessions, or the "user" field
+of a submission): weighted fair queuing picks the next job, optionally with
+a per-user limit on running jobs and a per-user bandwidth cap, so one user's
+2,000-video playlist does not hold up everyone else's single videos.
+
+Endpoints (JSON bodies and responses):
+    POST /jobs                     {"url", "mode", "targets", "clip" | "time_range",
+                                    "max_size_mb" + "max_kbps" | "budget", "output_dir",
+                                    "convert_mp4", "user"}
+                                   playlist URLs are expanded into one job per video
+    GET  /jobs                     every job, oldest first
+    GET  /jobs/<id>                one job
+    POST /jobs/<id>/cancel         stop and drop the job
+    POST /jobs/<id>/pause          stop the job, keeping the partial download
+    POST /jobs/<id>/resume         queue a paused job again (continues the .part file)
+    GET  /events[?job=<id>]        Server-Sent Events stream of job updates
+
+The server binds to 127.0.0.1 by default; there is no authentication.
+
+Usage:
+    python daemon.py [--host 127.0.0.1] [--port 8765] [-j 2] [-o ~/Downloads]
+                     [--user-jobs 2] [--user-rate-mb 5] [--weight alice=2]
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import core
+from fixtures import install_from_env
+from metrics import metrics
+from utils import (validate_youtube_url, check_ffmpeg_installed, parse_clip_spec, parse_budget, translate_error,
+                   MULTI_OUTPUT_TARGETS)
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Minimum seconds between progress updates published for one job
+PROGRESS_INTERVAL = 0.5
+# Seconds between keep-alive comments on idle event streams
+EVENT_KEEPALIVE = 15
+# Buffered updates per event subscriber before its oldest progress updates are dropped
+SUBSCRIBER_BACKLOG = 1000
+
+# Shared engine (web.py): finished downloads, one JSON object per line
+ARCHIVE_FILE = Path.home() / ".youtube_downloader" / "archive.jsonl"
+
+# Fair-share identity of submissions without a "user"
+DEFAULT_USER = 'anonymous'
+
+QUEUED, RUNNING, PAUSED, DONE, ERROR, CANCELLED = 'queued', 'running', 'paused', 'done', 'error', 'cancelled'
+FINAL_STATES = (DONE, ERROR, CANCELLED)
+
+
+class JobInterrupted(Exception):
+    """Raised from the progress hook to stop a running download (cancel/pause)."""
+
+
+class JobRequestError(Exception):
+    """Invalid job submission (message is shown to the user)."""
+
+
+# ============================================================================
+# JOBS
+# ============================================================================
+
+class Job:
+    """One video download owned by the service."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url, options, title=None, user=DEFAULT_USER):
+        self.id = str(next(self._ids))
+        self.user = user
+        self.owners = {user}  # users whose submissions share this job
+        self.key = job_key(url, options)
+        self.url = url
+        self.title = title
+        self.options = options
+        self.status = QUEUED
+        self.interrupt = None  # PAUSED or CANCELLED while a stop is pending
+        self.partials = set()  # temporary files written so far (removed on cancel)
+        self.downloaded_bytes = 0
+        self.total_bytes = None
+        self.speed = None
+        self.eta = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def percent(self):
+        if not self.total_bytes:
+            return None
+        return round(self.downloaded_bytes / self.total_bytes * 100, 1)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'url': self.url,
+            'title': self.title,
+            'mode': self.options['mode'],
+            'user': self.user,
+            'status': self.status,
+            'downloaded_bytes': self.downloaded_bytes,
+            'total_bytes': self.total_bytes,
+            'percent': self.percent,
+            'speed': self.speed,
+            'eta': self.eta,
+            'result': self.result,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+def job_key(url, options):
+    """Identity of a download request: same key, same output files."""
+    return json.dumps([url, options['mode'], options['targets'], options['time_range'],
+                       options['budget'], options['download_path'], options['convert_mp4']], sort_keys=True)
+
+
+def parse_job_request(payload, default_path):
+    """
+    Validate a POST /jobs body.
+
+    Returns:
+        Tuple: (url, options dict for core.download)
+    """
+    url = (payload.get('url') or '').strip()
+    is_valid, error_msg = validate_youtube_url(url)
+    if not is_valid:
+        raise JobRequestError(error_msg)
+
+    mode = payload.get('mode') or 'video'
+    if mode not in core.DOWNLOAD_MODES:
+        raise JobRequestError(f"mode must be one of {core.DOWNLOAD_MODES}")
+    targets = (payload.get('targets') or None) if mode == 'multi' else None
+    if mode == 'multi' and not targets:
+        raise JobRequestError("multi mode needs at least one output target")
+    if targets and any(t not in MULTI_OUTPUT_TARGETS for t in targets):
+        raise JobRequestError(f"targets must be from {list(MULTI_OUTPUT_TARGETS)}")
+
+    if payload.get('time_range'):
+        time_range = tuple(payload['time_range'])
+    else:
+        time_range, range_error = parse_clip_spec(payload.get('clip'))
+        if range_error:
+            raise JobRequestError(range_error)
+    if payload.get('budget'):
+        budget = dict(payload['budget'])
+    else:
+        budget, budget_error = parse_budget(payload.get('max_size_mb'), payload.get('max_kbps'))
+        if budget_error:
+            raise JobRequestError(budget_error)
+
+    return url, {
+        'mode': mode,
+        'targets': targets,
+        'time_range': time_range,
+        'budget': budget,
+        'download_path': payload.get('output_dir') or default_path,
+        'convert_mp4': bool(payload.get('convert_mp4')),
+    }
+
+
+def request_entries(url):
+    """(url, title) pairs a submission expands to: one per playlist entry."""
+    if 'list=' not in url:
+        return [(url, None)]
+    info = core.fetch_playlist(url)
+    return [(core.entry_url(e['url']), e['title']) for e in core.entries_from_info(info, url)]
+
+
+def _expected_size(info):
+    """Combined size of a merged download's formats, when every one is known."""
+    requested = (info or {}).get('requested_formats') or []
+    sizes = [f.get('filesize') or f.get('filesize_approx') for f in requested]
+    return sum(sizes) if sizes and all(sizes) else None
+
+
+# ============================================================================
+# FAIR SHARE
+# ============================================================================
+
+class FairQueue:
+    """
+    Weighted fair queue of job ids across users.
+
+    Every user has a FIFO and a virtual time that advances by 1/weight per
+    dispatched job; the next job comes from the eligible user with the
+    lowest virtual time. A single video submitted next to a long playlist
+    therefore waits for one dispatch, not for the whole playlist. Users
+    rejoining after being idle start at the current virtual time, so idle
+    periods do not bank credit. Not thread-safe (DownloadService holds its
+    lock).
+    """
+
+    def __init__(self, weights=None):
+        self.weights = dict(weights or {})
+        self._queues = {}  # user -> deque of job ids
+        self._vtime = {}
+        self._clock = 0.0
+
+    def __len__(self):
+        return sum(len(q) for q in self._queues.values())
+
+    def push(self, user, job_id):
+        user_queue = self._queues.get(user)
+        if user_queue is None:
+            user_queue = self._queues[user] = deque()
+            self._vtime[user] = max(self._vtime.get(user, 0.0), self._clock)
+        user_queue.append(job_id)
+
+    def remove(self, user, job_id):
+        user_queue = self._queues.get(user)
+        if user_queue and job_id in user_queue:
+            user_queue.remove(job_id)
+            if not user_queue:
+                del self._queues[user]
+
+    def pop(self, eligible=None):
+        """Next job id from a user for which eligible(user) is true, or None."""
+        users = [user for user in self._queues if eligible is None or eligible(user)]
+        if not users:
+            return None
+        user = min(users, key=self._vtime.__getitem__)
+        self._clock = self._vtime[user]
+        self._vtime[user] += 1.0 / self.weights.get(user, 1)
+        user_queue = self._queues[user]
+        job_id = user_queue.popleft()
+        if not user_queue:
+            del self._queues[user]
+        return job_id
+
+
+class RateLimiter:
+    """Token bucket (bytes/second) shared by all running downloads of one user."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._tokens = rate  # up to one second of burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        """Account for `amount` downloaded bytes, sleeping while over the rate."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= amount
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+
+# ============================================================================
+# EVENTS
+# ============================================================================
+
+class Subscription:
+    """
+    Update buffer of one event subscriber, optionally limited to some job ids.
+
+    When SUBSCRIBER_BACKLOG updates are waiting, the oldest progress update
+    is dropped to make room; final states (what wait() looks for) never are.
+    """
+
+    def __init__(self, job_ids=None):
+        self.job_ids = set(job_ids) if job_ids else None
+        self._updates = deque()
+        self._cond = threading.Condition()
+
+    def put(self, update):
+        if self.job_ids is not None and update['id'] not in self.job_ids:
+            return
+        with self._cond:
+            if len(self._updates) >= SUBSCRIBER_BACKLOG:
+                for index, old in enumerate(self._updates):
+                    if old['status'] not in FINAL_STATES:
+                        del self._updates[index]
+                        break
+            self._updates.append(update)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Next update; raises queue.Empty after timeout seconds without one."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._updates, timeout):
+                raise queue.Empty
+            return self._updates.popleft()
+
+
+# ============================================================================
+# SERVICE
+# ============================================================================
+
+class DownloadService:
+    """
+    Job queue with a fixed pool of download workers.
+
+    Queued jobs are dispatched through a FairQueue keyed by job.user.
+    user_jobs caps how many jobs of one user run at once and user_rate
+    (bytes/second) caps one user's combined download speed; weights
+    ({user: weight}) give some users a larger share.
+
+    Every state change is published to event subscribers as a job dict.
+    Submitting a request that is already queued/running returns that job
+    (resuming it if it was paused);
+    with an archive, a request that already finished (and whose files still
+    exist) gets an immediately completed job instead of a new download.
+    """
+
+    def __init__(self, download_path, concurrency=2, archive_path=None, user_jobs=None, user_rate=None,
+                 weights=None):
+        self.download_path = download_path
+        self.concurrency = max(1, concurrency)
+        self.archive_path = Path(archive_path) if archive_path else None
+        self.user_jobs = user_jobs
+        self.user_rate = user_rate
+        self._jobs = {}
+        self._active = {}  # job key -> unfinished job
+        self._archive = self._load_archive()
+        self._queue = FairQueue(weights)
+        self._running = Counter()  # user -> running jobs
+        self._limiters = {}
+        self._cond = threading.Condition()
+        self._subscribers = set()
+        self._subscribers_lock = threading.Lock()
+        self._workers = []
+
+    def _load_archive(self):
+        archive = {}
+        if not self.archive_path or not self.archive_path.exists():
+            return archive
+        with open(self.archive_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                archive[record['key']] = record['result']
+        return archive
+
+    def _remember(self, job):
+        if not self.archive_path:
+            return
+        self._archive[job.key] = job.result
+        try:
+            self.archive_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.archive_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': job.key, 'result': job.result}) + "\n")
+        except OSError:
+            pass
+
+    def _archived(self, key):
+        result = self._archive.get(key)
+        if result and all(os.path.exists(path) for path in result['outputs']):
+            return result
+        return None
+
+    def start(self):
+        for n in range(self.concurrency):
+            worker = threading.Thread(target=self._worker, name=f"download-worker-{n}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    def subscribe(self, job_ids=None):
+        """Subscription receiving every update of job_ids (all jobs when None)."""
+        events = Subscription(job_ids)
+        with self._subscribers_lock:
+            self._subscribers.add(events)
+        return events
+
+    def unsubscribe(self, events):
+        with self._subscribers_lock:
+            self._subscribers.discard(events)
+
+    def _publish(self, job):
+        update = job.to_dict()
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for events in subscribers:
+            events.put(update)
+
+    # ------------------------------------------------------------------
+    # Job control
+    # ------------------------------------------------------------------
+
+    def submit(self, payload):
+        """Create jobs for a request (one per playlist entry); returns them."""
+        url, options = parse_job_request(payload, self.download_path)
+        user = str(payload.get('user') or DEFAULT_USER)
+        entries = request_entries(url)
+
+        jobs = []
+        with self._cond:
+            for entry_url, title in entries:
+                job = Job(entry_url, options, title, user)
+                existing = self._active.get(job.key)
+                if existing is not None:
+                    # Same request from another client: share the job, resuming it if
+                    # it was paused (the new client's wait() would block on it otherwise)
+                    if existing.status == PAUSED:
+                        self._requeue(existing)
+                    elif existing.interrupt == PAUSED:
+                        existing.interrupt = None
+                    existing.owners.add(user)
+                    jobs.append(existing)
+                    continue
+                self._jobs[job.id] = job
+                archived = self._archived(job.key)
+                if archived:
+                    job.status = DONE
+                    job.result = archived
+                    job.title = archived['title']
+                    job.finished = time.time()
+                else:
+                    self._active[job.key] = job
+                    self._queue.push(user, job.id)
+                jobs.append(job)
+            self._cond.notify_all()
+        for job in jobs:
+            self._publish(job)
+        return jobs
+
+    def jobs(self):
+        with self._cond:
+            return list(self._jobs.values())
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id, user=None):
+        return self._stop(job_id, CANCELLED, user)
+
+    def pause(self, job_id, user=None):
+        return self._stop(job_id, PAUSED, user)
+
+    def _stop(self, job_id, state, user=None):
+        """
+        Cancel or pause a job on behalf of one of its owners.
+
+        Users that did not submit the job cannot stop it. A job shared by
+        several users keeps running until the last of them cancels it (a
+        cancel only withdraws that user); pausing needs every other owner
+        to have withdrawn.
+        """
+        user = str(user or DEFAULT_USER)
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINAL_STATES or user not in job.owners:
+                return job
+            if len(job.owners) > 1:
+                if state == CANCELLED:
+                    job.owners.discard(user)
+                return job
+            if job.status == RUNNING:
+                # The worker stops at its next progress report or stage boundary
+                job.interrupt = state
+                return job
+            if job.status == QUEUED:
+                self._queue.remove(job.user, job.id)
+            if state == PAUSED and job.status == PAUSED:
+                return job
+            job.status = state
+            if state == CANCELLED:
+                job.finished = time.time()
+                self._active.pop(job.key, None)
+        if state == CANCELLED and job.started:
+            # A paused (or requeued) job keeps its partial files until now
+            self._remove_partials(job)
+        self._publish(job)
+        return job
+
+    def resume(self, job_id, user=None):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != PAUSED or str(user or DEFAULT_USER) not in job.owners:
+                return job
+            self._requeue(job)
+            self._cond.notify_all()
+        self._publish(job)
+        return job
+
+    def _requeue(self, job):
+        # Caller holds self._cond
+        job.status = QUEUED
+        job.interrupt = None
+        self._queue.push(job.user, job.id)
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _has_slot(self, user):
+        return not self.user_jobs or self._running[user] < self.user_jobs
+
+    def _limiter(self, user):
+        if not self.user_rate:
+            return None
+        with self._cond:
+            if user not in self._limiters:
+                self._limiters[user] = RateLimiter(self.user_rate)
+            return self._limiters[user]
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                job_id = self._queue.pop(self._has_slot)
+                if job_id is not None:
+                    break
+                # Nothing queued, or only users already at their user_jobs limit
+                self._cond.wait()
+            job = self._jobs[job_id]
+            self._running[job.user] += 1
+            job.status = RUNNING
+            job.started = job.started or time.time()
+            return job
+
+    def _progress_hook(self, job):
+        last = [0.0]
+        limiter = self._limiter(job.user)
+        # filename -> (downloaded, total); byte counters restart for every file of a merged download
+        files = {}
+        # A resumed job's first report per file includes the .part already on disk
+        resumed = bool(job.downloaded_bytes)
+
+        def hook(d):
+            if job.interrupt:
+                raise JobInterrupted(job.interrupt)
+            if d['status'] != 'downloading':
+                return
+            filename = d.get('filename')
+            job.partials.add(d.get('tmpfilename') or filename)
+            downloaded = d.get('downloaded_bytes') or 0
+            if filename in files:
+                previous = files[filename][0]
+            else:
+                previous = downloaded if resumed else 0
+            if limiter:
+                # Blocking here throttles this download thread to the user's share
+                limiter.consume(max(0, downloaded - previous))
+            files[filename] = (downloaded, d.get('total_bytes') or d.get('total_bytes_estimate'))
+            job.downloaded_bytes = sum(done for done, _total in files.values())
+            job.total_bytes = (_expected_size(d.get('info_dict'))
+                               or sum(total or 0 for _done, total in files.values()) or None)
+            job.speed = d.get('speed')
+            job.eta = d.get('eta')
+            now = time.monotonic()
+            if now - last[0] >= PROGRESS_INTERVAL:
+                last[0] = now
+                self._publish(job)
+
+        return hook
+
+    @staticmethod
+    def _checkpoint(job):
+        def checkpoint():
+            if job.interrupt:
+                raise JobInterrupted(job.interrupt)
+        return checkpoint
+
+    @staticmethod
+    def _remove_partials(job):
+        """Delete a cancelled job's .part/.ytdl/fragment files and multi-output source."""
+        for partial in job.partials:
+            paths = [partial, partial + '.ytdl', *glob.glob(glob.escape(partial) + '-Frag*')]
+            if partial.endswith('.part'):
+                stem = partial[:-len('.part')]
+                if '.source.' in os.path.basename(stem):
+                    # Multi mode: the downloaded source is an intermediate file too
+                    paths.append(stem)
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        job.partials.clear()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            self._publish(job)
+            metrics_job = metrics.start_job('daemon', job.url)
+            try:
+                result = core.download(
+                    job.url,
+                    job.options['download_path'],
+                    mode=job.options['mode'],
+                    time_range=job.options['time_range'],
+                    budget=job.options['budget'],
+                    targets=job.options['targets'],
+                    progress_hooks=[self._progress_hook(job)],
+                    job=metrics_job,
+                    convert_mp4=job.options['convert_mp4'],
+                    checkpoint=self._checkpoint(job),
+                )
+                with self._cond:
+                    interrupted = job.interrupt
+                if interrupted == CANCELLED:
+                    # Cancelled during the last stage: the download finished, the job did not
+                    metrics_job.finish(ok=False, error=interrupted)
+                    status = CANCELLED
+                else:
+                    # A pause that arrives after the last stage has nothing left to pause
+                    metrics_job.finish()
+                    job.title = result['title']
+                    job.result = result
+                    status = DONE
+            except Exception as ex:
+                with self._cond:
+                    interrupted = job.interrupt
+                if interrupted:
+                    metrics_job.finish(ok=False, error=interrupted)
+                    status = interrupted
+                else:
+                    metrics_job.finish(ok=False, error=ex)
+                    job.error = translate_error(ex)
+                    status = ERROR
+
+            if status == CANCELLED:
+                self._remove_partials(job)
+            elif status != PAUSED:
+                job.partials.clear()
+            with self._cond:
+                job.status = status
+                job.interrupt = None
+                self._running[job.user] -= 1
+                # A freed user_jobs slot may make another user's queued job eligible
+                self._cond.notify_all()
+                if status != PAUSED:
+                    job.finished = time.time()
+                    self._active.pop(job.key, None)
+                if status == DONE:
+                    self._remember(job)
+            self._publish(job)
+
+
+# ============================================================================
+# HTTP API
+# ============================================================================
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Routes the job API onto server.service."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _job_or_404(self, job):
+        if job is None:
+            self._send_json({'error': 'job not found'}, 404)
+        else:
+            self._send_json(job.to_dict())
+
+    def do_GET(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        parts = [p for p in parsed.path.split('/') if p]
+        if parts == ['jobs']:
+            self._send_json([job.to_dict() for job in self.service.jobs()])
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            self._job_or_404(self.service.get(parts[1]))
+        elif parts == ['events']:
+            job_filter = urllib.parse.parse_qs(parsed.query).get('job')
+            self._stream_events(set(job_filter) if job_filter else None)
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        parts = [p for p in urllib.parse.urlsplit(self.path).path.split('/') if p]
+        if parts == ['jobs']:
+            try:
+                jobs = self.service.submit(self._read_json())
+            except (JobRequestError, ValueError) as ex:
+                self._send_json({'error': str(ex)}, 400)
+                return
+            except Exception as ex:
+                self._send_json({'error': translate_error(ex)}, 502)
+                return
+            self._send_json([job.to_dict() for job in jobs], 201)
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] in ('cancel', 'pause', 'resume'):
+            user = self._read_json().get('user')
+            self._job_or_404(getattr(self.service, parts[2])(parts[1], user))
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def _stream_events(self, job_ids):
+        events = self.service.subscribe(job_ids)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            # Current state first, so clients never miss jobs that finished before they connected
+            for job in self.service.jobs():
+                if job_ids is None or job.id in job_ids:
+                    self._write_event(job.to_dict())
+            while True:
+                try:
+                    update = events.get(timeout=EVENT_KEEPALIVE)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                self._write_event(update)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.service.unsubscribe(events)
+
+    def _write_event(self, update):
+        self.wfile.write(f"event: job\ndata: {json.dumps(update, default=str)}\n\n".encode())
+        self.wfile.flush()
+
+
+class DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        super().__init__((host, port), ServiceHandler)
+        self.service = service
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+# ============================================================================
+# CLIENTS
+# ============================================================================
+
+class _JobFollower:
+    """wait() on top of a client's events() stream."""
+
+    def wait(self, job_ids, on_update=None):
+        """
+        Follow jobs until all of them are final; returns their last states.
+
+        Whenever the stream goes quiet, the pending jobs are read again with
+        job(), so a final state that never arrived on the stream still ends
+        the wait.
+        """
+        pending = set(job_ids)
+        final = {}
+        updates = self.events(job_ids, heartbeats=True)
+        try:
+            for update in updates:
+                if update is None:
+                    batch = [self.job(job_id) for job_id in pending]
+                else:
+                    batch = [update]
+                for job in batch:
+                    if job is None:
+                        continue
+                    if on_update:
+                        on_update(job)
+                    if job['status'] in FINAL_STATES and job['id'] in pending:
+                        pending.discard(job['id'])
+                        final[job['id']] = job
+                if not pending:
+                    break
+        finally:
+            updates.close()
+        return [final[job_id] for job_id in job_ids]
+
+
+class DaemonClient(_JobFollower):
+    """Thin client for a running daemon (used by the CLI and the GUI modes)."""
+
+    def __init__(self, base_url, timeout=30, user=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.user = user
+
+    def _request(self, method, path, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=data, method=method,
+            headers={'Content-Type': 'application/json'} if data else {},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as ex:
+            try:
+                message = json.loads(ex.read()).get('error')
+            except ValueError:
+                message = None
+            raise JobRequestError(message or str(ex)) from ex
+
+    def submit(self, **payload):
+        """Submit a URL; returns the created job dicts."""
+        if self.user:
+            payload.setdefault('user', self.user)
+        return self._request('POST', '/jobs', payload)
+
+    def jobs(self):
+        return self._request('GET', '/jobs')
+
+    def job(self, job_id):
+        return self._request('GET', f'/jobs/{job_id}')
+
+    def cancel(self, job_id):
+        return self._request('POST', f'/jobs/{job_id}/cancel', {'user': self.user})
+
+    def pause(self, job_id):
+        return self._request('POST', f'/jobs/{job_id}/pause', {'user': self.user})
+
+    def resume(self, job_id):
+        return self._request('POST', f'/jobs/{job_id}/resume', {'user': self.user})
+
+    def events(self, job_ids=None, heartbeats=False):
+        """
+        Open the event stream and return an iterator of job dicts.
+
+        The connection is opened before this returns, so updates published
+        after the call are never missed. With heartbeats, None is yielded for
+        every keep-alive (the stream was quiet for EVENT_KEEPALIVE seconds).
+        """
+        query = urllib.parse.urlencode([('job', j) for j in job_ids or []])
+        response = urllib.request.urlopen(f"{self.base_url}/events?{query}", timeout=None)
+
+        def iterate():
+            with response:
+                for raw in response:
+                    line = raw.decode().rstrip('\n')
+                    if line.startswith('data: '):
+                        yield json.loads(line[len('data: '):])
+                    elif heartbeats and line.startswith(':'):
+                        yield None
+        return iterate()
+
+
+class LocalClient(_JobFollower):
+    """DaemonClient's interface over an in-process DownloadService (shared engine)."""
+
+    def __init__(self, service, user=None):
+        self.service = service
+        self.user = user
+
+    @staticmethod
+    def _dict(job):
+        return job.to_dict() if job else None
+
+    def submit(self, **payload):
+        if self.user:
+            payload.setdefault('user', self.user)
+        return [job.to_dict() for job in self.service.submit(payload)]
+
+    def jobs(self):
+        return [job.to_dict() for job in self.service.jobs()]
+
+    def job(self, job_id):
+        return self._dict(self.service.get(job_id))
+
+    def cancel(self, job_id):
+        return self._dict(self.service.cancel(job_id, self.user))
+
+    def pause(self, job_id):
+        return self._dict(self.service.pause(job_id, self.user))
+
+    def resume(self, job_id):
+        return self._dict(self.service.resume(job_id, self.user))
+
+    def events(self, job_ids=None, heartbeats=False):
+        """Iterator of updates for job_ids (current state first), like DaemonClient.events()."""
+        wanted = set(job_ids) if job_ids else None
+        events = self.service.subscribe(wanted)
+        snapshot = [job.to_dict() for job in self.service.jobs() if wanted is None or job.id in wanted]
+
+        def iterate():
+            try:
+                yield from snapshot
+                while True:
+                    try:
+                        yield events.get(timeout=EVENT_KEEPALIVE if heartbeats else None)
+                    except queue.Empty:
+                        yield None
+            finally:
+                self.service.unsubscribe(events)
+        return iterate()
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def parse_weights(specs):
+    """{user: weight} from 'user=weight' strings (--weight, YTDL_USER_WEIGHTS)."""
+    weights = {}
+    for spec in specs:
+        user, _, weight = spec.partition('=')
+        try:
+            weights[user.strip()] = float(weight)
+        except ValueError:
+            raise ValueError(f"weight must look like user=2, got {spec!r}") from None
+        if weights[user.strip()] <= 0:
+            raise ValueError(f"weight must be positive, got {spec!r}")
+    return weights
+
+
+def _mb_per_second(value):
+    return int(float(value) * 1024 * 1024) if value else None
+
+
+def shared_client(user=None):
+    """
+    LocalClient for the process-wide engine (started on first use).
+
+    Engine settings come from YTDL_ENGINE_WORKERS, YTDL_USER_JOBS,
+    YTDL_USER_RATE_MB and YTDL_USER_WEIGHTS (comma-separated user=weight).
+    """
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            workers = int(os.environ.get('YTDL_ENGINE_WORKERS') or 4)
+            user_jobs = int(os.environ.get('YTDL_USER_JOBS') or 0) or None
+            user_rate = _mb_per_second(os.environ.get('YTDL_USER_RATE_MB'))
+            weights = parse_weights(filter(None, os.environ.get('YTDL_USER_WEIGHTS', '').split(',')))
+            _shared_service = DownloadService(str(Path.home() / "Downloads"), workers, ARCHIVE_FILE,
+                                              user_jobs=user_jobs, user_rate=user_rate, weights=weights).start()
+        return LocalClient(_shared_service, user)
+
+
+def page_user(page):
+    """Fair-share identity for a Flet page: its session (one browser tab / app window)."""
+    try:
+        return f"session-{page.session.id}"
+    except (AttributeError, RuntimeError):
+        return None
+
+
+def client_from_env(user=None):
+    """
+    Job client the GUI modes should submit to, or None to download in-process.
+
+    YTDL_SHARED_ENGINE=1 selects the process-wide engine (web.py),
+    YTDL_JOB_STORE a job store served by worker.py processes, and
+    YTDL_DAEMON (e.g. http://127.0.0.1:8765) a running daemon. Jobs are
+    submitted as `user` for fair-share scheduling.
+    """
+    if os.environ.get('YTDL_SHARED_ENGINE'):
+        return shared_client(user)
+    if os.environ.get('YTDL_JOB_STORE'):
+        from jobstore import JobStore, StoreClient
+        return StoreClient(JobStore(os.environ['YTDL_JOB_STORE']), user)
+    url = os.environ.get('YTDL_DAEMON')
+    return DaemonClient(url, user=user) if url else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('-j', '--concurrency', type=int, default=2, help='Parallel downloads')
+    parser.add_argument('-o', '--output-dir', default=str(Path.home() / "Downloads"), help='Default download folder')
+    parser.add_argument('--user-jobs', type=int, help='Most jobs of one user running at once')
+    parser.add_argument('--user-rate-mb', type=float, help='Bandwidth cap per user (MB/s)')
+    parser.add_argument('--weight', action='append', default=[], metavar='USER=N',
+                        help='Fair-share weight of a user (default 1)')
+    args = parser.parse_args()
+    try:
+        weights = parse_weights(args.weight)
+    except ValueError as ex:
+        parser.error(str(ex))
+
+    # Serve/record extractor fixtures when YTDL_REPLAY / YTDL_RECORD is set
+    install_from_env()
+
+    ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed()
+    if not ffmpeg_ok:
+        print(f"⚠️  {ffmpeg_error}", flush=True)
+
+    service = DownloadService(args.output_dir, args.concurrency, user_jobs=args.user_jobs,
+                              user_rate=_mb_per_second(args.user_rate_mb), weights=weights).start()
+    server = DaemonServer(service, args.host, args.port)
+    print(f"📡 Download daemon listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n\n👋 Dastur to'xtatildi")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Record/replay fixtures for extractor responses
+YTDL_RECORD=<dir> saves every extract_info result, plus the HTTP responses
+the extractor fetched while producing it, into a gzip-compressed fixture
+store. YTDL_REPLAY=<dir> serves them back through the same YoutubeDL calls
+the modes already make, so metadata-heavy work (huge format lists, long
+playlists) can be exercised and benchmarked offline.
+
+Replay has two levels (YTDL_REPLAY_LEVEL):
+    info  return recorded extract_info results directly (default)
+    http  run the real extractor against recorded HTTP responses
+Media downloads are never recorded; only extraction traffic is.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+from pathlib import Path
+
+
+# Extraction responses are small pages/JSON; anything bigger (e.g. a direct
+# media URL probed by the generic extractor) is stored truncated
+MAX_RECORDED_BODY = 4 * 1024 * 1024
+
+
+class FixtureMissError(Exception):
+    """Replay was asked for something that was never recorded."""
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Already-read bytes followed by the rest of the original response."""
+
+    def __init__(self, prefix, rest):
+        self._prefix = io.BytesIO(prefix)
+        self._rest = rest
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._prefix.read(len(buffer)) or self._rest.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class FixtureStore:
+    """
+    Directory of gzip-compressed JSON fixtures.
+
+    Layout:
+        info/<key>.json.gz   extract_info results
+        http/<key>.json.gz   HTTP responses (status, headers, body)
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    @staticmethod
+    def _key(*parts):
+        return hashlib.sha1("\x00".join(str(p) for p in parts).encode()).hexdigest()
+
+    def _path(self, kind, key):
+        return self.root / kind / f"{key}.json.gz"
+
+    def _write(self, path, payload):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f, default=str)
+        os.replace(tmp, path)
+
+    def _read(self, path):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    # extract_info results, keyed by URL and the options that change their shape
+    def info_key(self, url, extract_flat=None):
+        return self._key('info', url, extract_flat or '')
+
+    def save_info(self, url, info, extract_flat=None):
+        self._write(self._path('info', self.info_key(url, extract_flat)), {'url': url, 'info': info})
+
+    def load_info(self, url, extract_flat=None):
+        record = self._read(self._path('info', self.info_key(url, extract_flat)))
+        return record['info'] if record else None
+
+    # HTTP responses, keyed by method, URL and request body
+    def http_key(self, method, url, data=None):
+        body_hash = hashlib.sha1(data).hexdigest() if data else ''
+        return self._key('http', method, url, body_hash)
+
+    def save_response(self, method, url, data, status, headers, body, final_url):
+        self._write(self._path('http', self.http_key(method, url, data)), {
+            'method': method,
+            'url': url,
+            'final_url': final_url,
+            'status': status,
+            'headers': headers,
+            'body': body.decode('latin-1'),
+        })
+
+    def load_response(self, method, url, data=None):
+        record = self._read(self._path('http', self.http_key(method, url, data)))
+        if record:
+            record['body'] = record['body'].encode('latin-1')
+        return record
+
+    def infos(self):
+        """Every recorded info dict (for benchmarks over real metadata shapes)."""
+        for path in sorted((self.root / 'info').glob('*.json.gz')):
+            record = self._read(path)
+            if record:
+                yield record['url'], record['info']
+
+
+# ============================================================================
+# YT-DLP INTEGRATION
+# ============================================================================
+
+_state = threading.local()
+_installed = None
+
+
+def _request_parts(req):
+    if isinstance(req, str):
+        return 'GET', req, None
+    data = req.data if isinstance(req.data, bytes) else None
+    method = getattr(req, 'method', None) or ('POST' if data else 'GET')
+    return method, req.url, data
+
+
+def install(store, mode, level='info'):
+    """
+    Patch yt_dlp.YoutubeDL for recording or replaying.
+
+    Args:
+        store: FixtureStore
+        mode: 'record' or 'replay'
+        level: Replay level, 'info' or 'http'
+    """
+    global _installed
+    if _installed:
+        return _installed
+
+    import yt_dlp
+    from yt_dlp.networking import Response
+
+    original_extract = yt_dlp.YoutubeDL.extract_info
+    original_urlopen = yt_dlp.YoutubeDL.urlopen
+
+    def extract_info(ydl, url, download=True, *args, **kwargs):
+        extract_flat = ydl.params.get('extract_flat')
+
+        if mode == 'replay' and level == 'info':
+            info = store.load_info(url, extract_flat)
+            if info is None:
+                raise FixtureMissError(f"No recorded extract_info for {url}")
+            if info.get('_type') == 'playlist' and extract_flat:
+                return info
+            return ydl.process_ie_result(info, download=download)
+
+        # Record HTTP traffic only while extracting, never the media download itself
+        # (depth counter: playlist processing re-enters extract_info for each entry)
+        _state.depth = getattr(_state, 'depth', 0) + 1
+        try:
+            info = original_extract(ydl, url, False, *args, **kwargs)
+        finally:
+            _state.depth -= 1
+
+        if mode == 'record' and info is not None:
+            store.save_info(url, ydl.sanitize_info(info), extract_flat)
+        if download and info is not None:
+            info = ydl.process_ie_result(info, download=True)
+        return info
+
+    def urlopen(ydl, req):
+        if not getattr(_state, 'depth', 0):
+            return original_urlopen(ydl, req)
+
+        method, url, data = _request_parts(req)
+        if mode == 'replay':
+            record = store.load_response(method, url, data)
+            if record is None:
+                raise FixtureMissError(f"No recorded response for {method} {url}")
+            return Response(io.BytesIO(record['body']), record['final_url'], record['headers'], record['status'])
+
+        response = original_urlopen(ydl, req)
+        body = response.read(MAX_RECORDED_BODY)
+        headers = dict(response.headers.items())
+        store.save_response(method, url, data, response.status, headers, body, response.url)
+        return Response(io.BufferedReader(_PrefixedStream(body, response)), response.url, headers,
+                        response.status, response.reason)
+
+    yt_dlp.YoutubeDL.extract_info = extract_info
+    yt_dlp.YoutubeDL.urlopen = urlopen
+    _installed = (mode, store)
+    return _installed
+
+
+def install_from_env():
+    """Install record/replay when YTDL_RECORD or YTDL_REPLAY is set (no-op otherwise)."""
+    if os.environ.get('YTDL_REPLAY'):
+        return install(FixtureStore(os.environ['YTDL_REPLAY']), 'replay',
+                       os.environ.get('YTDL_REPLAY_LEVEL', 'info'))
+    if os.environ.get('YTDL_RECORD'):
+        return install(FixtureStore(os.environ['YTDL_RECORD']), 'record')
+    return None
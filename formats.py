@@ -0,0 +1,293 @@
+"""
+Format index for yt-dlp info dicts
+Builds a compact, column-oriented view of info['formats'] in a single pass so
+the quality dropdown, the details dialog and the download plan all read from
+the same precomputed data instead of rescanning the format list.
+"""
+
+from utils import format_bytes
+
+
+# ============================================================================
+# CODEC HELPERS
+# ============================================================================
+
+def is_h264(vcodec):
+    """QuickTime-compatible video codec check (avc1 / h264)."""
+    return (vcodec or '').lower().startswith(('avc1', 'h264'))
+
+
+def is_aac(acodec):
+    """QuickTime-compatible audio codec check (mp4a / aac)."""
+    return (acodec or '').lower().startswith(('mp4a', 'aac'))
+
+
+def _has(codec):
+    return bool(codec) and codec != 'none'
+
+
+# ============================================================================
+# FORMAT INDEX
+# ============================================================================
+
+class FormatIndex:
+    """
+    Column-oriented index over a video's formats.
+
+    Each column is a plain list aligned by row number. Per-height best picks,
+    HDR flags and maximum sizes are computed once while building the index.
+    """
+
+    def __init__(self, formats, duration=None):
+        """
+        Build the index.
+
+        Args:
+            formats: info['formats'] list from yt-dlp
+            duration: Video duration in seconds (used to estimate missing sizes)
+        """
+        self.duration = duration or 0
+
+        self.format_id = []
+        self.ext = []
+        self.resolution = []
+        self.height = []
+        self.fps = []
+        self.vcodec = []
+        self.acodec = []
+        self.size = []
+        self.hdr = []
+        self.tbr = []
+        self.abr = []
+
+        self.heights = []               # Sorted descending
+        self.best_by_height = {}        # height -> row of best video variant
+        self.max_size_by_height = {}    # height -> largest known size
+        self.hdr_by_height = {}         # height -> any HDR variant
+        self.audio_rows = []            # Audio-only rows, best first
+        self.video_rows = []            # Rows carrying a video stream
+        self.best_audio = None          # Row of preferred audio-only stream
+
+        for f in formats or []:
+            self._add(f)
+
+        self.heights = sorted(self.best_by_height, reverse=True)
+        self.audio_rows.sort(key=self._audio_rank, reverse=True)
+        self.best_audio = self.audio_rows[0] if self.audio_rows else None
+
+    @classmethod
+    def from_info(cls, info):
+        """Build an index from a full yt-dlp info dict."""
+        return cls(info.get('formats') or [], duration=info.get('duration'))
+
+    def __len__(self):
+        return len(self.format_id)
+
+    def _add(self, f):
+        row = len(self.format_id)
+        vcodec = f.get('vcodec')
+        acodec = f.get('acodec')
+        height = f.get('height') or 0
+        tbr = f.get('tbr') or 0
+        size = f.get('filesize') or f.get('filesize_approx') or 0
+        if not size and tbr and self.duration:
+            size = int(tbr * 1000 / 8 * self.duration)
+
+        self.format_id.append(f.get('format_id'))
+        self.ext.append(f.get('ext'))
+        self.resolution.append(f.get('resolution'))
+        self.height.append(height)
+        self.fps.append(f.get('fps'))
+        self.vcodec.append(vcodec)
+        self.acodec.append(acodec)
+        self.size.append(size)
+        self.hdr.append('hdr' in (f.get('dynamic_range') or '').lower())
+        self.tbr.append(tbr)
+        self.abr.append(f.get('abr') or 0)
+
+        # Unknown vcodec (None) with a height still counts as video, like the old 'vcodec != none' filter
+        if vcodec != 'none' and height:
+            self.video_rows.append(row)
+            if size > self.max_size_by_height.get(height, 0):
+                self.max_size_by_height[height] = size
+            if self.hdr[row]:
+                self.hdr_by_height[height] = True
+            best = self.best_by_height.get(height)
+            if best is None or self._video_rank(row) > self._video_rank(best):
+                self.best_by_height[height] = row
+        elif _has(acodec) and not _has(vcodec):
+            self.audio_rows.append(row)
+
+    def _best_rank(self, row):
+        # 'Best Available': tallest h264/mp4 stream; other codecs only when there is none
+        return (is_h264(self.vcodec[row]) and self.ext[row] == 'mp4', self.height[row], self.tbr[row],
+                self.fps[row] or 0)
+
+    def _video_rank(self, row):
+        # QuickTime-friendly h264/mp4 first, then bitrate, then frame rate
+        return (is_h264(self.vcodec[row]), self.ext[row] == 'mp4', self.tbr[row], self.fps[row] or 0)
+
+    def _audio_rank(self, row):
+        return (is_aac(self.acodec[row]), self.abr[row] or self.tbr[row])
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    def rows(self):
+        """Per-format rows for the details dialog."""
+        return [
+            {
+                'format_id': self.format_id[i],
+                'ext': self.ext[i],
+                'resolution': self.resolution[i],
+                'fps': self.fps[i],
+                'hdr': self.hdr[i],
+                'size_str': format_bytes(self.size[i]),
+                'vcodec': self.vcodec[i],
+                'acodec': self.acodec[i],
+                'height': self.height[i],
+            }
+            for i in range(len(self))
+        ]
+
+    def quality_options(self):
+        """Dropdown options for video modes: 'best' followed by one entry per height."""
+        options = []
+        for height in self.heights:
+            hdr_tag = "HDR" if self.hdr_by_height.get(height) else ""
+            max_size = self.max_size_by_height.get(height)
+            size_label = f"({format_bytes(max_size)})" if max_size else ""
+            label = f"{height}p {hdr_tag} {size_label}".strip()
+            options.append({'id': str(height), 'label': label, 'height': height})
+
+        if options:
+            options.insert(0, {'id': 'best', 'label': 'Best Available', 'height': 10000})
+        return options
+
+    def audio_options(self):
+        """Dropdown options for audio mode, keyed by concrete format ID."""
+        options = []
+        if self.best_audio is not None:
+            kbps = int(self.abr[self.best_audio] or self.tbr[self.best_audio])
+            options.append({'id': self.format_id[self.best_audio], 'label': f'Best Quality ({kbps} kbps)'})
+
+        medium = self.audio_within(128)
+        if medium is not None and medium != self.best_audio:
+            kbps = int(self.abr[medium] or self.tbr[medium])
+            options.append({'id': self.format_id[medium], 'label': f'Medium Quality ({kbps} kbps)'})
+
+        if not options:
+            options.append({'id': 'bestaudio/best', 'label': 'Best Quality'})
+        return options
+
+    def audio_within(self, max_kbps):
+        """Best audio-only row whose bitrate is at most max_kbps, or None."""
+        for row in self.audio_rows:
+            kbps = self.abr[row] or self.tbr[row]
+            if kbps and kbps <= max_kbps:
+                return row
+        return None
+
+    # ------------------------------------------------------------------
+    # Budget selection
+    # ------------------------------------------------------------------
+
+    def _kbps(self, row):
+        if self.tbr[row]:
+            return self.tbr[row]
+        if self.size[row] and self.duration:
+            return self.size[row] * 8 / 1000 / self.duration
+        return 0
+
+    def _fits(self, size, kbps, max_bytes, max_kbps):
+        if max_bytes and (not size or size > max_bytes):
+            return False
+        if max_kbps and (not kbps or kbps > max_kbps):
+            return False
+        return True
+
+    def pick_within_budget(self, mode="video", max_bytes=None, max_kbps=None):
+        """
+        Best format spec whose estimated total size/bitrate fits the budget.
+
+        Video picks maximise height, then total bitrate, over every
+        video-only + audio-only pair and every progressive format. Formats
+        with no size or bitrate information are never assumed to fit.
+
+        Args:
+            mode: "video" or "audio"
+            max_bytes: Maximum total file size in bytes (None = unlimited)
+            max_kbps: Maximum total bitrate in kbit/s (None = unlimited)
+
+        Returns:
+            str or None: Format spec (e.g. "135+140"), or None if nothing fits
+        """
+        if mode == "audio":
+            for row in self.audio_rows:
+                if self._fits(self.size[row], self._kbps(row), max_bytes, max_kbps):
+                    return self.format_id[row]
+            return None
+
+        best_key = None
+        best_spec = None
+        for v in self.video_rows:
+            if _has(self.acodec[v]):
+                pairs = [(None, self.size[v], self._kbps(v))]
+            else:
+                pairs = [
+                    (a, self.size[v] + self.size[a] if self.size[v] and self.size[a] else 0,
+                     self._kbps(v) + self._kbps(a) if self._kbps(v) and self._kbps(a) else 0)
+                    for a in self.audio_rows
+                ]
+
+            for a, size, kbps in pairs:
+                if not self._fits(size, kbps, max_bytes, max_kbps):
+                    continue
+                key = (self.height[v], is_h264(self.vcodec[v]), kbps)
+                if best_key is None or key > best_key:
+                    best_key = key
+                    best_spec = self.format_id[v] if a is None else f"{self.format_id[v]}+{self.format_id[a]}"
+
+        return best_spec
+
+    # ------------------------------------------------------------------
+    # Download plan
+    # ------------------------------------------------------------------
+
+    def video_row(self, selected_id):
+        """
+        Row of the video stream for a dropdown value ('best' or a height).
+
+        'best' keeps the QuickTime-friendly h264/mp4 preference across all
+        heights; an explicitly picked height ranks every codec at that height
+        (h264/mp4 still first).
+        """
+        if not self.heights:
+            return None
+        if selected_id == 'best':
+            return max(self.video_rows, key=self._best_rank)
+        return self.best_by_height.get(int(selected_id))
+
+    def format_spec(self, selected_id, mode="video", fallback="best"):
+        """
+        Concrete yt-dlp format spec for a dropdown selection.
+
+        Returns format IDs directly (e.g. "137+140") so yt-dlp does not have
+        to re-run filter/fallback parsing. Falls back to a generic selector
+        (fallback for video) only when the index has no usable streams.
+        """
+        if mode == "audio":
+            if selected_id and selected_id in self.format_id:
+                return selected_id
+            if self.best_audio is not None:
+                return self.format_id[self.best_audio]
+            return "bestaudio/best"
+
+        row = self.video_row(selected_id)
+        if row is None:
+            return fallback
+
+        if _has(self.acodec[row]) or self.best_audio is None:
+            return self.format_id[row]
+        return f"{self.format_id[row]}+{self.format_id[self.best_audio]}"
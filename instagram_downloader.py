@@ -6,8 +6,14 @@ import sys
 from pathlib import Path
 import threading
 import time
-from ui_components import ProgressControl, RadioOptionComponent
+from ui_components import ProgressControl, RadioOptionComponent, apply_fonts
 from utils import validate_instagram_url, check_ffmpeg_installed, get_responsive_dimensions
+from fixtures import install_from_env
+from metrics import metrics
+from tracing import tracer
+
+# Serve/record extractor fixtures when YTDL_REPLAY / YTDL_RECORD is set
+install_from_env()
 
 class InstagramDownloader:
     def __init__(self, page: ft.Page, on_back=None):
@@ -23,11 +29,8 @@ class InstagramDownloader:
         self.page.padding = 0
         self.page.bgcolor = "#1a1a1a"
 
-        # Custom Fonts
-        self.page.fonts = {
-            "Inter": "https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap"
-        }
-        self.page.theme = ft.Theme(font_family="Inter")
+        # Bundled fonts (registered once per page, never fetched remotely)
+        apply_fonts(self.page)
 
         # Default download path
         self.download_path = str(Path.home() / "Downloads" / "Instagram")
@@ -199,48 +202,47 @@ class InstagramDownloader:
         )
 
         # Build UI - Single Screen Layout
-        self.page.add(
-            ft.Column(
-                [
-                    self.header,
-                    ft.Container(
-                        content=ft.Column([
-                            # Input Row
-                            ft.Row([
-                                self.url_field,
-                                self.analyze_btn,
-                            ], spacing=10),
-                            ft.Container(height=15),
-
-                            # Preview Card
-                            self.preview_card,
-                            ft.Container(height=15),
-
-                            # Options & Download Button
-                            self.options_container,
-                            ft.Container(height=10),
-                            self.download_btn,
-                            ft.Container(height=15),
-
-                            # Progress
-                            self.progress_control,
-                            ft.Container(height=10),
-
-                            # Footer - Folder path
-                            ft.Row([
-                                self.folder_path_text,
-                                self.choose_folder_btn,
-                            ], alignment=ft.MainAxisAlignment.CENTER),
-                        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
-                        padding=20,
-                        expand=True,
-                    )
-                ],
-                spacing=0,
-                scroll=ft.ScrollMode.AUTO,
-                expand=True,
-            )
+        self.view = ft.Column(
+            [
+                self.header,
+                ft.Container(
+                    content=ft.Column([
+                        # Input Row
+                        ft.Row([
+                            self.url_field,
+                            self.analyze_btn,
+                        ], spacing=10),
+                        ft.Container(height=15),
+
+                        # Preview Card
+                        self.preview_card,
+                        ft.Container(height=15),
+
+                        # Options & Download Button
+                        self.options_container,
+                        ft.Container(height=10),
+                        self.download_btn,
+                        ft.Container(height=15),
+
+                        # Progress
+                        self.progress_control,
+                        ft.Container(height=10),
+
+                        # Footer - Folder path
+                        ft.Row([
+                            self.folder_path_text,
+                            self.choose_folder_btn,
+                        ], alignment=ft.MainAxisAlignment.CENTER),
+                    ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+                    padding=20,
+                    expand=True,
+                )
+            ],
+            spacing=0,
+            scroll=ft.ScrollMode.AUTO,
+            expand=True,
         )
+        self.page.add(self.view)
 
     def create_radio_option_compact(self, label, value, icon):
         return ft.Container(
@@ -255,6 +257,17 @@ class InstagramDownloader:
             width=80,
         )
 
+    def activate(self):
+        """Re-apply page-level settings when this cached view is shown again"""
+        self.page.title = "Instagram Downloader"
+        width, height = get_responsive_dimensions(self.page)
+        self.page.window_width = width
+        self.page.window_height = height
+        self.page.theme_mode = ft.ThemeMode.DARK
+        self.page.bgcolor = "#1a1a1a"
+        self.page.dialog = self.file_picker
+        self.page.on_keyboard_event = self.on_keyboard
+
     def on_folder_selected(self, e: ft.FilePickerResultEvent):
         if e.path:
             self.download_path = e.path
@@ -292,6 +305,7 @@ class InstagramDownloader:
         self.analyze_btn.text = "Analyzing..."
         self.page.update()
 
+        @tracer.traced("analyze_media")
         def analyze_thread():
             try:
                 ydl_opts = {
@@ -300,7 +314,7 @@ class InstagramDownloader:
                     'extract_flat': False,
                 }
 
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                with tracer.span("extract_info", url=url), yt_dlp.YoutubeDL(ydl_opts) as ydl:
                     info = ydl.extract_info(url, download=False)
 
                     self.media_info = info
@@ -391,7 +405,7 @@ class InstagramDownloader:
             return
 
         # Check FFmpeg installation
-        ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed()
+        ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed(wait=False)
         if not ffmpeg_ok:
             self.progress_control.error(ffmpeg_error)
             return
@@ -410,8 +424,17 @@ class InstagramDownloader:
             on_cancel=on_cancel
         )
 
+        @tracer.traced("download_media")
         def download_thread():
             downloaded_file_path = None
+            job = metrics.start_job('instagram', self.media_info.get('webpage_url'))
+            # Media info is already resolved by the analyze step
+            job.mark('resolve')
+
+            def image_hook(blocks, block_size, total_size):
+                # urlretrieve reporthook: first call happens once the response is open
+                job.mark('first_byte')
+                job.bytes = min(blocks * block_size, total_size) if total_size > 0 else blocks * block_size
 
             try:
                 # Prepare filename
@@ -442,7 +465,8 @@ class InstagramDownloader:
                             self.progress_control.update_progress(0.5, "Downloading thumbnail...")
                         self.page.run_task(update_thumb_progress)
 
-                        urllib.request.urlretrieve(thumbnail_url, thumbnail_path)
+                        urllib.request.urlretrieve(thumbnail_url, thumbnail_path, image_hook)
+                        job.mark('transfer_done')
                         downloaded_file_path = thumbnail_path
                     else:
                         raise Exception("No thumbnail available")
@@ -454,6 +478,8 @@ class InstagramDownloader:
                         'progress_hooks': [self.progress_hook],
                         'merge_output_format': 'mp4',
                     }
+                    job.attach(ydl_opts)
+                    tracer.attach(ydl_opts)
                     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                         info = ydl.extract_info(self.media_info['webpage_url'], download=True)
                         # Get the actual filename from yt-dlp
@@ -473,6 +499,8 @@ class InstagramDownloader:
                         }],
                         'progress_hooks': [self.progress_hook],
                     }
+                    job.attach(ydl_opts)
+                    tracer.attach(ydl_opts)
                     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                         info = ydl.extract_info(self.media_info['webpage_url'], download=True)
                         # Get the actual filename from yt-dlp
@@ -512,11 +540,14 @@ class InstagramDownloader:
                                 self.progress_control.update_progress(0.5, "Downloading image...")
                             self.page.run_task(update_photo_progress)
 
-                            urllib.request.urlretrieve(thumbnail_url, thumbnail_path)
+                            urllib.request.urlretrieve(thumbnail_url, thumbnail_path, image_hook)
+                            job.mark('transfer_done')
                             downloaded_file_path = thumbnail_path
                         else:
                             raise Exception("This post doesn't contain photos. Try Video or Thumbnail option.")
                     else:
+                        job.attach(ydl_opts)
+                        tracer.attach(ydl_opts)
                         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                             info = ydl.extract_info(self.media_info['webpage_url'], download=True)
                             # Get the actual filename from yt-dlp
@@ -525,6 +556,8 @@ class InstagramDownloader:
                             elif '_filename' in info:
                                 downloaded_file_path = info['_filename']
 
+                job.finish(ok=not self.cancel_download, error="cancelled" if self.cancel_download else None)
+
                 if not self.cancel_download:
                     # Find the downloaded file
                     expected_file = downloaded_file_path
@@ -573,6 +606,7 @@ class InstagramDownloader:
                     self.page.run_task(show_cancelled)
 
             except Exception as ex:
+                job.finish(ok=False, error=ex)
                 from utils import translate_error
                 error_msg = translate_error(ex)
 
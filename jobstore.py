@@ -0,0 +1,334 @@
+"""
+Shared job store for multi-process downloads
+Jobs live in one SQLite database (WAL mode) that any number of worker
+processes (worker.py) lease them from, so large archival runs scale past
+one process's GIL. A lease lasts a fixed time and is renewed by the
+worker's heartbeat; when a worker dies, its leases run out and the next
+worker to ask takes the job over (resuming the .part file when it runs on
+the same machine). Results and archive entries are written back into the
+same database.
+
+WAL relies on shared memory next to the database file, so every process
+must run on the host that has the database on a local disk; do not put it
+on a network filesystem. Workers on other machines need a store with the
+same interface (submit/lease/heartbeat/complete/fail) behind a server.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from daemon import (_JobFollower, job_key, parse_job_request, request_entries, DEFAULT_USER,
+                    QUEUED, RUNNING, DONE, ERROR, CANCELLED)
+
+
+# Seconds a lease is valid without a heartbeat
+LEASE_SECONDS = 60
+# Leases a job may take before it is marked failed (workers keep dying on it)
+MAX_ATTEMPTS = 3
+# Seconds between polls when following jobs
+POLL_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    user TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    downloaded_bytes INTEGER NOT NULL DEFAULT 0,
+    total_bytes INTEGER,
+    speed REAL,
+    eta REAL,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status);
+CREATE TABLE IF NOT EXISTS archive (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    finished REAL NOT NULL
+);
+"""
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class JobStore:
+    """
+    SQLite-backed job queue shared by processes on one host.
+
+    Each thread gets its own connection; every state change runs in a
+    BEGIN IMMEDIATE transaction so two workers never lease the same job.
+    Job dicts have the same fields as daemon.Job.to_dict() plus 'worker'
+    and 'attempts'.
+    """
+
+    def __init__(self, path):
+        self.path = str(Path(path).expanduser())
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _dict(row):
+        if row is None:
+            return None
+        total = row['total_bytes']
+        return {
+            'id': str(row['id']),
+            'url': row['url'],
+            'title': row['title'],
+            'mode': json.loads(row['options'])['mode'],
+            'user': row['user'],
+            'status': row['status'],
+            'downloaded_bytes': row['downloaded_bytes'],
+            'total_bytes': total,
+            'percent': round(row['downloaded_bytes'] / total * 100, 1) if total else None,
+            'speed': row['speed'],
+            'eta': row['eta'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created': row['created'],
+            'started': row['started'],
+            'finished': row['finished'],
+            'worker': row['worker'],
+            'attempts': row['attempts'],
+        }
+
+    # ------------------------------------------------------------------
+    # Submitting and reading
+    # ------------------------------------------------------------------
+
+    def submit(self, url, options, title=None, user=DEFAULT_USER):
+        """
+        Queue one video download.
+
+        An identical unfinished job is returned instead of a new one, and a
+        request already in the archive (with all its files still on disk)
+        gets an immediately completed job.
+        """
+        key = job_key(url, options)
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE key = ? AND status IN (?, ?) LIMIT 1", (key, QUEUED, RUNNING)
+            ).fetchone()
+            if row:
+                return self._dict(row)
+            archived = conn.execute("SELECT result FROM archive WHERE key = ?", (key,)).fetchone()
+            if archived and all(os.path.exists(path) for path in json.loads(archived['result'])['outputs']):
+                result = archived['result']
+                cursor = conn.execute(
+                    "INSERT INTO jobs (key, url, title, user, options, status, result, created, finished)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, json.loads(result)['title'], user, json.dumps(options), DONE, result, now, now),
+                )
+            else:
+                cursor = conn.execute(
+                    "INSERT INTO jobs (key, url, title, user, options, status, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, title, user, json.dumps(options), QUEUED, now),
+                )
+            return self._dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (cursor.lastrowid,)).fetchone())
+
+    def get(self, job_id):
+        return self._dict(self._connection().execute("SELECT * FROM jobs WHERE id = ?", (int(job_id),)).fetchone())
+
+    def jobs(self, job_ids=None):
+        """Every job (oldest first), or only job_ids."""
+        conn = self._connection()
+        if not job_ids:
+            return [self._dict(row) for row in conn.execute("SELECT * FROM jobs ORDER BY id")]
+        wanted = {int(job_id) for job_id in job_ids}
+        rows = conn.execute("SELECT * FROM jobs WHERE id BETWEEN ? AND ? ORDER BY id", (min(wanted), max(wanted)))
+        return [self._dict(row) for row in rows if row['id'] in wanted]
+
+    def queued_urls(self, limit):
+        """URLs of the next `limit` queued jobs (for extraction prefetch)."""
+        rows = self._connection().execute(
+            "SELECT url FROM jobs WHERE status = ? ORDER BY id LIMIT ?", (QUEUED, limit)
+        )
+        return [row['url'] for row in rows]
+
+    def counts(self):
+        """{status: number of jobs}"""
+        rows = self._connection().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row['status']: row['n'] for row in rows}
+
+    def cancel(self, job_id, user=None):
+        """
+        Cancel a queued or running job (its worker stops at the next heartbeat).
+
+        With user, only a job that user submitted is cancelled; a job shared
+        through dedupe belongs to the user who submitted it first.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, lease_expires = NULL WHERE id = ? AND status IN (?, ?)"
+                + (" AND user = ?" if user else ""),
+                (CANCELLED, time.time(), int(job_id), QUEUED, RUNNING) + ((str(user),) if user else ()),
+            )
+        return self.get(job_id)
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def lease(self, worker, lease_seconds=LEASE_SECONDS):
+        """
+        Take the oldest queued job, or a running job whose lease expired.
+
+        Returns:
+            dict: The leased job (with 'options'), or None when there is nothing to do
+        """
+        while True:
+            now = time.time()
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) ORDER BY id LIMIT 1",
+                    (QUEUED, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row['attempts'] >= MAX_ATTEMPTS:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished = ?, lease_expires = NULL WHERE id = ?",
+                        (ERROR, f"Worker lost {row['attempts']} times", now, row['id']),
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1,"
+                    " started = COALESCE(started, ?) WHERE id = ?",
+                    (RUNNING, worker, now + lease_seconds, now, row['id']),
+                )
+                job = self._dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone())
+                job['options'] = json.loads(row['options'])
+                return job
+
+    def heartbeat(self, worker, progress, lease_seconds=LEASE_SECONDS):
+        """
+        Renew the leases of a worker's running jobs and store their progress.
+
+        Args:
+            worker: Worker id the jobs were leased to
+            progress: {job_id: {'downloaded_bytes', 'total_bytes', 'speed', 'eta'}}
+
+        Returns:
+            set: Job ids the worker no longer owns (cancelled or re-leased); stop them
+        """
+        lost = set()
+        expires = time.time() + lease_seconds
+        with self._transaction() as conn:
+            for job_id, p in progress.items():
+                cursor = conn.execute(
+                    "UPDATE jobs SET lease_expires = ?, downloaded_bytes = ?, total_bytes = ?, speed = ?, eta = ?"
+                    " WHERE id = ? AND worker = ? AND status = ?",
+                    (expires, p.get('downloaded_bytes') or 0, p.get('total_bytes'), p.get('speed'), p.get('eta'),
+                     int(job_id), worker, RUNNING),
+                )
+                if not cursor.rowcount:
+                    lost.add(job_id)
+        return lost
+
+    def complete(self, job_id, worker, result):
+        """Record a finished download and archive it; False if the lease was lost meanwhile."""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, title = ?, result = ?, finished = ?, lease_expires = NULL"
+                " WHERE id = ? AND worker = ? AND status = ?",
+                (DONE, result['title'], json.dumps(result), now, int(job_id), worker, RUNNING),
+            )
+            if not cursor.rowcount:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO archive (key, result, finished)"
+                " SELECT key, result, finished FROM jobs WHERE id = ?",
+                (int(job_id),),
+            )
+        return True
+
+    def fail(self, job_id, worker, error):
+        """Record a failed download; False if the lease was lost meanwhile."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished = ?, lease_expires = NULL"
+                " WHERE id = ? AND worker = ? AND status = ?",
+                (ERROR, error, time.time(), int(job_id), worker, RUNNING),
+            )
+        return bool(cursor.rowcount)
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+class StoreClient(_JobFollower):
+    """DaemonClient's submit/wait interface over a JobStore (cli.py --store, YTDL_JOB_STORE)."""
+
+    def __init__(self, store, user=None, download_path=None):
+        self.store = store
+        self.user = user
+        self.download_path = download_path or str(Path.home() / "Downloads")
+
+    def submit(self, **payload):
+        url, options = parse_job_request(payload, self.download_path)
+        user = str(payload.get('user') or self.user or DEFAULT_USER)
+        return [self.store.submit(entry_url, options, title, user) for entry_url, title in request_entries(url)]
+
+    def jobs(self):
+        return self.store.jobs()
+
+    def job(self, job_id):
+        return self.store.get(job_id)
+
+    def cancel(self, job_id):
+        return self.store.cancel(job_id, self.user or DEFAULT_USER)
+
+    def events(self, job_ids=None, heartbeats=False):
+        """Polls the store; yields each job's current state, then every change (never goes quiet)."""
+        def iterate():
+            seen = {}
+            while True:
+                for job in self.store.jobs(job_ids):
+                    state = (job['status'], job['downloaded_bytes'], job['worker'])
+                    if seen.get(job['id']) != state:
+                        seen[job['id']] = state
+                        yield job
+                time.sleep(POLL_INTERVAL)
+        return iterate()
@@ -5,11 +5,17 @@ import os
 import platform
 import threading
 import time
+import json
+import shutil
+import importlib
+import importlib.util
+import multiprocessing
+import concurrent.futures
 from pathlib import Path
-from utils import get_responsive_dimensions
-import youtube_downloader_mvp
-import youtube_downloader_advanced
-import youtube_playlist_downloader
+from utils import get_responsive_dimensions, ffmpeg_probe
+from ui_components import apply_fonts, ASSETS_DIR
+from profiling import profiler
+from tracing import tracer
 
 # Add common paths to PATH for GUI app environment
 common_paths = [
@@ -25,8 +31,164 @@ os.environ["PATH"] += os.pathsep + os.pathsep.join(common_paths)
 # Setup complete flag file
 SETUP_COMPLETE_FLAG = Path.home() / ".youtube_downloader_setup_complete"
 
+# Cached dependency check results and the inputs they were computed from
+CHECK_CACHE_FILE = Path.home() / ".youtube_downloader_checks.json"
+
+# Downloader modes: key -> (module, class). Modules are imported only when
+# their card is clicked, so yt_dlp is not loaded before the first paint.
+MODES = {
+    'simple': ('youtube_downloader_mvp', 'YouTubeDownloaderMVP'),
+    'advanced': ('youtube_downloader_advanced', 'YouTubeDownloaderAdvanced'),
+    'playlist': ('youtube_playlist_downloader', 'PlaylistDownloader'),
+    'instagram': ('instagram_downloader', 'InstagramDownloader'),
+}
+
+
+def load_mode(key):
+    """Import a downloader mode on demand and return its class."""
+    module_name, class_name = MODES[key]
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
+def check_inputs(is_frozen):
+    """
+    Cheap validity inputs for cached check results.
+    Reads package metadata and stats the ffmpeg binary; imports nothing and spawns nothing.
+    """
+    from importlib import metadata
+
+    def version(dist):
+        try:
+            return metadata.version(dist)
+        except metadata.PackageNotFoundError:
+            return None
+
+    ffmpeg_path = shutil.which('ffmpeg')
+    try:
+        ffmpeg_mtime = os.path.getmtime(ffmpeg_path) if ffmpeg_path else None
+    except OSError:
+        ffmpeg_mtime = None
+
+    return {
+        'frozen': is_frozen,
+        'python': platform.python_version(),
+        'flet': version('flet'),
+        'yt_dlp': version('yt-dlp'),
+        'ffmpeg_path': ffmpeg_path,
+        'ffmpeg_mtime': ffmpeg_mtime,
+    }
+
+
+def load_cached_checks(inputs):
+    """Return cached check results if they were computed from the same inputs, else None."""
+    try:
+        cached = json.loads(CHECK_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return None
+    if cached.get('inputs') != inputs:
+        return None
+    return cached.get('results')
+
+
+def save_cached_checks(inputs, results):
+    try:
+        CHECK_CACHE_FILE.write_text(json.dumps({'inputs': inputs, 'results': results}))
+    except OSError:
+        pass
+
+
+def check_python():
+    return sys.version_info >= (3, 7)
+
+
+def check_module(name):
+    # find_spec locates the package without executing it (yt_dlp import is slow)
+    return importlib.util.find_spec(name) is not None
+
+
+def check_ffmpeg():
+    # Only "is it on PATH"; the full capability probe (4 ffmpeg runs) is left to
+    # ffmpeg_probe.warm() in the background
+    return shutil.which('ffmpeg') is not None
+
+
+def dependency_checks(is_frozen):
+    """Map of check key -> callable returning True on success."""
+    if is_frozen:
+        # Packaged app bundles Python and the libraries
+        checks = {key: (lambda: True) for key in ('python', 'flet', 'yt_dlp')}
+    else:
+        checks = {
+            'python': check_python,
+            'flet': lambda: check_module('flet'),
+            'yt_dlp': lambda: check_module('yt_dlp'),
+        }
+    # FFmpeg is external, always check it
+    checks['ffmpeg'] = check_ffmpeg
+    return checks
+
+
+def run_dependency_checks(is_frozen, on_result=None):
+    """
+    Run all dependency checks concurrently.
+
+    Args:
+        is_frozen: Running as a packaged app
+        on_result: Optional callback(key, ok) called as each check finishes
+
+    Returns:
+        dict: key -> 'success' or 'failed'
+    """
+    checks = dependency_checks(is_frozen)
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = {executor.submit(fn): key for key, fn in checks.items()}
+        for future in concurrent.futures.as_completed(futures):
+            key = futures[future]
+            try:
+                ok = bool(future.result())
+            except Exception:
+                ok = False
+            results[key] = 'success' if ok else 'failed'
+            if on_result:
+                on_result(key, ok)
+    return results
+
+
+def revalidate_in_background(is_frozen):
+    """
+    Re-check dependencies for a returning user without blocking the menu.
+    If something broke since the last run (including a cached failed result),
+    the setup screen is shown on next launch.
+    """
+    def revalidate():
+        inputs = check_inputs(is_frozen)
+        results = load_cached_checks(inputs)
+        if not results:
+            results = run_dependency_checks(is_frozen)
+            save_cached_checks(inputs, results)
+        if not all(status == 'success' for status in results.values()):
+            try:
+                SETUP_COMPLETE_FLAG.unlink()
+            except OSError:
+                pass
+
+    threading.Thread(target=revalidate, daemon=True).start()
+
+
+def warm_imports():
+    """Import yt_dlp in the background after first paint so the first mode opens quickly."""
+    def warm():
+        try:
+            import yt_dlp  # noqa: F401
+        except ImportError:
+            pass
+
+    threading.Thread(target=warm, daemon=True).start()
+
 class SetupWindow:
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: ft.Page, run_checks=True):
         self.page = page
         self.page.title = "YouTube Downloader - Setup"
 
@@ -45,11 +207,8 @@ class SetupWindow:
         # Keyboard shortcuts
         self.page.on_keyboard_event = self.on_keyboard
         
-        # Custom Fonts
-        self.page.fonts = {
-            "Inter": "https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap"
-        }
-        self.page.theme = ft.Theme(font_family="Inter")
+        # Bundled fonts (registered once per page, never fetched remotely)
+        apply_fonts(self.page)
 
         self.is_frozen = getattr(sys, 'frozen', False)
 
@@ -66,8 +225,13 @@ class SetupWindow:
         self.status_text = None
         self.setup_complete = False
 
+        # Cached views: the menu and one instance per opened mode
+        self.menu_view = None
+        self.mode_instances = {}
+
         self.build_ui()
-        self.start_initial_check()
+        if run_checks:
+            self.start_initial_check()
 
     def build_ui(self):
         """Build the UI"""
@@ -224,51 +388,21 @@ class SetupWindow:
             self.status_text.value = "Checking system..."
             self.page.update()
 
-            # If frozen (packaged app), assume Python and Libs are present
-            if self.is_frozen:
-                self.update_check_status('python', 'success')
-                self.update_check_status('flet', 'success')
-                self.update_check_status('yt_dlp', 'success')
-            else:
-                # Check Python
-                self.update_check_status('python', 'checking')
-                time.sleep(0.3)
-                if sys.version_info >= (3, 7):
-                    self.update_check_status('python', 'success')
-                else:
-                    self.update_check_status('python', 'failed')
+            inputs = check_inputs(self.is_frozen)
+            results = load_cached_checks(inputs)
 
-                # Check Flet
-                self.update_check_status('flet', 'checking')
-                time.sleep(0.3)
-                try:
-                    import flet
-                    self.update_check_status('flet', 'success')
-                except ImportError:
-                    self.update_check_status('flet', 'failed')
-
-                # Check yt-dlp
-                self.update_check_status('yt_dlp', 'checking')
-                time.sleep(0.3)
-                try:
-                    import yt_dlp
-                    self.update_check_status('yt_dlp', 'success')
-                except ImportError:
-                    self.update_check_status('yt_dlp', 'failed')
-
-            # Check FFmpeg (Always check this as it's external)
-            self.update_check_status('ffmpeg', 'checking')
-            time.sleep(0.3)
-            try:
-                result = subprocess.run(['ffmpeg', '-version'],
-                                      capture_output=True,
-                                      timeout=5)
-                if result.returncode == 0:
-                    self.update_check_status('ffmpeg', 'success')
-                else:
-                    self.update_check_status('ffmpeg', 'failed')
-            except Exception:
-                self.update_check_status('ffmpeg', 'failed')
+            if results:
+                # Nothing changed since the last successful check
+                for key, status in results.items():
+                    self.update_check_status(key, status)
+            else:
+                for key in self.checks:
+                    self.update_check_status(key, 'checking')
+                results = run_dependency_checks(
+                    self.is_frozen,
+                    on_result=lambda key, ok: self.update_check_status(key, 'success' if ok else 'failed'),
+                )
+                save_cached_checks(inputs, results)
 
             # Check if everything is OK
             all_ok = all(info['status'] == 'success' for info in self.checks.values())
@@ -358,6 +492,7 @@ class SetupWindow:
                     pass
 
                 if ffmpeg_installed:
+                    ffmpeg_probe.invalidate()
                     self.update_check_status('ffmpeg', 'success')
                 else:
                     self.status_text.value = "⚠️ Could not install FFmpeg automatically. Please install it manually."
@@ -399,30 +534,43 @@ class SetupWindow:
         width, height = get_responsive_dimensions(self.page)
         self.page.window_width = width
         self.page.window_height = height
+        self.page.on_keyboard_event = self.on_keyboard
 
-        def go_back(_e=None):
-            self.show_menu()
+        # Menu controls are built once and reused on every back navigation
+        if self.menu_view is None:
+            self.menu_view = self.build_menu()
+        self.page.add(self.menu_view)
+
+    def go_back(self, _e=None):
+        self.show_menu()
 
-        # Show version selection in the same window
+    def open_mode(self, key):
+        """
+        Show a downloader mode in the same window.
+        Instances are kept alive, so returning to a mode is instant and its
+        state (resolved playlist, analyzed formats, running downloads) is intact.
+        """
+        self.page.clean()
+        instance = self.mode_instances.get(key)
+        if instance is None:
+            self.mode_instances[key] = load_mode(key)(self.page, on_back=self.go_back)
+        else:
+            instance.activate()
+            self.page.add(instance.view)
+
+    def build_menu(self):
+        """Build the mode selection menu controls"""
         def start_mvp(_e):
-            self.page.clean()
-            import youtube_downloader_mvp
-            youtube_downloader_mvp.YouTubeDownloaderMVP(self.page, on_back=go_back)
+            self.open_mode('simple')
 
         def start_advanced(_e):
-            self.page.clean()
-            import youtube_downloader_advanced
-            youtube_downloader_advanced.YouTubeDownloaderAdvanced(self.page, on_back=go_back)
+            self.open_mode('advanced')
 
         def start_playlist(_e):
-            self.page.clean()
-            import youtube_playlist_downloader
-            youtube_playlist_downloader.PlaylistDownloader(self.page, on_back=go_back)
+            self.open_mode('playlist')
 
         def start_instagram(_e):
-            self.page.clean()
-            import instagram_downloader
-            instagram_downloader.InstagramDownloader(self.page, on_back=go_back)
+            self.open_mode('instagram')
 
         def create_option_card(title, description, icon, on_click, color):
             return ft.Container(
@@ -442,78 +590,76 @@ class SetupWindow:
                 animate=ft.Animation(200, "easeOut"),
             )
 
-        self.page.add(
-            ft.Container(
-                content=ft.Column(
-                    [
-                        ft.Container(
-                            content=ft.Column(
-                                [
-                                    ft.Text("Welcome to Media Downloader", size=32, weight=ft.FontWeight.BOLD, color="white"),
-                                    ft.Text("Choose platform and download mode", size=16, color="#888888"),
-                                    ft.Container(height=20),
-                                    # Instagram Card (Featured)
-                                    ft.Row(
-                                        [
-                                            create_option_card(
-                                                "Instagram",
-                                                "Download posts, reels & stories.",
-                                                ft.Icons.CAMERA_ALT_ROUNDED,
-                                                start_instagram,
-                                                "#E4405F"
-                                            ),
-                                        ],
-                                        alignment=ft.MainAxisAlignment.CENTER,
-                                    ),
-                                    ft.Container(height=10),
-                                    ft.Text("YouTube Modes", size=20, weight=ft.FontWeight.BOLD, color="white"),
-                                    ft.Container(height=10),
-                                    ft.Row(
-                                        [
-                                            create_option_card(
-                                                "Simple",
-                                                "Quick & easy download. Best for single videos.",
-                                                ft.Icons.BOLT,
-                                                start_mvp,
-                                                ft.Colors.YELLOW_ACCENT
-                                            ),
-                                            create_option_card(
-                                                "Advanced",
-                                                "Choose quality, format & subtitles.",
-                                                ft.Icons.TUNE,
-                                                start_advanced,
-                                                ft.Colors.RED_ACCENT
-                                            ),
-                                            create_option_card(
-                                                "Playlist",
-                                                "Download entire playlists at once.",
-                                                ft.Icons.PLAYLIST_PLAY,
-                                                start_playlist,
-                                                ft.Colors.BLUE_ACCENT
-                                            ),
-                                        ],
-                                        alignment=ft.MainAxisAlignment.CENTER,
-                                        spacing=20,
-                                    ),
-                                ],
-                                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                                expand=True,
-                            ),
-                            padding=40,
-                            gradient=ft.LinearGradient(
-                                begin=ft.Alignment.TOP_CENTER,
-                                end=ft.Alignment.BOTTOM_CENTER,
-                                colors=["#2d2d2d", "#1a1a1a"],
-                            ),
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Container(
+                        content=ft.Column(
+                            [
+                                ft.Text("Welcome to Media Downloader", size=32, weight=ft.FontWeight.BOLD, color="white"),
+                                ft.Text("Choose platform and download mode", size=16, color="#888888"),
+                                ft.Container(height=20),
+                                # Instagram Card (Featured)
+                                ft.Row(
+                                    [
+                                        create_option_card(
+                                            "Instagram",
+                                            "Download posts, reels & stories.",
+                                            ft.Icons.CAMERA_ALT_ROUNDED,
+                                            start_instagram,
+                                            "#E4405F"
+                                        ),
+                                    ],
+                                    alignment=ft.MainAxisAlignment.CENTER,
+                                ),
+                                ft.Container(height=10),
+                                ft.Text("YouTube Modes", size=20, weight=ft.FontWeight.BOLD, color="white"),
+                                ft.Container(height=10),
+                                ft.Row(
+                                    [
+                                        create_option_card(
+                                            "Simple",
+                                            "Quick & easy download. Best for single videos.",
+                                            ft.Icons.BOLT,
+                                            start_mvp,
+                                            ft.Colors.YELLOW_ACCENT
+                                        ),
+                                        create_option_card(
+                                            "Advanced",
+                                            "Choose quality, format & subtitles.",
+                                            ft.Icons.TUNE,
+                                            start_advanced,
+                                            ft.Colors.RED_ACCENT
+                                        ),
+                                        create_option_card(
+                                            "Playlist",
+                                            "Download entire playlists at once.",
+                                            ft.Icons.PLAYLIST_PLAY,
+                                            start_playlist,
+                                            ft.Colors.BLUE_ACCENT
+                                        ),
+                                    ],
+                                    alignment=ft.MainAxisAlignment.CENTER,
+                                    spacing=20,
+                                ),
+                            ],
+                            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                             expand=True,
-                        )
-                    ],
-                    scroll=ft.ScrollMode.AUTO,
-                    expand=True,
-                ),
-                bgcolor="#1a1a1a",
+                        ),
+                        padding=40,
+                        gradient=ft.LinearGradient(
+                            begin=ft.Alignment.TOP_CENTER,
+                            end=ft.Alignment.BOTTOM_CENTER,
+                            colors=["#2d2d2d", "#1a1a1a"],
+                        ),
+                        expand=True,
+                    )
+                ],
+                scroll=ft.ScrollMode.AUTO,
                 expand=True,
-            )
+            ),
+            bgcolor="#1a1a1a",
+            expand=True,
         )
 
     def on_keyboard(self, e: ft.KeyboardEvent):
@@ -527,15 +673,24 @@ class SetupWindow:
 
 
 def main(page: ft.Page):
+    profiler.instrument_page(tracer.instrument_page(page))
+
     # Check if setup is already complete
     if SETUP_COMPLETE_FLAG.exists():
-        # Skip setup and go directly to menu
-        setup = SetupWindow(page)
+        # Returning user: straight to the menu, revalidate in the background
+        setup = SetupWindow(page, run_checks=False)
         setup.show_menu()
+        revalidate_in_background(setup.is_frozen)
     else:
         # Show setup window for first time
         SetupWindow(page)
 
+    # Window is painted; load the heavy extractor registry and probe ffmpeg off the UI path
+    warm_imports()
+    ffmpeg_probe.warm()
+
 
 if __name__ == "__main__":
-    ft.run(main)
+    # Extraction pool processes (core.extraction_pool) in the packaged app
+    multiprocessing.freeze_support()
+    ft.run(main, assets_dir=str(ASSETS_DIR))
@@ -0,0 +1,281 @@
+"""
+Per-job stage timing metrics
+Every download job records stage timestamps and byte counts (resolve,
+first byte, transfer done, postprocess start/end, finalized). Completed jobs
+feed histograms that are exported locally as a Prometheus text file and a
+JSON file, so slow downloads can be attributed to extraction, transfer or
+post-processing.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+
+DEFAULT_EXPORT_DIR = Path.home() / ".youtube_downloader" / "metrics"
+
+STAGES = (
+    'resolve',
+    'first_byte',
+    'transfer_done',
+    'postprocess_start',
+    'postprocess_end',
+    'finalized',
+)
+
+
+# ============================================================================
+# HISTOGRAM
+# ============================================================================
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = sorted(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def prometheus_lines(self, labels=""):
+        """Exposition lines; labels ('instance="..."') are added to every series."""
+        extra = f",{labels}" if labels else ""
+        braces = f"{{{labels}}}" if labels else ""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for bound, count in zip(self.buckets, self.counts):
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"{extra}}} {count}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"{extra}}} {self.count}')
+        lines.append(f"{self.name}_sum{braces} {self.sum:.6f}")
+        lines.append(f"{self.name}_count{braces} {self.count}")
+        return lines
+
+    def to_dict(self):
+        return {
+            'buckets': dict(zip((f"{b:g}" for b in self.buckets), self.counts)),
+            'sum': self.sum,
+            'count': self.count,
+        }
+
+
+# ============================================================================
+# JOB METRICS
+# ============================================================================
+
+class JobMetrics:
+    """
+    Stage timestamps and byte counts for one download job.
+
+    Attach to yt-dlp with attach(ydl_opts); stages that yt-dlp does not
+    report (e.g. our own ffmpeg passes) can be marked manually with mark().
+    """
+
+    def __init__(self, registry, mode, url):
+        self._registry = registry
+        self.mode = mode
+        self.url = url
+        self.started = time.time()
+        self.stages = {}
+        self.bytes = 0
+        self._finished_file_bytes = 0
+        self.status = 'running'
+        self.error = None
+
+    def mark(self, stage, once=True):
+        """Record a stage timestamp (first occurrence wins unless once=False)."""
+        if once and stage in self.stages:
+            return
+        self.stages[stage] = time.time()
+
+    def attach(self, ydl_opts):
+        """Add this job's hooks to a yt-dlp options dict (in place)."""
+        ydl_opts.setdefault('progress_hooks', []).append(self.progress_hook)
+        ydl_opts.setdefault('postprocessor_hooks', []).append(self.postprocessor_hook)
+        return ydl_opts
+
+    def progress_hook(self, d):
+        if d['status'] == 'downloading':
+            downloaded = d.get('downloaded_bytes') or 0
+            if downloaded:
+                self.mark('resolve')
+                self.mark('first_byte')
+            self.bytes = self._finished_file_bytes + downloaded
+        elif d['status'] == 'finished':
+            # Video and audio streams finish separately; the last one wins
+            self._finished_file_bytes += d.get('total_bytes') or d.get('downloaded_bytes') or 0
+            self.bytes = self._finished_file_bytes
+            self.mark('transfer_done', once=False)
+
+    def postprocessor_hook(self, d):
+        if d.get('status') == 'started':
+            self.mark('postprocess_start')
+        elif d.get('status') == 'finished':
+            self.mark('postprocess_end', once=False)
+
+    def finish(self, ok=True, error=None):
+        """Mark the job finalized and hand it to the registry (only the first call counts)."""
+        if self.status != 'running':
+            return
+        self.mark('finalized')
+        self.status = 'ok' if ok else 'error'
+        self.error = str(error) if error else None
+        self._registry.record(self)
+
+    def durations(self):
+        """Derived durations in seconds (None where a stage was not reached)."""
+        s = self.stages
+
+        def between(a, b):
+            start = self.started if a == 'start' else s.get(a)
+            end = s.get(b)
+            return end - start if start is not None and end is not None else None
+
+        transfer = between('first_byte', 'transfer_done')
+        return {
+            'resolve_s': between('start', 'resolve'),
+            'time_to_first_byte_s': between('start', 'first_byte'),
+            'transfer_s': transfer,
+            'throughput_bps': self.bytes / transfer if transfer and self.bytes else None,
+            'postprocess_s': between('postprocess_start', 'postprocess_end'),
+            'total_s': between('start', 'finalized'),
+        }
+
+    def to_dict(self):
+        return {
+            'mode': self.mode,
+            'url': self.url,
+            'status': self.status,
+            'error': self.error,
+            'started': self.started,
+            'stages': dict(self.stages),
+            'bytes': self.bytes,
+            **self.durations(),
+        }
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+class MetricsRegistry:
+    """
+    Process-wide aggregation of job metrics with local file export.
+
+    Processes that share an export directory with others of their kind
+    (worker.py) call set_instance(); they then write their own
+    metrics-<instance>.prom/.json with an instance label on every series,
+    so a Prometheus textfile collector picks all of them up side by side.
+    """
+
+    def __init__(self, export_dir=None, keep_recent=200):
+        self.export_dir = Path(export_dir or os.environ.get('YTDL_METRICS_DIR') or DEFAULT_EXPORT_DIR)
+        self.instance = None
+        self._lock = threading.RLock()
+        self._recent = deque(maxlen=keep_recent)
+        self._jobs_total = {}  # (mode, status) -> count
+        self._bytes_total = 0
+        self.ttfb = Histogram(
+            'ytdl_time_to_first_byte_seconds', 'Time from job start to first media byte.',
+            [0.25, 0.5, 1, 2, 5, 10, 30, 60],
+        )
+        self.throughput = Histogram(
+            'ytdl_transfer_throughput_bytes_per_second', 'Media transfer throughput per job.',
+            [64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6],
+        )
+        self.postprocess = Histogram(
+            'ytdl_postprocess_duration_seconds', 'Time spent in merge/transcode/cut post-processing.',
+            [0.1, 0.5, 1, 5, 15, 60, 300],
+        )
+
+    def start_job(self, mode, url):
+        return JobMetrics(self, mode, url)
+
+    def set_instance(self, instance):
+        """Export to per-process files labelled instance (e.g. a worker id)."""
+        with self._lock:
+            self.instance = instance
+
+    def record(self, job):
+        durations = job.durations()
+        with self._lock:
+            key = (job.mode, job.status)
+            self._jobs_total[key] = self._jobs_total.get(key, 0) + 1
+            self._bytes_total += job.bytes
+            self._recent.append(job.to_dict())
+            if durations['time_to_first_byte_s'] is not None:
+                self.ttfb.observe(durations['time_to_first_byte_s'])
+            if durations['throughput_bps'] is not None:
+                self.throughput.observe(durations['throughput_bps'])
+            if durations['postprocess_s'] is not None:
+                self.postprocess.observe(durations['postprocess_s'])
+        self.export()
+
+    def prometheus_text(self):
+        with self._lock:
+            labels = f'instance="{self.instance}"' if self.instance else ""
+            extra = f",{labels}" if labels else ""
+            lines = [
+                "# HELP ytdl_jobs_total Finished download jobs.",
+                "# TYPE ytdl_jobs_total counter",
+            ]
+            for (mode, status), count in sorted(self._jobs_total.items()):
+                lines.append(f'ytdl_jobs_total{{mode="{mode}",status="{status}"{extra}}} {count}')
+            lines += [
+                "# HELP ytdl_downloaded_bytes_total Media bytes transferred.",
+                "# TYPE ytdl_downloaded_bytes_total counter",
+                f"ytdl_downloaded_bytes_total{f'{{{labels}}}' if labels else ''} {self._bytes_total}",
+            ]
+            for histogram in (self.ttfb, self.throughput, self.postprocess):
+                lines += histogram.prometheus_lines(labels)
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        with self._lock:
+            return {
+                'instance': self.instance,
+                'jobs_total': [
+                    {'mode': mode, 'status': status, 'count': count}
+                    for (mode, status), count in sorted(self._jobs_total.items())
+                ],
+                'downloaded_bytes_total': self._bytes_total,
+                'histograms': {
+                    h.name: h.to_dict() for h in (self.ttfb, self.throughput, self.postprocess)
+                },
+                'recent_jobs': list(self._recent),
+            }
+
+    def export(self):
+        """Write metrics.prom and metrics.json atomically; failures never affect downloads."""
+        # Snapshot and write under the lock, so an older snapshot never replaces a newer one
+        with self._lock:
+            stem = "metrics-" + re.sub(r'[^\w.-]', '_', self.instance) if self.instance else "metrics"
+            files = (
+                (f'{stem}.prom', self.prometheus_text()),
+                (f'{stem}.json', json.dumps(self.to_json(), indent=2)),
+            )
+            try:
+                self.export_dir.mkdir(parents=True, exist_ok=True)
+                for name, text in files:
+                    # Unique per process and thread: several processes may share the directory
+                    tmp = self.export_dir / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+                    tmp.write_text(text)
+                    os.replace(tmp, self.export_dir / name)
+            except OSError:
+                pass
+
+
+# Global metrics registry
+# Use: from metrics import metrics
+metrics = MetricsRegistry()
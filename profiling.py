@@ -0,0 +1,362 @@
+"""
+Lock/UI-sync contention and memory profilers
+Set YTDL_PROFILE_SYNC=1 to wrap the app's locks and page.update / page.run_task
+calls. Every call site records call counts, time spent waiting, time spent
+holding (or running), and update payload sizes; a ranked report is printed
+to stderr at shutdown (and written as JSON when YTDL_PROFILE_SYNC is a
+path ending in .json). With the variable unset every helper returns the
+object it was given unchanged.
+
+Set YTDL_PROFILE_MEMORY=1 (or a .json path) to trace allocations with
+tracemalloc. The app marks checkpoints after loading playlists, analyzing
+videos and finishing downloads; the report lists traced size per
+checkpoint, the top allocation sites at the highest checkpoint, and what
+is still retained at exit.
+"""
+
+import atexit
+import functools
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+
+# ============================================================================
+# STATS
+# ============================================================================
+
+class SiteStats:
+    """Aggregated timings for one (kind, name, call site) triple."""
+
+    def __init__(self, kind, name, site):
+        self.kind = kind
+        self.name = name
+        self.site = site
+        self.calls = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.payload_total = 0
+
+    def add(self, wait=0.0, hold=0.0, payload=0):
+        self.calls += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.hold_total += hold
+        self.hold_max = max(self.hold_max, hold)
+        self.payload_total += payload
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'site': self.site,
+            'calls': self.calls,
+            'wait_total_s': self.wait_total,
+            'wait_max_s': self.wait_max,
+            'hold_total_s': self.hold_total,
+            'hold_max_s': self.hold_max,
+            'payload_avg': self.payload_total / self.calls if self.calls else 0,
+        }
+
+
+def _call_site(depth):
+    """'file.py:line' of the frame `depth` levels above the caller."""
+    frame = sys._getframe(depth + 1)
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+
+
+def control_count(*controls):
+    """Number of controls in the given subtrees (proxy for update payload size)."""
+    count = 0
+    stack = list(controls)
+    while stack:
+        control = stack.pop()
+        if control is None:
+            continue
+        count += 1
+        children = getattr(control, 'controls', None)
+        if isinstance(children, (list, tuple)):
+            stack.extend(children)
+        for attr in ('content', 'leading', 'title', 'subtitle', 'trailing'):
+            child = getattr(control, attr, None)
+            if child is not None and not isinstance(child, (str, int, float)):
+                stack.append(child)
+    return count
+
+
+# ============================================================================
+# PROFILER
+# ============================================================================
+
+class SyncProfiler:
+    """Collects per-call-site contention stats for locks and Flet UI calls."""
+
+    def __init__(self, setting=None):
+        self.enabled = bool(setting)
+        self.output_path = setting if setting and setting.endswith('.json') else None
+        self._stats = {}
+        self._lock = threading.Lock()
+        if self.enabled:
+            atexit.register(self.report)
+
+    def record(self, kind, name, site, wait=0.0, hold=0.0, payload=0):
+        key = (kind, name, site)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = SiteStats(kind, name, site)
+            stats.add(wait, hold, payload)
+
+    # ------------------------------------------------------------------
+    # Instrumentation
+    # ------------------------------------------------------------------
+
+    def lock(self, lock, name):
+        """Wrap a lock so waits and hold times are recorded per call site."""
+        if not self.enabled:
+            return lock
+        return InstrumentedLock(self, lock, name)
+
+    def instrument_page(self, page):
+        """Wrap page.update and page.run_task in place (once per page)."""
+        if not self.enabled or getattr(page, '_sync_profiled', False):
+            return page
+
+        original_update = page.update
+        original_run_task = page.run_task
+
+        def update(*controls):
+            site = _call_site(1)
+            payload = control_count(*(controls or page.controls))
+            start = time.perf_counter()
+            try:
+                return original_update(*controls)
+            finally:
+                self.record('page.update', 'page', site, hold=time.perf_counter() - start, payload=payload)
+
+        def run_task(handler, *args, **kwargs):
+            site = _call_site(1)
+            submitted = time.perf_counter()
+
+            @functools.wraps(handler)
+            async def timed(*a, **kw):
+                # Wait = event-loop queueing delay, hold = coroutine run time
+                started = time.perf_counter()
+                try:
+                    return await handler(*a, **kw)
+                finally:
+                    self.record(
+                        'page.run_task', getattr(handler, '__name__', 'task'), site,
+                        wait=started - submitted, hold=time.perf_counter() - started,
+                    )
+
+            return original_run_task(timed, *args, **kwargs)
+
+        page.update = update
+        page.run_task = run_task
+        page._sync_profiled = True
+        return page
+
+    # ------------------------------------------------------------------
+    # Report
+    # ------------------------------------------------------------------
+
+    def ranked(self):
+        """Site stats ordered by total wait + hold time, worst first."""
+        with self._lock:
+            stats = list(self._stats.values())
+        return sorted(stats, key=lambda s: s.wait_total + s.hold_total, reverse=True)
+
+    def report(self, file=None, top=25):
+        """Print the ranked report (and write JSON when configured)."""
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        stats = self.ranked()
+
+        print("\n=== Lock / UI-sync contention (ranked by wait + hold) ===", file=file)
+        print(f"{'kind':<14} {'name':<22} {'site':<40} {'calls':>7} {'wait s':>9} {'wait max':>9} "
+              f"{'hold s':>9} {'hold max':>9} {'payload':>8}", file=file)
+        for s in stats[:top]:
+            print(f"{s.kind:<14} {s.name[:22]:<22} {s.site[:40]:<40} {s.calls:>7} {s.wait_total:>9.3f} "
+                  f"{s.wait_max:>9.4f} {s.hold_total:>9.3f} {s.hold_max:>9.4f} "
+                  f"{(s.payload_total / s.calls if s.calls else 0):>8.1f}", file=file)
+
+        if self.output_path:
+            try:
+                with open(self.output_path, 'w') as f:
+                    json.dump([s.to_dict() for s in stats], f, indent=2)
+            except OSError:
+                pass
+
+
+class InstrumentedLock:
+    """Lock proxy that records wait and hold time per acquiring call site."""
+
+    def __init__(self, profiler, lock, name):
+        self._profiler = profiler
+        self._lock = lock
+        self._name = name
+        self._local = threading.local()
+
+    def _acquire(self, site, blocking=True, timeout=-1):
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            self._local.held = (site, start, time.perf_counter())
+        else:
+            self._profiler.record('lock', self._name, site, wait=time.perf_counter() - start)
+        return acquired
+
+    def acquire(self, blocking=True, timeout=-1):
+        return self._acquire(_call_site(1), blocking, timeout)
+
+    def release(self):
+        site, start, acquired_at = self._local.held
+        self._local.held = None
+        self._lock.release()
+        self._profiler.record(
+            'lock', self._name, site,
+            wait=acquired_at - start, hold=time.perf_counter() - acquired_at,
+        )
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self._acquire(_call_site(1))
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# ============================================================================
+# MEMORY
+# ============================================================================
+
+# A new peak snapshot is only taken once traced memory grew this much past
+# the previous one (snapshots of large heaps are slow)
+SNAPSHOT_GROWTH = 1.10
+
+
+def _site_rows(stats, limit):
+    rows = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        rows.append({
+            'site': f"{os.path.basename(frame.filename)}:{frame.lineno}",
+            'file': frame.filename,
+            'size_bytes': stat.size,
+            'count': stat.count,
+            'size_diff_bytes': getattr(stat, 'size_diff', None),
+        })
+    return rows
+
+
+class MemoryProfiler:
+    """
+    tracemalloc-based footprint tracking.
+
+    checkpoint() is cheap unless traced memory reached a new high (by
+    SNAPSHOT_GROWTH), in which case a snapshot is kept so the peak can be
+    broken down by allocation site. The retained breakdown is taken after a
+    full collection at exit.
+    """
+
+    def __init__(self, setting=None, frames=1):
+        self.enabled = False
+        self.output_path = setting if setting and setting.endswith('.json') else None
+        self.checkpoints = []
+        self._lock = threading.Lock()
+        self._peak_snapshot = None
+        self._peak_label = None
+        self._peak_size = 0
+        if setting:
+            self.start(frames)
+            atexit.register(self.report)
+
+    def start(self, frames=1):
+        """Begin tracing (used by benchmarks that enable profiling programmatically)."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.enabled = True
+
+    def checkpoint(self, label):
+        """Record traced memory now and the peak since the previous checkpoint."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            entry = {'label': label, 'current_bytes': current, 'peak_bytes': peak, 'time': time.time()}
+            self.checkpoints.append(entry)
+            if current > self._peak_size * SNAPSHOT_GROWTH:
+                self._peak_size = current
+                self._peak_label = label
+                self._peak_snapshot = self._snapshot()
+        return entry
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+
+    def summary(self, top=20):
+        """Checkpoints plus peak and retained allocation sites (JSON-ready)."""
+        if not self.enabled:
+            return None
+        gc.collect()
+        retained = self._snapshot()
+        current, _ = tracemalloc.get_traced_memory()
+        result = {
+            'checkpoints': list(self.checkpoints),
+            'retained_bytes': current,
+            'retained_sites': _site_rows(retained.statistics('lineno'), top),
+        }
+        if self._peak_snapshot is not None:
+            result['peak_checkpoint'] = self._peak_label
+            result['peak_sites'] = _site_rows(self._peak_snapshot.statistics('lineno'), top)
+            # What was freed between the peak and exit, largest first
+            result['released_sites'] = _site_rows(
+                sorted(retained.compare_to(self._peak_snapshot, 'lineno'), key=lambda s: s.size_diff), top)
+        return result
+
+    def report(self, file=None, top=20):
+        """Print the memory report (and write JSON when configured)."""
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        summary = self.summary(top)
+
+        print("\n=== Memory (tracemalloc) ===", file=file)
+        for entry in summary['checkpoints']:
+            print(f"{entry['label']:<40} current {entry['current_bytes'] / 1e6:>9.2f} MB   "
+                  f"peak since previous {entry['peak_bytes'] / 1e6:>9.2f} MB", file=file)
+        for title, key in ((f"Top sites at peak ({summary.get('peak_checkpoint')})", 'peak_sites'),
+                           ("Top sites retained at exit", 'retained_sites')):
+            print(f"\n{title}:", file=file)
+            for row in summary.get(key, []):
+                print(f"  {row['site']:<45} {row['size_bytes'] / 1e6:>9.2f} MB  {row['count']:>9} blocks", file=file)
+
+        if self.output_path:
+            try:
+                with open(self.output_path, 'w') as f:
+                    json.dump(summary, f, indent=2)
+            except OSError:
+                pass
+
+
+# Global profilers, enabled by YTDL_PROFILE_SYNC / YTDL_PROFILE_MEMORY
+# Use: from profiling import profiler, memory_profiler
+profiler = SyncProfiler(os.environ.get('YTDL_PROFILE_SYNC'))
+memory_profiler = MemoryProfiler(os.environ.get('YTDL_PROFILE_MEMORY'))
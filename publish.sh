@@ -30,9 +30,29 @@ python3 -m pip install pyinstaller --break-system-packages
 echo "✅ Dependencies ready"
 echo ""
 
+# Bundle fonts locally so the app never fetches them at startup
+if [ ! -f assets/fonts/Inter-Variable.ttf ]; then
+    echo "🔤 Fetching Inter font into assets/fonts..."
+    mkdir -p assets/fonts
+    curl -fsSL -o assets/fonts/Inter-Variable.ttf \
+        "https://github.com/google/fonts/raw/main/ofl/inter/Inter%5Bopsz,wght%5D.ttf"
+fi
+# Inter is distributed under the SIL Open Font License; ship it with the font
+if [ ! -f assets/fonts/OFL.txt ]; then
+    curl -fsSL -o assets/fonts/OFL.txt "https://github.com/google/fonts/raw/main/ofl/inter/OFL.txt"
+fi
+echo "✅ Fonts ready"
+echo ""
+
 # Build the app
+# launcher.load_mode imports the modes by name, which PyInstaller cannot see
 echo "🔨 Building macOS application..."
 flet pack launcher.py \
+    --add-data "assets:assets" \
+    --hidden-import youtube_downloader_mvp \
+    --hidden-import youtube_downloader_advanced \
+    --hidden-import youtube_playlist_downloader \
+    --hidden-import instagram_downloader \
     --name "YouTube Downloader" \
     --product-name "YouTube Downloader" \
     --copyright "Copyright (c) 2024" \
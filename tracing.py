@@ -0,0 +1,240 @@
+"""
+Opt-in span tracing in Chrome trace-event format
+Set YTDL_TRACE=/path/to/trace.json to record nested spans (extraction,
+format selection, fragment batches, ffmpeg passes, UI lock waits,
+page.update calls and page.run_task handlers) from every thread. The
+file is written at exit and can be opened in chrome://tracing or Perfetto
+to see where playlist workers wait on each other or on the UI lock. When
+tracing is off every helper is a no-op.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+# Fragments per "fragments" span when yt-dlp downloads segmented streams
+FRAGMENT_BATCH = 10
+
+
+# ============================================================================
+# TRACER
+# ============================================================================
+
+class Tracer:
+    """Collects trace events in memory and writes them as Chrome trace JSON."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.enabled = bool(path)
+        self._events = []
+        self._lock = threading.Lock()
+        self._thread_names = {}
+        self._pid = os.getpid()
+        self._t0 = time.perf_counter()
+        if self.enabled:
+            atexit.register(self.save)
+
+    def _now_us(self):
+        return (time.perf_counter() - self._t0) * 1e6
+
+    def _emit(self, event):
+        tid = threading.get_ident()
+        event['pid'] = self._pid
+        event['tid'] = tid
+        with self._lock:
+            if tid not in self._thread_names:
+                self._thread_names[tid] = threading.current_thread().name
+            self._events.append(event)
+
+    def span(self, name, cat="app", **args):
+        """Context manager recording a complete ('X') event around a block."""
+        if not self.enabled:
+            return nullcontext()
+        return self._span(name, cat, args)
+
+    @contextmanager
+    def _span(self, name, cat, args):
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            self._emit({
+                'name': name, 'cat': cat, 'ph': 'X',
+                'ts': start, 'dur': self._now_us() - start,
+                'args': args,
+            })
+
+    def begin(self, name, cat="app", **args):
+        """Open a span whose end is reported by a later callback on the same thread."""
+        if self.enabled:
+            self._emit({'name': name, 'cat': cat, 'ph': 'B', 'ts': self._now_us(), 'args': args})
+
+    def end(self, name, cat="app"):
+        if self.enabled:
+            self._emit({'name': name, 'cat': cat, 'ph': 'E', 'ts': self._now_us()})
+
+    def instant(self, name, cat="app", **args):
+        if self.enabled:
+            self._emit({'name': name, 'cat': cat, 'ph': 'i', 's': 't', 'ts': self._now_us(), 'args': args})
+
+    def traced(self, name=None, cat="app"):
+        """Decorator form of span()."""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, cat):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ------------------------------------------------------------------
+    # Integrations
+    # ------------------------------------------------------------------
+
+    def attach(self, ydl_opts):
+        """Add fragment-batch and postprocessor spans to a yt-dlp options dict."""
+        if not self.enabled:
+            return ydl_opts
+        ydl_opts.setdefault('progress_hooks', []).append(_FragmentSpans(self))
+        ydl_opts.setdefault('postprocessor_hooks', []).append(self._postprocessor_hook)
+        return ydl_opts
+
+    def _postprocessor_hook(self, d):
+        name = f"postprocess {d.get('postprocessor', '')}".strip()
+        if d.get('status') == 'started':
+            self.begin(name, cat="ffmpeg")
+        elif d.get('status') == 'finished':
+            self.end(name, cat="ffmpeg")
+
+    def lock(self, lock, name):
+        """Wrap a lock so acquire waits and hold times show up as spans."""
+        if not self.enabled:
+            return lock
+        return TracedLock(self, lock, name)
+
+    def instrument_page(self, page):
+        """Wrap page.update and page.run_task in place so UI syncs show up as spans (once per page)."""
+        if not self.enabled or getattr(page, '_traced', False):
+            return page
+
+        original_update = page.update
+        original_run_task = page.run_task
+
+        def update(*controls):
+            with self.span("page.update", cat="ui", controls=len(controls)):
+                return original_update(*controls)
+
+        def run_task(handler, *args, **kwargs):
+            name = getattr(handler, '__name__', 'task')
+
+            async def traced(*a, **kw):
+                with self.span(f"run_task {name}", cat="ui"):
+                    return await handler(*a, **kw)
+
+            return original_run_task(traced, *args, **kwargs)
+
+        page.update = update
+        page.run_task = run_task
+        page._traced = True
+        return page
+
+    def save(self):
+        """Write the trace file (called automatically at exit)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            events = list(self._events)
+            names = dict(self._thread_names)
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid, 'args': {'name': thread_name}}
+            for tid, thread_name in names.items()
+        ]
+        try:
+            with open(self.path, 'w') as f:
+                json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+        except OSError:
+            pass
+
+
+class _FragmentSpans:
+    """yt-dlp progress hook emitting one span per batch of fragments."""
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.batch_start = None
+        self.first_index = None
+
+    def __call__(self, d):
+        index = d.get('fragment_index')
+        if d['status'] == 'downloading' and index is not None:
+            if self.batch_start is None:
+                self.batch_start = self.tracer._now_us()
+                self.first_index = index
+            elif index - self.first_index >= FRAGMENT_BATCH:
+                self._flush(index - 1, d)
+                self.batch_start = self.tracer._now_us()
+                self.first_index = index
+        elif d['status'] == 'finished' and self.batch_start is not None:
+            self._flush(d.get('fragment_index') or self.first_index, d)
+            self.batch_start = None
+
+    def _flush(self, last_index, d):
+        now = self.tracer._now_us()
+        self.tracer._emit({
+            'name': f"fragments {self.first_index}-{last_index}", 'cat': 'network', 'ph': 'X',
+            'ts': self.batch_start, 'dur': now - self.batch_start,
+            'args': {'fragment_count': d.get('fragment_count'), 'file': os.path.basename(d.get('filename') or '')},
+        })
+
+
+class TracedLock:
+    """Lock proxy recording '<name> wait' and '<name> held' spans."""
+
+    def __init__(self, tracer, lock, name):
+        self._tracer = tracer
+        self._lock = lock
+        self._name = name
+        self._local = threading.local()
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = self._tracer._now_us()
+        acquired = self._lock.acquire(blocking, timeout)
+        now = self._tracer._now_us()
+        self._tracer._emit({
+            'name': f"{self._name} wait", 'cat': 'lock', 'ph': 'X', 'ts': start, 'dur': now - start,
+        })
+        if acquired:
+            self._local.held_since = now
+        return acquired
+
+    def release(self):
+        start = getattr(self._local, 'held_since', None)
+        self._lock.release()
+        if start is not None:
+            self._tracer._emit({
+                'name': f"{self._name} held", 'cat': 'lock', 'ph': 'X',
+                'ts': start, 'dur': self._tracer._now_us() - start,
+            })
+            self._local.held_since = None
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# Global tracer, enabled by YTDL_TRACE
+# Use: from tracing import tracer
+tracer = Tracer(os.environ.get('YTDL_TRACE'))
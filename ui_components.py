@@ -1,6 +1,117 @@
+import os
+import shutil
+import sys
+import threading
+import urllib.request
 import flet as ft
 from pathlib import Path
 
+
+# Bundled assets (PyInstaller unpacks data files under sys._MEIPASS)
+ASSETS_DIR = Path(getattr(sys, '_MEIPASS', Path(__file__).parent)) / "assets"
+
+FONT_FAMILY = "Inter"
+FONT_ASSET = "fonts/Inter-Variable.ttf"  # Relative to ASSETS_DIR
+# Same source publish.sh bundles from (SIL Open Font License, see FONT_LICENSE_URL)
+FONT_URL = "https://github.com/google/fonts/raw/main/ofl/inter/Inter%5Bopsz,wght%5D.ttf"
+FONT_LICENSE_URL = "https://github.com/google/fonts/raw/main/ofl/inter/OFL.txt"
+FONT_FETCH_TIMEOUT = 20
+# Fetched copy when the font is not bundled (ASSETS_DIR may be a read-only
+# PyInstaller extraction dir or the source checkout)
+FONT_CACHE_DIR = Path.home() / ".youtube_downloader" / "fonts"
+
+_font_lock = threading.Lock()
+_font_fetch_failed = False
+
+
+def _download(url, target):
+    partial = target.with_name(target.name + ".part")
+    with urllib.request.urlopen(url, timeout=FONT_FETCH_TIMEOUT) as response, open(partial, 'wb') as f:
+        shutil.copyfileobj(response, f)
+    os.replace(partial, target)
+
+
+def _cached_font():
+    return FONT_CACHE_DIR / Path(FONT_ASSET).name
+
+
+def _ensure_font():
+    """
+    Make sure Inter is in FONT_CACHE_DIR, fetching it (with its license) once.
+
+    Returns:
+        bool: True if the font file is available
+    """
+    global _font_fetch_failed
+    font_path = _cached_font()
+    with _font_lock:
+        if font_path.exists():
+            return True
+        if _font_fetch_failed:
+            return False
+        try:
+            font_path.parent.mkdir(parents=True, exist_ok=True)
+            _download(FONT_URL, font_path)
+            _download(FONT_LICENSE_URL, font_path.with_name("OFL.txt"))
+            return True
+        except OSError:
+            # Offline: stay on the platform font for this run
+            _font_fetch_failed = True
+            return font_path.exists()
+
+
+def _font_source(page):
+    """
+    Value for page.fonts, or None while the font is not available locally.
+
+    Desktop clients read assets from disk, so the cached copy is referenced
+    relative to ASSETS_DIR; browsers (web.py) get the font URL, which they
+    fetch and cache themselves.
+    """
+    if (ASSETS_DIR / FONT_ASSET).exists():
+        return FONT_ASSET
+    if getattr(page, 'web', False):
+        return FONT_URL
+    if _cached_font().exists():
+        return os.path.relpath(_cached_font(), ASSETS_DIR)
+    return None
+
+
+def _register_font(page, source):
+    page.fonts = {FONT_FAMILY: source}
+    page.theme = ft.Theme(font_family=FONT_FAMILY)
+
+
+def apply_fonts(page):
+    """
+    Register the Inter font on a page, once.
+
+    The font comes from the local assets directory, so first render never
+    waits on a network fetch. When it is not bundled (running from source),
+    it is fetched into FONT_CACHE_DIR in the background on first use and
+    the page switches to it once it arrives; later runs use the cached file
+    directly.
+    """
+    if page.fonts and FONT_FAMILY in page.fonts:
+        return
+
+    source = _font_source(page)
+    if source:
+        _register_font(page, source)
+        return
+
+    def fetch():
+        if not _ensure_font():
+            return
+        _register_font(page, _font_source(page))
+        try:
+            page.update()
+        except (RuntimeError, AssertionError):
+            pass  # Page closed before the font arrived
+
+    threading.Thread(target=fetch, name="font-fetch", daemon=True).start()
+
+
 class ProgressControl(ft.Column):
     def __init__(self, width=500, page=None):
         super().__init__()
@@ -65,6 +176,15 @@ class ProgressControl(ft.Column):
             self.stats_row
         ]
 
+    def _refresh(self):
+        # The owning mode view may be swapped out of the page while a download
+        # keeps running; state is kept and rendered when the view is re-attached.
+        try:
+            self.update()
+        except (RuntimeError, AssertionError):
+            # Flet raises these for a control that is not on a page
+            pass
+
     def start_download(self, message="Starting download...", on_cancel=None):
         self.progress_bar.visible = True
         self.progress_bar.value = 0
@@ -87,7 +207,7 @@ class ProgressControl(ft.Column):
         else:
             self.cancel_btn.visible = False
             
-        self.update()
+        self._refresh()
 
     def update_progress(self, percent, text=None, speed=None, eta=None, size_info=None):
         async def do_update():
@@ -101,7 +221,7 @@ class ProgressControl(ft.Column):
             if eta: self.eta_text.value = f"ETA: {eta}"
             if size_info: self.size_text.value = f"Size: {size_info}"
 
-            self.update()
+            self._refresh()
 
         if self._page:
             self._page.run_task(do_update)
@@ -117,7 +237,7 @@ class ProgressControl(ft.Column):
             if eta: self.eta_text.value = f"ETA: {eta}"
             if size_info: self.size_text.value = f"Size: {size_info}"
 
-            self.update()
+            self._refresh()
 
     def complete(self, message="Download Complete!", on_show_click=None):
         self.status_text.value = message
@@ -130,7 +250,7 @@ class ProgressControl(ft.Column):
         if on_show_click:
             self.show_file_btn.on_click = on_show_click
             self.show_file_btn.visible = True
-        self.update()
+        self._refresh()
 
     def error(self, message):
         self.status_text.value = f"Error: {message}"
@@ -139,7 +259,7 @@ class ProgressControl(ft.Column):
         self.progress_text.visible = False
         self.cancel_btn.visible = False
         self.stats_row.visible = False
-        self.update()
+        self._refresh()
         
     def cancelled(self):
         self.status_text.value = "Download Cancelled"
@@ -148,7 +268,7 @@ class ProgressControl(ft.Column):
         self.progress_text.visible = False
         self.cancel_btn.visible = False
         self.stats_row.visible = False
-        self.update()
+        self._refresh()
 
     def reset(self):
         self.progress_bar.visible = False
@@ -157,7 +277,7 @@ class ProgressControl(ft.Column):
         self.show_file_btn.visible = False
         self.cancel_btn.visible = False
         self.stats_row.visible = False
-        self.update()
+        self._refresh()
 
 
 # ============================================================================
@@ -6,9 +6,16 @@ Centralizes common code to eliminate duplication across all downloader modes
 import sys
 import re
 import time
+import os
+import shutil
+import threading
 import subprocess
+import concurrent.futures
 from pathlib import Path
 
+from profiling import profiler
+from tracing import tracer
+
 
 # ============================================================================
 # CONSTANTS
@@ -132,6 +139,234 @@ def validate_instagram_url(url):
     return True, None
 
 
+# ============================================================================
+# CHAPTER SPLITTING
+# ============================================================================
+
+def safe_filename(name, max_length=120):
+    """Strip characters that are not allowed in file names."""
+    cleaned = re.sub(r'[\\/:*?"<>|\n\r\t]', '_', str(name)).strip().strip('.')
+    return cleaned[:max_length] or "untitled"
+
+
+@tracer.traced(cat="ffmpeg")
+def cut_segment(source_path, start, end, output_path):
+    """
+    Cut [start, end) from a media file with stream copy (no re-encode).
+
+    Returns:
+        str: output_path
+
+    Raises:
+        Exception: If ffmpeg fails
+    """
+    cmd = [ffmpeg_probe.get().path or 'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+           '-ss', f"{start:.3f}", '-i', str(source_path)]
+    if end is not None and end != float('inf'):
+        cmd += ['-t', f"{end - start:.3f}"]
+    cmd += ['-map', '0', '-c', 'copy', '-avoid_negative_ts', 'make_zero', str(output_path)]
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg xatolik: {result.stderr.strip()[-500:]}")
+    return str(output_path)
+
+
+def chapter_output_path(source_path, index, chapter):
+    """Build '<source stem> - 01 Chapter title.<ext>' next to the source file."""
+    source = Path(source_path)
+    title = safe_filename(chapter.get('title') or f"Chapter {index}")
+    return str(source.with_name(f"{source.stem} - {index:02d} {title}{source.suffix}"))
+
+
+def chapter_sections(all_chapters, selected):
+    """
+    yt-dlp download_ranges callable that fetches only the selected chapters.
+
+    Every section carries its chapter title and 1-based number in the video,
+    so '%(section_number)02d %(section_title)s' names each file distinctly and
+    the same way chapter_output_path() does for a full split. Chapters are
+    matched by (start_time, end_time), so copies of the chapter dicts (from
+    the metadata cache or a projection) select the same sections.
+    """
+    wanted = {(c.get('start_time'), c.get('end_time')) for c in selected}
+    sections = []
+    for index, chapter in enumerate(all_chapters, start=1):
+        if (chapter.get('start_time'), chapter.get('end_time')) not in wanted:
+            continue
+        section = {
+            'start_time': chapter.get('start_time') or 0,
+            'title': chapter.get('title') or f"Chapter {index}",
+            'index': index,
+        }
+        if chapter.get('end_time') is not None:
+            section['end_time'] = chapter['end_time']
+        sections.append(section)
+
+    def download_ranges(info_dict, ydl):
+        yield from sections
+    return download_ranges
+
+
+@tracer.traced(cat="ffmpeg")
+def split_by_chapters(source_path, chapters, max_workers=4, keep_source=True):
+    """
+    Cut a downloaded file into one file per chapter, concurrently.
+
+    Every cut is a separate stream-copy ffmpeg process, so the cuts run in
+    parallel across processes while this side only waits on them.
+
+    Args:
+        source_path: Downloaded media file
+        chapters: List of {'start_time', 'end_time', 'title'} dicts (yt-dlp shape)
+        max_workers: Number of concurrent ffmpeg processes
+        keep_source: Keep the full-length file after splitting
+
+    Returns:
+        list: Chapter file paths in chapter order
+    """
+    jobs = []
+    for index, chapter in enumerate(chapters, start=1):
+        jobs.append((
+            source_path,
+            float(chapter.get('start_time') or 0),
+            chapter.get('end_time'),
+            chapter_output_path(source_path, index, chapter),
+        ))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        outputs = list(executor.map(lambda job: cut_segment(*job), jobs))
+
+    if not keep_source:
+        try:
+            Path(source_path).unlink()
+        except OSError:
+            pass
+
+    return outputs
+
+
+# ============================================================================
+# TIME RANGES (CLIP DOWNLOADS)
+# ============================================================================
+
+def parse_timestamp(value):
+    """
+    Parse a timestamp like "90", "1:30" or "1:02:03.5" into seconds.
+
+    Returns:
+        float or None: Seconds, or None for an empty value
+
+    Raises:
+        ValueError: If the value is not a valid timestamp
+    """
+    if value is None or not str(value).strip():
+        return None
+
+    parts = str(value).strip().split(':')
+    if len(parts) > 3:
+        raise ValueError(value)
+
+    seconds = 0.0
+    for part in parts:
+        number = float(part)
+        if number < 0:
+            raise ValueError(value)
+        seconds = seconds * 60 + number
+    return seconds
+
+
+def parse_time_range(start, end):
+    """
+    Validate start/end fields into a clip range.
+
+    Returns:
+        Tuple: (time_range: (start, end) or None, error_message: str or None)
+        end may be float('inf') when only a start is given.
+    """
+    try:
+        start_sec = parse_timestamp(start)
+        end_sec = parse_timestamp(end)
+    except ValueError:
+        return None, "Vaqt formati noto'g'ri. Masalan: 1:30 yoki 01:02:03"
+
+    if start_sec is None and end_sec is None:
+        return None, None
+
+    start_sec = start_sec or 0.0
+    end_sec = float('inf') if end_sec is None else end_sec
+
+    if end_sec <= start_sec:
+        return None, "Tugash vaqti boshlanish vaqtidan katta bo'lishi kerak."
+
+    return (start_sec, end_sec), None
+
+
+def parse_clip_spec(spec):
+    """
+    Parse a compact "start-end" clip spec (e.g. "0:30-1:45", "10:00-").
+
+    Returns:
+        Tuple: (time_range or None, error_message or None)
+    """
+    if not spec or not spec.strip():
+        return None, None
+    if '-' not in spec:
+        return None, "Oraliq formati: boshlanish-tugash (masalan 0:30-1:45)"
+    start, end = spec.split('-', 1)
+    return parse_time_range(start, end)
+
+
+def apply_time_range(ydl_opts, time_range):
+    """
+    Restrict a yt-dlp download to a time range.
+
+    Only the fragments/byte ranges covering the section are fetched, and
+    keyframes are forced at the cut points so the clip starts exactly.
+
+    Args:
+        ydl_opts: yt-dlp options dict (modified in place)
+        time_range: (start, end) seconds tuple or None
+    """
+    if not time_range:
+        return ydl_opts
+
+    from yt_dlp.utils import download_range_func
+
+    ydl_opts['download_ranges'] = download_range_func(None, [time_range])
+    ydl_opts['force_keyframes_at_cuts'] = True
+    return ydl_opts
+
+
+# ============================================================================
+# DOWNLOAD BUDGETS
+# ============================================================================
+
+def parse_budget(max_size_mb, max_kbps):
+    """
+    Validate size/bitrate budget fields.
+
+    Returns:
+        Tuple: (budget: dict or None, error_message: str or None)
+        budget has 'max_bytes' and 'max_kbps' keys (either may be None).
+    """
+    try:
+        size_mb = float(max_size_mb) if max_size_mb and str(max_size_mb).strip() else None
+        kbps = float(max_kbps) if max_kbps and str(max_kbps).strip() else None
+    except ValueError:
+        return None, "Hajm (MB) yoki bitreyt (kbps) raqam bo'lishi kerak."
+
+    if size_mb is None and kbps is None:
+        return None, None
+    if (size_mb is not None and size_mb <= 0) or (kbps is not None and kbps <= 0):
+        return None, "Hajm va bitreyt musbat bo'lishi kerak."
+
+    return {
+        'max_bytes': int(size_mb * 1024 * 1024) if size_mb else None,
+        'max_kbps': kbps,
+    }, None
+
+
 # ============================================================================
 # ERROR MESSAGE TRANSLATION
 # ============================================================================
@@ -170,27 +405,324 @@ def translate_error(exception):
 # FFMPEG INSTALLATION CHECK
 # ============================================================================
 
-def check_ffmpeg_installed():
+class FFmpegCapabilities:
+    """Result of one ffmpeg probe: availability plus encoder/decoder/muxer lists."""
+
+    def __init__(self, installed=False, path=None, version=None, encoders=None,
+                 decoders=None, muxers=None, ffprobe=False, error=None):
+        self.installed = installed
+        self.path = path
+        self.version = version
+        self.encoders = encoders or set()
+        self.decoders = decoders or set()
+        self.muxers = muxers or set()
+        self.ffprobe = ffprobe
+        self.error = error
+
+    def has_encoder(self, name):
+        return name in self.encoders
+
+    def pick_encoder(self, candidates):
+        """First available encoder from candidates, or None."""
+        for name in candidates:
+            if name in self.encoders:
+                return name
+        return None
+
+
+def _parse_ffmpeg_list(output, section_marker):
+    """
+    Parse `ffmpeg -encoders/-decoders/-muxers` output into a set of names.
+    Entries follow a '------' / '--' separator line as '<flags> <name> <description>'.
+    """
+    names = set()
+    started = False
+    for line in output.splitlines():
+        stripped = line.strip()
+        if not started:
+            started = stripped.startswith(section_marker)
+            continue
+        parts = stripped.split()
+        if len(parts) >= 2:
+            names.add(parts[1])
+    return names
+
+
+class FFmpegProbe:
+    """
+    Process-wide, memoized ffmpeg capability probe.
+
+    The probe runs once (optionally in the background via warm()) and is
+    reused until PATH or the ffmpeg binary's mtime changes, so download
+    handlers never spawn `ffmpeg -version` on the UI event path.
+    """
+
+    def __init__(self, timeout=5):
+        self._timeout = timeout
+        self._lock = profiler.lock(threading.Lock(), 'ffmpeg_probe')
+        self._key = None
+        self._result = None
+        self._pending = None  # threading.Event while a probe is running
+
+    def _current_key(self):
+        path = shutil.which('ffmpeg')
+        try:
+            mtime = os.path.getmtime(path) if path else None
+        except OSError:
+            mtime = None
+        return os.environ.get('PATH', ''), path, mtime
+
+    def _run(self, path, *args):
+        result = subprocess.run([path, '-hide_banner', *args], capture_output=True,
+                                text=True, timeout=self._timeout)
+        return result.returncode, result.stdout
+
+    def _probe(self, key):
+        path = key[1]
+        if not path:
+            return FFmpegCapabilities(
+                error="FFmpeg o'rnatilmagan. Yuklab olish uchun FFmpeg kerak.\n\nO'rnatish:\nbrew install ffmpeg"
+            )
+        try:
+            code, out = self._run(path, '-version')
+            if code != 0:
+                return FFmpegCapabilities(path=path, error="FFmpeg topilmadi.")
+            version = out.splitlines()[0] if out else None
+            return FFmpegCapabilities(
+                installed=True,
+                path=path,
+                version=version,
+                encoders=_parse_ffmpeg_list(self._run(path, '-encoders')[1], '------'),
+                decoders=_parse_ffmpeg_list(self._run(path, '-decoders')[1], '------'),
+                muxers=_parse_ffmpeg_list(self._run(path, '-muxers')[1], '--'),
+                ffprobe=shutil.which('ffprobe') is not None,
+            )
+        except FileNotFoundError:
+            return FFmpegCapabilities(
+                error="FFmpeg o'rnatilmagan. Yuklab olish uchun FFmpeg kerak.\n\nO'rnatish:\nbrew install ffmpeg"
+            )
+        except subprocess.TimeoutExpired:
+            return FFmpegCapabilities(path=path, error="FFmpeg tekshirishda vaqt tugadi.")
+        except Exception as e:
+            return FFmpegCapabilities(path=path, error=f"FFmpeg tekshirishda xatolik: {str(e)}")
+
+    def _start(self, key):
+        # Caller holds self._lock
+        event = threading.Event()
+        self._pending = event
+
+        def run():
+            result = self._probe(key)
+            with self._lock:
+                self._key = key
+                self._result = result
+                self._pending = None
+            event.set()
+
+        threading.Thread(target=run, daemon=True).start()
+        return event
+
+    def warm(self):
+        """Start probing in the background if there is no valid cached result."""
+        key = self._current_key()
+        with self._lock:
+            if (self._key == key and self._result is not None) or self._pending:
+                return
+            self._start(key)
+
+    def get(self):
+        """
+        Cached capabilities, probing (or waiting for an in-flight probe) if needed.
+
+        Returns:
+            FFmpegCapabilities
+        """
+        key = self._current_key()
+        with self._lock:
+            if self._key == key and self._result is not None:
+                return self._result
+            event = self._pending or self._start(key)
+
+        event.wait(self._timeout * 4 + 1)
+        with self._lock:
+            if self._result is not None:
+                return self._result
+        return FFmpegCapabilities(error="FFmpeg tekshirishda vaqt tugadi.")
+
+    def peek(self):
+        """
+        Cached capabilities without blocking, for the UI thread.
+
+        Returns:
+            FFmpegCapabilities, or None while unknown (a background probe is started)
+        """
+        key = self._current_key()
+        with self._lock:
+            if self._key == key and self._result is not None:
+                return self._result
+            if not self._pending:
+                self._start(key)
+        return None
+
+    def invalidate(self):
+        with self._lock:
+            self._key = None
+            self._result = None
+
+
+# Global ffmpeg probe instance
+# Use: from utils import ffmpeg_probe
+ffmpeg_probe = FFmpegProbe()
+
+
+def check_ffmpeg_installed(wait=True):
     """
     Check if FFmpeg is installed and accessible.
+    Uses the memoized ffmpeg_probe, so repeated calls do not spawn ffmpeg.
+
+    Args:
+        wait: Block until a probe finishes. UI handlers pass False: while the
+              result is unknown they get (True, None) and the download goes
+              ahead (multi-output, which needs the capabilities, probes in
+              its worker thread)
 
     Returns:
         Tuple: (is_installed: bool, error_message: str or None)
     """
-    try:
-        result = subprocess.run(['ffmpeg', '-version'],
-                              capture_output=True,
-                              timeout=5)
-        if result.returncode == 0:
-            return True, None
-        else:
-            return False, "FFmpeg topilmadi."
-    except FileNotFoundError:
-        return False, "FFmpeg o'rnatilmagan. Yuklab olish uchun FFmpeg kerak.\n\nO'rnatish:\nbrew install ffmpeg"
-    except subprocess.TimeoutExpired:
-        return False, "FFmpeg tekshirishda vaqt tugadi."
-    except Exception as e:
-        return False, f"FFmpeg tekshirishda xatolik: {str(e)}"
+    caps = ffmpeg_probe.get() if wait else ffmpeg_probe.peek()
+    if caps is None:
+        return True, None
+    return caps.installed, caps.error
+
+
+# ============================================================================
+# MULTI-OUTPUT TRANSCODING
+# ============================================================================
+
+# yt-dlp format string for the single source download used by multi-output mode.
+# Prefers h264 + aac so the MP4 target can be stream-copied instead of re-encoded.
+MULTI_OUTPUT_SOURCE_FORMAT = (
+    "bestvideo[vcodec^=avc1]+bestaudio[acodec^=mp4a]/bestvideo+bestaudio/best"
+)
+
+MULTI_OUTPUT_TARGETS = {
+    'mp4': {'label': 'MP4', 'suffix': '', 'ext': 'mp4'},
+    'mp3': {'label': 'MP3', 'suffix': '', 'ext': 'mp3'},
+    'm4a': {'label': 'M4A', 'suffix': '', 'ext': 'm4a'},
+    'proxy480': {'label': '480p Proxy', 'suffix': '_480p', 'ext': 'mp4'},
+}
+
+
+def _h264_quality_args(encoder, crf):
+    """Rate-control flags for the chosen h264 encoder (CRF only exists in libx264)."""
+    if encoder == 'libx264':
+        return ['-preset', 'veryfast', '-crf', str(crf)]
+    return ['-b:v', '2500k' if crf <= 23 else '800k']
+
+
+def build_multi_output_command(source_path, output_base, targets,
+                               copy_video=False, copy_audio=False, has_audio=True):
+    """
+    Build a single ffmpeg invocation that writes every requested target.
+
+    ffmpeg decodes each input stream once and feeds all encoders from it,
+    so N outputs cost one demux/decode instead of N separate jobs.
+
+    Args:
+        source_path: Downloaded source media file
+        output_base: Output path without extension (e.g. ~/Downloads/Title)
+        targets: Iterable of MULTI_OUTPUT_TARGETS keys
+        copy_video: Source video is h264 and can be stream-copied into MP4
+        copy_audio: Source audio is AAC and can be stream-copied
+        has_audio: Source has an audio stream; audio-only targets are skipped
+                   for video-only sources and video targets come out silent
+
+    Returns:
+        Tuple: (argv: list, output_paths: list)
+    """
+    caps = ffmpeg_probe.get()
+    h264_encoder = caps.pick_encoder(['libx264', 'h264_videotoolbox', 'libopenh264']) or 'libx264'
+    mp3_encoder = caps.pick_encoder(['libmp3lame', 'libshine']) or 'libmp3lame'
+
+    cmd = [caps.path or 'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-i', str(source_path)]
+    outputs = []
+
+    for key in targets:
+        if key in ('mp3', 'm4a') and not has_audio:
+            continue
+        target = MULTI_OUTPUT_TARGETS[key]
+        out_path = f"{output_base}{target['suffix']}.{target['ext']}"
+
+        if key == 'mp4':
+            cmd += ['-map', '0:v:0', '-map', '0:a:0?']
+            cmd += ['-c:v', 'copy'] if copy_video else ['-c:v', h264_encoder] + _h264_quality_args(h264_encoder, 20)
+            cmd += ['-c:a', 'copy'] if copy_audio else ['-c:a', 'aac', '-b:a', '192k']
+            cmd += ['-movflags', '+faststart']
+        elif key == 'mp3':
+            cmd += ['-map', '0:a:0?', '-vn', '-c:a', mp3_encoder, '-b:a', '192k']
+        elif key == 'm4a':
+            cmd += ['-map', '0:a:0?', '-vn']
+            cmd += ['-c:a', 'copy'] if copy_audio else ['-c:a', 'aac', '-b:a', '192k']
+        elif key == 'proxy480':
+            cmd += ['-map', '0:v:0', '-map', '0:a:0?', '-vf', 'scale=-2:480', '-c:v', h264_encoder]
+            cmd += _h264_quality_args(h264_encoder, 28)
+            cmd += ['-c:a', 'aac', '-b:a', '96k', '-movflags', '+faststart']
+
+        cmd.append(out_path)
+        outputs.append(out_path)
+
+    return cmd, outputs
+
+
+@tracer.traced(cat="ffmpeg")
+def run_multi_output(source_path, output_base, targets, copy_video=False,
+                     copy_audio=False, keep_source=False, has_audio=True):
+    """
+    Produce all multi-output targets from one source file in one ffmpeg pass.
+
+    Returns:
+        list: Paths of the written outputs
+
+    Raises:
+        Exception: If ffmpeg fails (message contains ffmpeg's stderr tail)
+    """
+    if not targets:
+        raise Exception("Kamida bitta format tanlang.")
+
+    cmd, outputs = build_multi_output_command(
+        source_path, output_base, targets,
+        copy_video=copy_video, copy_audio=copy_audio, has_audio=has_audio
+    )
+    if not outputs:
+        raise Exception("Manbada audio yo'q: MP3/M4A yaratib bo'lmaydi.")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg xatolik: {result.stderr.strip()[-500:]}")
+
+    if not keep_source and str(source_path) not in outputs:
+        try:
+            Path(source_path).unlink()
+        except OSError:
+            pass
+
+    return outputs
+
+
+def can_stream_copy(info):
+    """
+    Check which streams of a downloaded yt-dlp result can be copied into MP4.
+
+    Returns:
+        Tuple: (copy_video: bool, copy_audio: bool)
+    """
+    vcodec = (info.get('vcodec') or '').lower()
+    acodec = (info.get('acodec') or '').lower()
+    return vcodec.startswith(('avc1', 'h264')), acodec.startswith(('mp4a', 'aac'))
+
+
+def has_audio_stream(info):
+    """False only when yt-dlp reports a downloaded result as video-only."""
+    return info.get('acodec') != 'none'
 
 
 # ============================================================================
@@ -220,6 +752,94 @@ def format_bytes(bytes_val):
     return f"{bytes_val:.1f} TB"
 
 
+# ============================================================================
+# INFO PROJECTION
+# ============================================================================
+
+# Top-level info fields the app (and yt-dlp's format selection/download) reads.
+# Caption tracks, thumbnail lists, descriptions, heatmaps etc. are dropped.
+PROJECTED_INFO_FIELDS = (
+    '_type', 'id', 'display_id', 'title', 'fulltitle', 'ext', 'duration', 'thumbnail',
+    'webpage_url', 'original_url', 'webpage_url_basename', 'webpage_url_domain',
+    'extractor', 'extractor_key', 'chapters', 'subtitles', 'http_headers',
+    'uploader', 'channel', 'upload_date', 'timestamp', 'age_limit',
+    'is_live', 'live_status', 'was_live', 'playlist', 'playlist_index',
+    '_format_sort_fields', '_has_drm', '__x_forwarded_for_ip',
+)
+
+# Format fields used to list and select formats (everything except transport)
+PROJECTED_FORMAT_FIELDS = (
+    'format_id', 'format_note', 'ext', 'protocol', 'vcodec', 'acodec',
+    'width', 'height', 'fps', 'resolution', 'dynamic_range',
+    'tbr', 'abr', 'vbr', 'asr', 'audio_channels', 'filesize', 'filesize_approx',
+    'language', 'language_preference', 'quality', 'preference', 'source_preference', 'has_drm',
+)
+
+# Marker key: 'all' = every format kept whole, 'chosen' = only format_ids kept whole
+PROJECTION_KEY = '_projection'
+
+
+def project_info(info, format_ids=None):
+    """
+    Slim copy of a yt-dlp info dict with only the fields the app reads.
+
+    Args:
+        info: Info dict from extract_info, or a projection. Projections are returned
+              as-is, except that an 'all' projection is narrowed when format_ids is given.
+        format_ids: Formats to keep whole (URL, headers, fragments); the rest keep
+                    only listing/selection fields. None keeps every format whole.
+
+    Returns:
+        dict: Projection that can be passed back to process_ie_result, or None
+    """
+    if not info:
+        return info
+    if PROJECTION_KEY in info and (format_ids is None or info[PROJECTION_KEY] == 'chosen'):
+        return info
+
+    slim = {key: info[key] for key in PROJECTED_INFO_FIELDS if key in info}
+    keep = set(format_ids) if format_ids is not None else None
+    formats = []
+    shared_headers = {}
+    for f in info.get('formats') or []:
+        if keep is None or f.get('format_id') in keep:
+            f = dict(f)
+            headers = f.get('http_headers')
+            if headers:
+                # Formats almost always carry identical headers; store one copy
+                f['http_headers'] = shared_headers.setdefault(tuple(sorted(headers.items())), headers)
+            formats.append(f)
+        else:
+            formats.append({key: f[key] for key in PROJECTED_FORMAT_FIELDS if key in f})
+    if formats:
+        slim['formats'] = formats
+    slim[PROJECTION_KEY] = 'all' if keep is None else 'chosen'
+    return slim
+
+
+def chosen_format_ids(info):
+    """Format IDs yt-dlp selected for a processed info dict (for project_info)."""
+    requested = info.get('requested_formats') or [info]
+    return [f['format_id'] for f in requested if f.get('format_id')]
+
+
+def expand_info(info, ydl):
+    """
+    Full info dict for a projection whose formats were trimmed.
+
+    Projections that still carry every format are returned unchanged; otherwise
+    the video is extracted again (lazily, only when a download needs it).
+
+    Args:
+        info: Info dict or projection
+        ydl: yt_dlp.YoutubeDL used for the re-fetch
+    """
+    if not info or info.get(PROJECTION_KEY) != 'chosen':
+        return info
+    url = info.get('webpage_url') or info.get('original_url')
+    return ydl.extract_info(url, download=False)
+
+
 # ============================================================================
 # METADATA CACHE
 # ============================================================================
@@ -269,9 +889,9 @@ class MetadataCache:
 
         Args:
             url: Video URL (key)
-            metadata: Video metadata (value)
+            metadata: Video metadata (value), stored as a project_info() projection
         """
-        self._cache[url] = metadata
+        self._cache[url] = project_info(metadata)
         self._timestamps[url] = time.time()
 
     def clear(self):
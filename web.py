@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Multi-session web server
+Serves the downloader menu to browsers (Flet web view). Every session gets
+its own page and mode views, but all of them share one process-wide engine:
+a single download queue and worker pool (daemon.DownloadService), the
+metadata cache and the download archive. Sessions only follow the progress
+of the jobs they submitted; identical requests from different users share
+one job. Sessions are scheduled fairly (see daemon.FairQueue), optionally
+with per-session job and bandwidth limits.
+
+Files are written on the server (to the mode's download folder).
+
+Usage:
+    python web.py [--host 0.0.0.0] [--port 8550] [-j 4] [--user-jobs 2] [--user-rate-mb 5]
+"""
+
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8550)
+    parser.add_argument('-j', '--concurrency', type=int, default=4, help='Downloads running at once (all sessions)')
+    parser.add_argument('--user-jobs', type=int, help='Most jobs of one session running at once')
+    parser.add_argument('--user-rate-mb', type=float, help='Bandwidth cap per session (MB/s)')
+    args = parser.parse_args()
+
+    # Read by daemon.client_from_env() when each session builds its mode views
+    os.environ['YTDL_SHARED_ENGINE'] = '1'
+    os.environ['YTDL_ENGINE_WORKERS'] = str(args.concurrency)
+    if args.user_jobs:
+        os.environ['YTDL_USER_JOBS'] = str(args.user_jobs)
+    if args.user_rate_mb:
+        os.environ['YTDL_USER_RATE_MB'] = str(args.user_rate_mb)
+
+    import flet as ft
+    import launcher
+    from daemon import shared_client
+    from profiling import profiler
+    from tracing import tracer
+    from ui_components import ASSETS_DIR
+    from utils import ffmpeg_probe
+
+    def session(page: ft.Page):
+        profiler.instrument_page(tracer.instrument_page(page))
+        # Dependencies are the server's concern; sessions go straight to the menu
+        launcher.SetupWindow(page, run_checks=False).show_menu()
+
+    # Process-wide warm-up, once for all sessions
+    shared_client()
+    launcher.warm_imports()
+    ffmpeg_probe.warm()
+
+    print(f"🌐 Web server on http://{args.host}:{args.port}", flush=True)
+    ft.run(session, host=args.host, port=args.port, view=ft.AppView.WEB_BROWSER, assets_dir=str(ASSETS_DIR))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Job store worker
+Leases jobs from a shared job store (jobstore.py) and downloads them with
+the common engine (core.download). Every worker is its own process with its
+own GIL, running -j downloads at once; start as many as the host's CPU and
+network allow. A heartbeat thread renews the leases of this process's
+running jobs and writes their progress back; jobs cancelled in the store,
+or taken over by another worker after missed heartbeats, are stopped.
+
+Queue work with `cli.py --store jobs.db URL ...` (or YTDL_JOB_STORE for the
+Simple and Playlist modes).
+
+Usage:
+    python worker.py jobs.db [-j 2] [--lease 60] [--exit-when-idle]
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+import core
+from daemon import JobInterrupted
+from fixtures import install_from_env
+from jobstore import JobStore, LEASE_SECONDS
+from metrics import metrics
+from utils import check_ffmpeg_installed, translate_error
+
+# Seconds between lease attempts while the store has nothing queued
+IDLE_POLL = 2.0
+
+
+class StoreWorker:
+    """Lease/download/report loop over a JobStore with `concurrency` threads."""
+
+    def __init__(self, store, concurrency=2, lease_seconds=LEASE_SECONDS, exit_when_idle=False):
+        self.store = store
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.exit_when_idle = exit_when_idle
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._progress = {}  # job id -> latest progress of a running job
+        self._lost = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self):
+        heartbeat = threading.Thread(target=self._heartbeat, name="lease-heartbeat", daemon=True)
+        heartbeat.start()
+        threads = [
+            threading.Thread(target=self._loop, name=f"store-worker-{n}", daemon=True)
+            for n in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        finally:
+            self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            job = self.store.lease(self.worker_id, self.lease_seconds)
+            if job is None:
+                counts = self.store.counts()
+                if self.exit_when_idle and not counts.get('queued') and not counts.get('running'):
+                    return
+                time.sleep(IDLE_POLL)
+                continue
+            if core.extraction_pool.enabled:
+                # Resolve the next queued videos in the pool while this one downloads
+                # (another worker may lease them; its own cache then misses)
+                core.extraction_pool.prefetch(self.store.queued_urls(core.extraction_pool.processes))
+            self._run(job)
+
+    def _heartbeat(self):
+        # Several renewals per lease, so one slow write does not cost the lease
+        while not self._stop.wait(self.lease_seconds / 4):
+            with self._lock:
+                progress = {job_id: dict(p) for job_id, p in self._progress.items()}
+            if not progress:
+                continue
+            try:
+                lost = self.store.heartbeat(self.worker_id, progress, self.lease_seconds)
+            except Exception as ex:
+                print(f"⚠️  Heartbeat failed: {ex}", flush=True)
+                continue
+            with self._lock:
+                self._lost |= lost
+
+    def _progress_hook(self, job_id):
+        def hook(d):
+            with self._lock:
+                if job_id in self._lost:
+                    raise JobInterrupted('lost')
+                if d['status'] == 'downloading':
+                    self._progress[job_id].update(
+                        downloaded_bytes=d.get('downloaded_bytes') or 0,
+                        total_bytes=d.get('total_bytes') or d.get('total_bytes_estimate'),
+                        speed=d.get('speed'),
+                        eta=d.get('eta'),
+                    )
+        return hook
+
+    def _run(self, job):
+        job_id, options = job['id'], job['options']
+        with self._lock:
+            self._progress[job_id] = {}
+        metrics_job = metrics.start_job('worker', job['url'])
+        print(f"⬇️  [{job_id}] {job['title'] or job['url']} (attempt {job['attempts']})", flush=True)
+        try:
+            result = core.download(
+                job['url'],
+                options['download_path'],
+                mode=options['mode'],
+                time_range=options['time_range'],
+                budget=options['budget'],
+                targets=options['targets'],
+                progress_hooks=[self._progress_hook(job_id)],
+                job=metrics_job,
+                convert_mp4=options['convert_mp4'],
+            )
+            metrics_job.finish()
+            recorded = self.store.complete(job_id, self.worker_id, result)
+            print(f"✅ [{job_id}] {result['title']}" if recorded else f"⚠️  [{job_id}] lease lost", flush=True)
+        except Exception as ex:
+            metrics_job.finish(ok=False, error=ex)
+            if not isinstance(ex, JobInterrupted):
+                self.store.fail(job_id, self.worker_id, translate_error(ex))
+                print(f"❌ [{job_id}] {ex}", flush=True)
+        finally:
+            with self._lock:
+                self._progress.pop(job_id, None)
+                self._lost.discard(job_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('store', help='Job store database (created if missing)')
+    parser.add_argument('-j', '--concurrency', type=int, default=2, help='Parallel downloads in this process')
+    parser.add_argument('--lease', type=float, default=LEASE_SECONDS, help='Lease length in seconds')
+    parser.add_argument('--exit-when-idle', action='store_true', help='Exit once nothing is queued or running')
+    args = parser.parse_args(argv)
+
+    # Serve/record extractor fixtures when YTDL_REPLAY / YTDL_RECORD is set
+    install_from_env()
+
+    ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed()
+    if not ffmpeg_ok:
+        print(f"⚠️  {ffmpeg_error}", flush=True)
+
+    worker = StoreWorker(JobStore(args.store), args.concurrency, args.lease, args.exit_when_idle)
+    # Workers share the metrics directory: each exports its own labelled files
+    metrics.set_instance(worker.worker_id)
+    print(f"🛠  Worker {worker.worker_id} on {args.store}", flush=True)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        print("\n\n👋 Dastur to'xtatildi")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,22 @@
 import flet as ft
-import yt_dlp
 import os
 import subprocess
 import sys
 from pathlib import Path
 import threading
 import time
-from ui_components import ProgressControl, RadioOptionComponent
-from utils import metadata_cache, format_bytes, validate_youtube_url, check_ffmpeg_installed, get_responsive_dimensions
+import core
+from ui_components import ProgressControl, RadioOptionComponent, apply_fonts, ASSETS_DIR
+from formats import FormatIndex
+from fixtures import install_from_env
+from metrics import metrics
+from profiling import profiler, memory_profiler
+from tracing import tracer
+from utils import (format_bytes, validate_youtube_url, check_ffmpeg_installed, get_responsive_dimensions,
+                   MULTI_OUTPUT_TARGETS, parse_time_range, parse_budget)
+
+# Serve/record extractor fixtures when YTDL_REPLAY / YTDL_RECORD is set
+install_from_env()
 
 class YouTubeDownloaderAdvanced:
     def __init__(self, page: ft.Page, on_back=None):
@@ -23,11 +32,8 @@ class YouTubeDownloaderAdvanced:
         self.page.padding = 0
         self.page.bgcolor = "#1a1a1a"
         
-        # Custom Fonts
-        self.page.fonts = {
-            "Inter": "https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap"
-        }
-        self.page.theme = ft.Theme(font_family="Inter")
+        # Bundled fonts (registered once per page, never fetched remotely)
+        apply_fonts(self.page)
 
         # Default download path
         self.download_path = str(Path.home() / "Downloads")
@@ -41,7 +47,8 @@ class YouTubeDownloaderAdvanced:
         self.page.on_keyboard_event = self.on_keyboard
 
         self.formats_data = []
-        self.current_video_info = None  # Cache video metadata to avoid duplicate API calls
+        self.chapters = []
+        self.format_index = None
         self.init_ui()
 
     def init_ui(self):
@@ -105,11 +112,55 @@ class YouTubeDownloaderAdvanced:
             content=ft.Row([
                 RadioOptionComponent("Video (MP4)", "video", ft.Icons.VIDEOCAM, ft.Colors.RED_ACCENT),
                 RadioOptionComponent("Audio (MP3)", "audio", ft.Icons.AUDIOTRACK, ft.Colors.RED_ACCENT),
+                RadioOptionComponent("Multi", "multi", ft.Icons.LIBRARY_ADD, ft.Colors.RED_ACCENT),
             ], alignment=ft.MainAxisAlignment.CENTER, spacing=20),
             value="video",
             on_change=self.on_mode_change
         )
 
+        # Multi-output targets (visible only in multi mode)
+        self.target_checkboxes = {
+            key: ft.Checkbox(label=target['label'], value=key in ('mp4', 'mp3'), fill_color=ft.Colors.RED_ACCENT)
+            for key, target in MULTI_OUTPUT_TARGETS.items()
+        }
+        self.targets_row = ft.Row(
+            list(self.target_checkboxes.values()),
+            alignment=ft.MainAxisAlignment.CENTER,
+            visible=False,
+        )
+
+        # Clip range (optional)
+        self.start_field = ft.TextField(
+            label="Start", hint_text="0:00", width=110, border_radius=10,
+            bgcolor="#2d2d2d", border_color="#404040", focused_border_color=ft.Colors.RED_ACCENT,
+            text_style=ft.TextStyle(color="white"), label_style=ft.TextStyle(color="#aaaaaa"),
+        )
+        self.end_field = ft.TextField(
+            label="End", hint_text="full", width=110, border_radius=10,
+            bgcolor="#2d2d2d", border_color="#404040", focused_border_color=ft.Colors.RED_ACCENT,
+            text_style=ft.TextStyle(color="white"), label_style=ft.TextStyle(color="#aaaaaa"),
+        )
+        self.clip_row = ft.Row(
+            [ft.Icon(ft.Icons.CONTENT_CUT, size=16, color="#888888"), self.start_field, self.end_field],
+            alignment=ft.MainAxisAlignment.CENTER,
+        )
+
+        # Size / bitrate budget (optional, overrides the quality dropdown)
+        self.max_size_field = ft.TextField(
+            label="Max size (MB)", width=140, border_radius=10,
+            bgcolor="#2d2d2d", border_color="#404040", focused_border_color=ft.Colors.RED_ACCENT,
+            text_style=ft.TextStyle(color="white"), label_style=ft.TextStyle(color="#aaaaaa"),
+        )
+        self.max_kbps_field = ft.TextField(
+            label="Max kbps", width=140, border_radius=10,
+            bgcolor="#2d2d2d", border_color="#404040", focused_border_color=ft.Colors.RED_ACCENT,
+            text_style=ft.TextStyle(color="white"), label_style=ft.TextStyle(color="#aaaaaa"),
+        )
+        self.budget_row = ft.Row(
+            [ft.Icon(ft.Icons.DATA_USAGE, size=16, color="#888888"), self.max_size_field, self.max_kbps_field],
+            alignment=ft.MainAxisAlignment.CENTER,
+        )
+
         # Location Section
         self.location_text = ft.Text(self.download_path, size=12, color="#888888", italic=True)
         self.location_container = ft.Container(
@@ -209,6 +260,23 @@ class YouTubeDownloaderAdvanced:
                         ]
                     )
                 ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+
+                # Chapters (only shown when the video has chapter markers)
+                ft.Checkbox(
+                    ref=self.bind_ref("chapters_checkbox"),
+                    label="Split by chapters",
+                    value=False,
+                    visible=False,
+                    on_change=self.on_chapters_change,
+                    fill_color=ft.Colors.RED_ACCENT,
+                ),
+                ft.Column(
+                    ref=self.bind_ref("chapters_list"),
+                    visible=False,
+                    spacing=0,
+                    height=200,
+                    scroll=ft.ScrollMode.AUTO,
+                ),
                 
                 ft.Container(height=20),
                 
@@ -234,30 +302,32 @@ class YouTubeDownloaderAdvanced:
         self.progress_control.progress_bar.color = ft.Colors.RED_ACCENT
 
         # Main Layout
-        self.page.add(
-            ft.Column(
-                [
-                    self.header,
-                    ft.Container(
-                        content=ft.Column([
-                            ft.Text("Paste a YouTube link to get started", size=14, color="#888888"),
-                            ft.Row([self.url_field, self.fetch_btn], alignment=ft.MainAxisAlignment.CENTER),
-                            ft.Container(height=10),
-                            self.download_mode,
-                            self.location_container,
-                            ft.Container(height=20),
-                            self.loading_progress,
-                            self.video_info_card,
-                            ft.Container(height=20),
-                            self.progress_control,
-                        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
-                        padding=30,
-                    )
-                ],
-                scroll=ft.ScrollMode.AUTO,
-                expand=True
-            )
+        self.view = ft.Column(
+            [
+                self.header,
+                ft.Container(
+                    content=ft.Column([
+                        ft.Text("Paste a YouTube link to get started", size=14, color="#888888"),
+                        ft.Row([self.url_field, self.fetch_btn], alignment=ft.MainAxisAlignment.CENTER),
+                        ft.Container(height=10),
+                        self.download_mode,
+                        self.targets_row,
+                        self.clip_row,
+                        self.budget_row,
+                        self.location_container,
+                        ft.Container(height=20),
+                        self.loading_progress,
+                        self.video_info_card,
+                        ft.Container(height=20),
+                        self.progress_control,
+                    ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+                    padding=30,
+                )
+            ],
+            scroll=ft.ScrollMode.AUTO,
+            expand=True
         )
+        self.page.add(self.view)
         
         # Refs storage initialized in bind_ref
 
@@ -270,6 +340,17 @@ class YouTubeDownloaderAdvanced:
     def get_control(self, name):
         return self.refs[name].current
 
+    def activate(self):
+        """Re-apply page-level settings when this cached view is shown again"""
+        self.page.title = "YouTube Downloader"
+        width, height = get_responsive_dimensions(self.page)
+        self.page.window_width = width
+        self.page.window_height = height
+        self.page.theme_mode = ft.ThemeMode.DARK
+        self.page.bgcolor = "#1a1a1a"
+        self.page.dialog = self.file_picker
+        self.page.on_keyboard_event = self.on_keyboard
+
     def on_folder_selected(self, e: ft.FilePickerResultEvent):
         if e.path:
             self.download_path = e.path
@@ -284,14 +365,28 @@ class YouTubeDownloaderAdvanced:
     def on_mode_change(self, e):
         # Hide video info if mode changes, forcing re-fetch or just reset UI
         self.video_info_card.visible = False
+        self.targets_row.visible = self.download_mode.value == "multi"
         self.progress_control.reset()
         self.page.update()
 
+    def selected_targets(self):
+        return [key for key, checkbox in self.target_checkboxes.items() if checkbox.value]
+
     def on_subtitle_change(self, e):
         lang_dropdown = self.get_control("subtitle_lang_dropdown")
         lang_dropdown.visible = e.control.value
         self.page.update()
         
+    def on_chapters_change(self, e):
+        self.get_control("chapters_list").visible = e.control.value
+        self.page.update()
+
+    def selected_chapters(self):
+        return [
+            chapter for chapter, checkbox in zip(self.chapters, self.get_control("chapters_list").controls)
+            if checkbox.value
+        ]
+
     def show_details_dialog(self, e):
         if not hasattr(self, 'all_formats_data') or not self.all_formats_data:
             return
@@ -364,14 +459,11 @@ class YouTubeDownloaderAdvanced:
         self.loading_progress.visible = True
         self.page.update()
 
+        @tracer.traced("fetch_formats")
         def fetch_thread():
             try:
-                ydl_opts = {'quiet': True, 'no_warnings': True}
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-
-                # Store info for later use to avoid duplicate API call
-                self.current_video_info = info
+                # Cached by core.resolve, so the download does not extract again
+                info = core.resolve(url)
 
                 # Update UI with video info
                 video_title = info.get('title', 'Unknown Title')
@@ -383,79 +475,37 @@ class YouTubeDownloaderAdvanced:
                 if not duration: duration = 0
                 self.get_control("video_duration").value = f"{duration // 60}:{duration % 60:02d}"
 
-                formats = []
-                self.all_formats_data = [] # For details dialog
+                # Chapter markers
+                self.chapters = info.get('chapters') or []
+                chapters_checkbox = self.get_control("chapters_checkbox")
+                chapters_checkbox.visible = bool(self.chapters)
+                chapters_checkbox.value = False
+                chapters_list = self.get_control("chapters_list")
+                chapters_list.visible = False
+                chapters_list.controls = [
+                    ft.Checkbox(
+                        label=f"{int(c.get('start_time') or 0) // 60}:{int(c.get('start_time') or 0) % 60:02d}  {c.get('title') or 'Chapter'}",
+                        value=True,
+                        fill_color=ft.Colors.RED_ACCENT,
+                    )
+                    for c in self.chapters
+                ]
 
-                if self.download_mode.value == "audio":
-                    formats = [
-                        {'id': 'bestaudio', 'label': 'Best Quality (192 kbps)'},
-                        {'id': 'bestaudio[abr<=128]', 'label': 'Medium Quality (128 kbps)'}
-                    ]
-                else:
-                    all_formats = info.get('formats', [])
-
-                    # Store detailed info for dialog
-                    for f in all_formats:
-                        size_bytes = f.get('filesize') or f.get('filesize_approx')
-                        size_str = self.format_bytes(size_bytes) if size_bytes else "N/A"
-                        is_hdr = 'hdr' in (f.get('dynamic_range') or '').lower()
-
-                        self.all_formats_data.append({
-                            'format_id': f.get('format_id'),
-                            'ext': f.get('ext'),
-                            'resolution': f.get('resolution'),
-                            'fps': f.get('fps'),
-                            'hdr': is_hdr,
-                            'size_str': size_str,
-                            'vcodec': f.get('vcodec'),
-                            'acodec': f.get('acodec'),
-                            'height': f.get('height', 0)
-                        })
-
-                    # Group by height to find best variant for each resolution
-                    resolutions = {} # height -> list of formats
-                    for f in all_formats:
-                        if f.get('vcodec') != 'none':
-                            height = f.get('height')
-                            if height:
-                                if height not in resolutions:
-                                    resolutions[height] = []
-                                resolutions[height].append(f)
-
-                    filtered_formats = []
-                    # Sort heights desc
-                    sorted_heights = sorted(resolutions.keys(), reverse=True)
-
-                    for height in sorted_heights:
-                        variants = resolutions[height]
-
-                        # Check if ANY variant is HDR
-                        has_hdr = any('hdr' in (f.get('dynamic_range') or '').lower() for f in variants)
-                        hdr_tag = "HDR" if has_hdr else ""
-
-                        # Find max size (approximation of best quality)
-                        max_size = 0
-                        for f in variants:
-                            s = f.get('filesize') or f.get('filesize_approx') or 0
-                            if s > max_size: max_size = s
-
-                        size_label = ""
-                        if max_size:
-                            size_label = f"({self.format_bytes(max_size)})"
-
-                        label = f"{height}p {hdr_tag} {size_label}".strip()
-                        filtered_formats.append({'id': str(height), 'label': label, 'height': height})
-
-                    # Add a "Best" option at the top
-                    if filtered_formats:
-                        filtered_formats.insert(0, {'id': 'best', 'label': 'Best Available', 'height': 10000})
-
-                    formats = filtered_formats
+                # Index formats once; dropdown, details dialog and download plan all read from it
+                with tracer.span("format_selection"):
+                    self.format_index = FormatIndex.from_info(info)
+                    self.all_formats_data = self.format_index.rows() # For details dialog
+
+                    if self.download_mode.value == "audio":
+                        formats = self.format_index.audio_options()
+                    else:
+                        formats = self.format_index.quality_options()
 
                 self.formats_data = formats
                 dropdown = self.get_control("format_dropdown")
                 dropdown.options = [ft.dropdown.Option(key=f['id'], text=f['label']) for f in formats]
                 if formats: dropdown.value = formats[0]['id']
+                memory_profiler.checkpoint("formats_fetched")
 
                 async def update_ui_success():
                     self.loading_progress.visible = False
@@ -493,12 +543,41 @@ class YouTubeDownloaderAdvanced:
             return
 
         # Check FFmpeg installation
-        ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed()
+        ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed(wait=False)
         if not ffmpeg_ok:
             self.progress_control.error(ffmpeg_error)
             self.page.update()
             return
 
+        targets = self.selected_targets()
+        if self.download_mode.value == "multi" and not targets:
+            self.progress_control.error("Select at least one output format")
+            self.page.update()
+            return
+
+        time_range, range_error = parse_time_range(self.start_field.value, self.end_field.value)
+        if range_error:
+            self.progress_control.error(range_error)
+            self.page.update()
+            return
+
+        budget, budget_error = parse_budget(self.max_size_field.value, self.max_kbps_field.value)
+        if budget_error:
+            self.progress_control.error(budget_error)
+            self.page.update()
+            return
+
+        split_chapters = (
+            self.download_mode.value != "multi"
+            and bool(self.chapters)
+            and self.get_control("chapters_checkbox").value
+        )
+        chapters = self.selected_chapters() if split_chapters else []
+        if split_chapters and not chapters:
+            self.progress_control.error("Select at least one chapter")
+            self.page.update()
+            return
+
         btn = self.get_control("download_btn")
         btn.disabled = True
         btn.text = "Downloading..."
@@ -514,60 +593,40 @@ class YouTubeDownloaderAdvanced:
         self.progress_control.start_download(on_cancel=cancel_download)
         self.page.update()
 
+        @tracer.traced("download_video")
         def download_thread():
+            job = metrics.start_job('advanced', url)
             try:
-                # Construct format string (QuickTime compatible with h264 + aac)
-                format_string = ""
-                if self.download_mode.value == "audio":
-                    format_string = "bestaudio[acodec=aac]/bestaudio/best"
-                else:
-                    if selected_id == 'best':
-                        format_string = "bestvideo[vcodec=h264][ext=mp4]+bestaudio[acodec=aac][ext=m4a]/best[ext=mp4]/best"
-                    else:
-                        # Request specific resolution video merged with best audio (h264 + aac for QuickTime)
-                        format_string = f"bestvideo[vcodec=h264][height={selected_id}][ext=mp4]+bestaudio[acodec=aac][ext=m4a]/bestvideo[height={selected_id}][ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best"
-
-                ydl_opts = {
-                    'format': format_string,
-                    'outtmpl': f'{self.download_path}/%(title)s.%(ext)s',
-                    'progress_hooks': [self.progress_hook],
-                    'quiet': True,
-                    'no_warnings': True
-                }
-                
-                if self.download_mode.value == "audio":
-                    ydl_opts['postprocessors'] = [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '192'}]
-                else:
-                    ydl_opts['merge_output_format'] = 'mp4'
-
-                if self.get_control("subtitle_checkbox").value:
-                    ydl_opts.update({
-                        'writesubtitles': True,
-                        'subtitleslangs': [self.get_control("subtitle_lang_dropdown").value],
-                        'subtitlesformat': 'srt'
-                    })
-
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    filename = ydl.prepare_filename(info)
-                    
-                    # Fix extension if merging happens or audio conversion
-                    if self.download_mode.value == "audio":
-                        filename = filename.rsplit('.', 1)[0] + '.mp3'
-                    elif self.download_mode.value == "video":
-                        filename = filename.rsplit('.', 1)[0] + '.mp4'
-                    
-                    ydl.download([url])
-                    self.downloaded_file_path = filename
+                # Same engine as the other modes; the analyzed metadata comes from its cache
+                subtitles = [self.get_control("subtitle_lang_dropdown").value] \
+                    if self.get_control("subtitle_checkbox").value else None
+                result = core.download(
+                    url,
+                    self.download_path,
+                    mode=self.download_mode.value,
+                    time_range=time_range,
+                    budget=budget,
+                    targets=targets,
+                    progress_hooks=[self.progress_hook],
+                    job=job,
+                    on_convert=lambda: self.progress_control.update_progress(
+                        1.0, "Splitting chapters..." if chapters else "Converting..."),
+                    checkpoint=self.check_cancelled,
+                    format_id=selected_id,
+                    chapters=chapters,
+                    subtitles=subtitles,
+                )
+                self.downloaded_file_path = result['filename']
+
+                job.finish()
+                self.progress_control.complete(
+                    "✅ Download Complete!",
+                    on_show_click=self.show_file
+                )
 
-                if not self.is_cancelled:
-                    self.progress_control.complete(
-                        "✅ Download Complete!",
-                        on_show_click=self.show_file
-                    )
-                
             except Exception as ex:
                 from utils import translate_error
+                job.finish(ok=False, error=ex)
                 if self.is_cancelled:
                     self.progress_control.cancelled()
                 else:
@@ -579,10 +638,13 @@ class YouTubeDownloaderAdvanced:
 
         threading.Thread(target=download_thread, daemon=True).start()
 
-    def progress_hook(self, d):
+    def check_cancelled(self):
         if self.is_cancelled:
             raise Exception("Cancelled")
 
+    def progress_hook(self, d):
+        self.check_cancelled()
+
         if d['status'] == 'downloading':
             try:
                 percent = 0
@@ -646,7 +708,8 @@ class YouTubeDownloaderAdvanced:
 
 
 def main(page: ft.Page):
+    profiler.instrument_page(tracer.instrument_page(page))
     YouTubeDownloaderAdvanced(page)
 
 if __name__ == "__main__":
-    ft.run(main)
+    ft.run(main, assets_dir=str(ASSETS_DIR))
@@ -1,12 +1,21 @@
 import flet as ft
-import yt_dlp
 import os
 import subprocess
 import sys
 from pathlib import Path
 import threading
-from ui_components import ProgressControl, RadioOptionComponent
-from utils import metadata_cache, format_bytes, validate_youtube_url, check_ffmpeg_installed, get_responsive_dimensions
+import core
+from daemon import client_from_env, page_user
+from fixtures import install_from_env
+from metrics import metrics
+from profiling import profiler, memory_profiler
+from tracing import tracer
+from ui_components import ProgressControl, RadioOptionComponent, apply_fonts, ASSETS_DIR
+from utils import (format_bytes, validate_youtube_url, check_ffmpeg_installed, get_responsive_dimensions,
+                   MULTI_OUTPUT_TARGETS, parse_time_range)
+
+# Serve/record extractor fixtures when YTDL_REPLAY / YTDL_RECORD is set
+install_from_env()
 
 class YouTubeDownloaderMVP:
     def __init__(self, page: ft.Page, on_back=None):
@@ -22,15 +31,15 @@ class YouTubeDownloaderMVP:
         self.page.bgcolor = "#1a1a1a"
         self.page.padding = 0
         
-        # Custom Fonts
-        self.page.fonts = {
-            "Inter": "https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap"
-        }
-        self.page.theme = ft.Theme(font_family="Inter")
+        # Bundled fonts (registered once per page, never fetched remotely)
+        apply_fonts(self.page)
 
         # Default download path
         self.download_path = str(Path.home() / "Downloads")
 
+        # Submit downloads to a running daemon.py when YTDL_DAEMON is set
+        self.daemon = client_from_env(user=page_user(self.page))
+
         # FilePicker for folder selection
         self.file_picker = ft.FilePicker()
         self.file_picker.on_result = self.on_folder_selected
@@ -88,8 +97,37 @@ class YouTubeDownloaderMVP:
             content=ft.Row([
                 RadioOptionComponent("Video (MP4)", "video", ft.Icons.VIDEOCAM, ft.Colors.YELLOW_ACCENT),
                 RadioOptionComponent("Audio (MP3)", "audio", ft.Icons.AUDIOTRACK, ft.Colors.YELLOW_ACCENT),
+                RadioOptionComponent("Multi", "multi", ft.Icons.LIBRARY_ADD, ft.Colors.YELLOW_ACCENT),
             ], alignment=ft.MainAxisAlignment.CENTER, spacing=20),
-            value="video"
+            value="video",
+            on_change=self.on_mode_change
+        )
+
+        # Multi-output targets (visible only in multi mode)
+        self.target_checkboxes = {
+            key: ft.Checkbox(label=target['label'], value=key in ('mp4', 'mp3'), fill_color=ft.Colors.YELLOW_ACCENT)
+            for key, target in MULTI_OUTPUT_TARGETS.items()
+        }
+        self.targets_row = ft.Row(
+            list(self.target_checkboxes.values()),
+            alignment=ft.MainAxisAlignment.CENTER,
+            visible=False,
+        )
+
+        # Clip range (optional)
+        self.start_field = ft.TextField(
+            label="Start", hint_text="0:00", width=110, border_radius=10,
+            bgcolor="#2d2d2d", border_color="#404040", focused_border_color=ft.Colors.YELLOW_ACCENT,
+            text_style=ft.TextStyle(color="white"), label_style=ft.TextStyle(color="#aaaaaa"),
+        )
+        self.end_field = ft.TextField(
+            label="End", hint_text="full", width=110, border_radius=10,
+            bgcolor="#2d2d2d", border_color="#404040", focused_border_color=ft.Colors.YELLOW_ACCENT,
+            text_style=ft.TextStyle(color="white"), label_style=ft.TextStyle(color="#aaaaaa"),
+        )
+        self.clip_row = ft.Row(
+            [ft.Icon(ft.Icons.CONTENT_CUT, size=16, color="#888888"), self.start_field, self.end_field],
+            alignment=ft.MainAxisAlignment.CENTER,
         )
 
         # Location
@@ -122,33 +160,45 @@ class YouTubeDownloaderMVP:
 
         self.downloaded_file_path = None
 
-        self.page.add(
-            ft.Container(
-                content=ft.Column(
-                    [
-                        self.header,
-                        ft.Container(
-                            content=ft.Column([
-                                self.url_field,
-                                ft.Container(height=10),
-                                self.download_mode,
-                                self.location_container,
-                                ft.Container(height=20),
-                                self.download_btn,
-                                ft.Container(height=20),
-                                self.progress_control,
-                            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, expand=True),
-                            padding=30,
-                            expand=True,
-                        )
-                    ],
-                    scroll=ft.ScrollMode.AUTO,
-                    expand=True,
-                ),
-                bgcolor="#1a1a1a",
+        self.view = ft.Container(
+            content=ft.Column(
+                [
+                    self.header,
+                    ft.Container(
+                        content=ft.Column([
+                            self.url_field,
+                            ft.Container(height=10),
+                            self.download_mode,
+                            self.targets_row,
+                            self.clip_row,
+                            self.location_container,
+                            ft.Container(height=20),
+                            self.download_btn,
+                            ft.Container(height=20),
+                            self.progress_control,
+                        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, expand=True),
+                        padding=30,
+                        expand=True,
+                    )
+                ],
+                scroll=ft.ScrollMode.AUTO,
                 expand=True,
-            )
+            ),
+            bgcolor="#1a1a1a",
+            expand=True,
         )
+        self.page.add(self.view)
+
+    def activate(self):
+        """Re-apply page-level settings when this cached view is shown again"""
+        self.page.title = "YouTube Downloader - Simple"
+        width, height = get_responsive_dimensions(self.page)
+        self.page.window_width = width
+        self.page.window_height = height
+        self.page.theme_mode = ft.ThemeMode.DARK
+        self.page.bgcolor = "#1a1a1a"
+        self.page.dialog = self.file_picker
+        self.page.on_keyboard_event = self.on_keyboard
 
     def on_folder_selected(self, e: ft.FilePickerResultEvent):
         if e.path:
@@ -161,6 +211,13 @@ class YouTubeDownloaderMVP:
         self.page.dialog = self.file_picker
         self.file_picker.get_directory_path()
 
+    def on_mode_change(self, e):
+        self.targets_row.visible = self.download_mode.value == "multi"
+        self.page.update()
+
+    def selected_targets(self):
+        return [key for key, checkbox in self.target_checkboxes.items() if checkbox.value]
+
     def download_video(self, e):
         url = self.url_field.value.strip()
 
@@ -178,70 +235,52 @@ class YouTubeDownloaderMVP:
             return
 
         # Check FFmpeg installation
-        ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed()
+        ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed(wait=False)
         if not ffmpeg_ok:
             self.progress_control.error(ffmpeg_error)
             self.page.update()
             return
 
+        targets = self.selected_targets()
+        if self.download_mode.value == "multi" and not targets:
+            self.progress_control.error("Select at least one output format")
+            self.page.update()
+            return
+
+        time_range, range_error = parse_time_range(self.start_field.value, self.end_field.value)
+        if range_error:
+            self.progress_control.error(range_error)
+            self.page.update()
+            return
+
         self.url_field.error_text = None
         self.download_btn.disabled = True
         self.progress_control.start_download()
         self.page.update()
 
+        @tracer.traced("download_video")
         def download_thread():
+            job = metrics.start_job('simple', url)
             try:
-                # Check if Audio or Video mode
-                if self.download_mode.value == "audio":
-                    ydl_opts = {
-                        'format': 'bestaudio/best',
-                        'outtmpl': f'{self.download_path}/%(title)s.%(ext)s',
-                        'progress_hooks': [self.progress_hook],
-                        'postprocessors': [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': 'mp3',
-                            'preferredquality': '192',
-                        }],
-                        'quiet': True,
-                        'no_warnings': True,
-                    }
+                if self.daemon:
+                    result = self.download_via_daemon(url, time_range, targets)
                 else:
-                    ydl_opts = {
-                        'format': 'bestvideo[vcodec=h264][ext=mp4]+bestaudio[acodec=aac][ext=m4a]/best[ext=mp4]/best',
-                        'outtmpl': f'{self.download_path}/%(title)s.%(ext)s',
-                        'progress_hooks': [self.progress_hook],
-                        'merge_output_format': 'mp4',
-                        'postprocessors': [{
-                            'key': 'FFmpegVideoConvertor',
-                            'preferedformat': 'mp4',
-                        }],
-                        'quiet': True,
-                        'no_warnings': True,
-                    }
-
-                # Check cache first to avoid duplicate extract_info call
-                cached_info = metadata_cache.get(url)
-                if cached_info:
-                    info = cached_info
-                else:
-                    # Fetch metadata with minimal options
-                    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
-                        info = ydl.extract_info(url, download=False)
-                    metadata_cache.set(url, info)
-
-                # Now download using the fetched/cached info
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    filename = ydl.prepare_filename(info)
-
-                    # For audio, filename will have .mp3 extension
-                    if self.download_mode.value == "audio":
-                        filename = filename.rsplit('.', 1)[0] + '.mp3'
-
-                    # Use process_ie_result to download without re-fetching metadata
-                    ydl.process_ie_result(info, download=True)
-                    self.downloaded_file_path = filename
-
-                mode_text = "Audio" if self.download_mode.value == "audio" else "Video"
+                    result = core.download(
+                        url,
+                        self.download_path,
+                        mode=self.download_mode.value,
+                        time_range=time_range,
+                        targets=targets,
+                        progress_hooks=[self.progress_hook],
+                        job=job,
+                        convert_mp4=True,
+                        on_convert=lambda: self.progress_control.update_progress(1.0, "Converting..."),
+                    )
+                self.downloaded_file_path = result['filename']
+
+                job.finish()
+                memory_profiler.checkpoint("download_finished")
+                mode_text = {"audio": "Audio", "multi": "Files"}.get(self.download_mode.value, "Video")
                 self.progress_control.complete(
                     f"✅ {mode_text} downloaded successfully!",
                     on_show_click=self.show_file
@@ -249,6 +288,7 @@ class YouTubeDownloaderMVP:
 
             except Exception as ex:
                 from utils import translate_error
+                job.finish(ok=False, error=ex)
                 user_msg = translate_error(ex)
                 self.progress_control.error(user_msg)
 
@@ -258,6 +298,26 @@ class YouTubeDownloaderMVP:
 
         threading.Thread(target=download_thread, daemon=True).start()
 
+    def download_via_daemon(self, url, time_range, targets):
+        """Run the download as a daemon job and mirror its progress; returns the job result."""
+        jobs = self.daemon.submit(
+            url=url,
+            mode=self.download_mode.value,
+            targets=targets,
+            time_range=list(time_range) if time_range else None,
+            output_dir=self.download_path,
+            convert_mp4=True,
+        )
+
+        def on_update(job):
+            if job['status'] == 'running' and job['percent']:
+                self.progress_control.update_progress(job['percent'] / 100)
+
+        job = self.daemon.wait([jobs[0]['id']], on_update)[0]
+        if job['status'] != 'done':
+            raise Exception(job['error'] or job['status'])
+        return job['result']
+
     def progress_hook(self, d):
         if d['status'] == 'downloading':
             try:
@@ -305,8 +365,9 @@ class YouTubeDownloaderMVP:
 
 
 def main(page: ft.Page):
+    profiler.instrument_page(tracer.instrument_page(page))
     YouTubeDownloaderMVP(page)
 
 
 if __name__ == "__main__":
-    ft.run(main)
+    ft.run(main, assets_dir=str(ASSETS_DIR))
@@ -1,5 +1,4 @@
 import flet as ft
-import yt_dlp
 import os
 import subprocess
 import sys
@@ -7,8 +6,18 @@ from pathlib import Path
 import threading
 import concurrent.futures
 from threading import Lock
-from ui_components import RadioOptionComponent
-from utils import validate_youtube_url, check_ffmpeg_installed, get_responsive_dimensions
+from ui_components import RadioOptionComponent, apply_fonts, ASSETS_DIR
+import core
+from daemon import client_from_env, page_user
+from fixtures import install_from_env
+from metrics import metrics
+from profiling import profiler, memory_profiler
+from tracing import tracer
+from utils import (validate_youtube_url, check_ffmpeg_installed, get_responsive_dimensions, parse_clip_spec,
+                   parse_budget)
+
+# Serve/record extractor fixtures when YTDL_REPLAY / YTDL_RECORD is set
+install_from_env()
 
 class VideoItem:
     def __init__(self, title, url, duration, thumbnail):
@@ -21,6 +30,7 @@ class VideoItem:
         self.progress = 0
         self.file_path = None
         self.download_mode = "video"  # video or audio
+        self.time_range = None  # (start, end) seconds for clip-only downloads
 
 class PlaylistDownloader:
     def __init__(self, page: ft.Page, on_back=None):
@@ -36,11 +46,8 @@ class PlaylistDownloader:
         self.page.bgcolor = "#1a1a1a"
         self.page.padding = 0
         
-        # Custom Fonts
-        self.page.fonts = {
-            "Inter": "https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap"
-        }
-        self.page.theme = ft.Theme(font_family="Inter")
+        # Bundled fonts (registered once per page, never fetched remotely)
+        apply_fonts(self.page)
 
         # Default download path
         self.download_path = str(Path.home() / "Downloads")
@@ -56,7 +63,10 @@ class PlaylistDownloader:
 
         # Parallel download settings
         self.max_parallel = 2
-        self.ui_lock = Lock()
+
+        # Submit downloads to the shared engine / a running daemon.py when configured
+        self.daemon = client_from_env(user=page_user(self.page))
+        self.ui_lock = profiler.lock(tracer.lock(Lock(), 'ui_lock'), 'ui_lock')
 
         # Keyboard shortcuts
         self.page.on_keyboard_event = self.on_keyboard
@@ -128,6 +138,22 @@ class PlaylistDownloader:
             value="video"
         )
 
+        # Per-playlist size / bitrate budget (optional)
+        self.max_size_field = ft.TextField(
+            label="Max size per video (MB)", width=200, border_radius=10,
+            bgcolor="#2d2d2d", border_color="#404040", focused_border_color=ft.Colors.BLUE_ACCENT,
+            text_style=ft.TextStyle(color="white"), label_style=ft.TextStyle(color="#aaaaaa"),
+        )
+        self.max_kbps_field = ft.TextField(
+            label="Max kbps", width=140, border_radius=10,
+            bgcolor="#2d2d2d", border_color="#404040", focused_border_color=ft.Colors.BLUE_ACCENT,
+            text_style=ft.TextStyle(color="white"), label_style=ft.TextStyle(color="#aaaaaa"),
+        )
+        self.budget_row = ft.Row(
+            [ft.Icon(ft.Icons.DATA_USAGE, size=16, color="#888888"), self.max_size_field, self.max_kbps_field],
+            alignment=ft.MainAxisAlignment.CENTER,
+        )
+
         # Location Section
         self.location_text = ft.Text(self.download_path, size=12, color="#888888", italic=True)
         self.location_container = ft.Container(
@@ -207,31 +233,42 @@ class PlaylistDownloader:
         )
 
         # Main Layout
-        self.page.add(
-            ft.Column(
-                [
-                    self.header,
-                    ft.Container(
-                        content=ft.Column([
-                            ft.Row([self.url_field, self.fetch_btn], alignment=ft.MainAxisAlignment.CENTER),
-                            ft.Container(height=10),
-                            self.download_mode,
-                            self.location_container,
-                            self.status_text,
-                            self.loading_progress,
-                            ft.Container(height=10),
-                            ft.Row([self.select_all_checkbox, self.download_info], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                            self.video_list_container,
-                            ft.Container(height=10),
-                            self.download_btn,
-                        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
-                        padding=30,
-                    )
-                ],
-                scroll=ft.ScrollMode.AUTO,
-                expand=True
-            )
+        self.view = ft.Column(
+            [
+                self.header,
+                ft.Container(
+                    content=ft.Column([
+                        ft.Row([self.url_field, self.fetch_btn], alignment=ft.MainAxisAlignment.CENTER),
+                        ft.Container(height=10),
+                        self.download_mode,
+                        self.budget_row,
+                        self.location_container,
+                        self.status_text,
+                        self.loading_progress,
+                        ft.Container(height=10),
+                        ft.Row([self.select_all_checkbox, self.download_info], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                        self.video_list_container,
+                        ft.Container(height=10),
+                        self.download_btn,
+                    ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+                    padding=30,
+                )
+            ],
+            scroll=ft.ScrollMode.AUTO,
+            expand=True
         )
+        self.page.add(self.view)
+
+    def activate(self):
+        """Re-apply page-level settings when this cached view is shown again"""
+        self.page.title = "YouTube Playlist Downloader"
+        width, height = get_responsive_dimensions(self.page)
+        self.page.window_width = width
+        self.page.window_height = height
+        self.page.theme_mode = ft.ThemeMode.DARK
+        self.page.bgcolor = "#1a1a1a"
+        self.page.dialog = self.file_picker
+        self.page.on_keyboard_event = self.on_keyboard
 
     def on_folder_selected(self, e: ft.FilePickerResultEvent):
         if e.path:
@@ -265,6 +302,45 @@ class PlaylistDownloader:
         if video.file_path and os.path.exists(video.file_path):
             subprocess.run(['open', '-R', video.file_path])
 
+    def videos_from_info(self, info, url):
+        """VideoItems for a flat playlist info dict (or a single video)."""
+        return [VideoItem(**entry) for entry in core.entries_from_info(info, url)]
+
+    def build_video_row(self, video):
+        """Row container for one playlist entry plus the controls updated during download."""
+        duration = f"{video.duration // 60}:{video.duration % 60:02d}"
+
+        checkbox = ft.Checkbox(value=True, on_change=lambda e, v=video: self.on_video_select(e, v), fill_color=ft.Colors.BLUE_ACCENT)
+        status_icon = ft.Icon(ft.Icons.CIRCLE_OUTLINED, color="#666666", size=20)
+        progress_bar = ft.ProgressBar(value=0, width=100, visible=False, color=ft.Colors.BLUE_ACCENT, bgcolor="#444444")
+        show_btn = ft.IconButton(ft.Icons.FOLDER, icon_color="white", visible=False, on_click=lambda e, v=video: self.show_video_file(v))
+        clip_field = ft.TextField(hint_text="0:30-1:45", width=110, height=40, text_size=12, border_radius=8,
+                                  bgcolor="#2d2d2d", border_color="#404040", tooltip="Clip range (optional)")
+
+        row = ft.Container(
+            content=ft.Row([
+                checkbox,
+                ft.Column([
+                    ft.Text(video.title, size=14, weight=ft.FontWeight.W_500, color="white", max_lines=1, overflow=ft.TextOverflow.ELLIPSIS, width=400),
+                    ft.Text(duration, size=12, color="#888888")
+                ], spacing=2),
+                ft.Container(expand=True),
+                clip_field,
+                status_icon,
+                progress_bar,
+                show_btn
+            ], alignment=ft.MainAxisAlignment.START),
+            bgcolor="#333333",
+            padding=10,
+            border_radius=8
+        )
+
+        return {
+            'video': video, 'checkbox': checkbox, 'container': row,
+            'status_icon': status_icon, 'progress_bar': progress_bar, 'show_file_btn': show_btn,
+            'clip_field': clip_field
+        }
+
     def fetch_playlist(self, _e):
         url = self.url_field.value.strip()
         if not url:
@@ -288,74 +364,30 @@ class PlaylistDownloader:
 
         def fetch_thread():
             try:
-                ydl_opts = {'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist'}
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-
-                    self.videos = []
-                    if 'entries' in info:
-                        for entry in info['entries']:
-                            if entry:
-                                self.videos.append(VideoItem(
-                                    title=entry.get('title', 'Unknown'),
-                                    url=entry.get('url', entry.get('id', '')),
-                                    duration=entry.get('duration', 0),
-                                    thumbnail=entry.get('thumbnail', None)
-                                ))
-                    else:
-                        self.videos.append(VideoItem(
-                            title=info.get('title', 'Unknown'),
-                            url=info.get('webpage_url', url),
-                            duration=info.get('duration', 0),
-                            thumbnail=info.get('thumbnail', None)
-                        ))
-
-                    self.video_list.controls.clear()
-                    self.video_controls.clear()
-
-                    for video in self.videos:
-                        duration = f"{video.duration // 60}:{video.duration % 60:02d}"
-
-                        checkbox = ft.Checkbox(value=True, on_change=lambda e, v=video: self.on_video_select(e, v), fill_color=ft.Colors.BLUE_ACCENT)
-                        status_icon = ft.Icon(ft.Icons.CIRCLE_OUTLINED, color="#666666", size=20)
-                        progress_bar = ft.ProgressBar(value=0, width=100, visible=False, color=ft.Colors.BLUE_ACCENT, bgcolor="#444444")
-                        show_btn = ft.IconButton(ft.Icons.FOLDER, icon_color="white", visible=False, on_click=lambda e, v=video: self.show_video_file(v))
-
-                        row = ft.Container(
-                            content=ft.Row([
-                                checkbox,
-                                ft.Column([
-                                    ft.Text(video.title, size=14, weight=ft.FontWeight.W_500, color="white", max_lines=1, overflow=ft.TextOverflow.ELLIPSIS, width=400),
-                                    ft.Text(duration, size=12, color="#888888")
-                                ], spacing=2),
-                                ft.Container(expand=True),
-                                status_icon,
-                                progress_bar,
-                                show_btn
-                            ], alignment=ft.MainAxisAlignment.START),
-                            bgcolor="#333333",
-                            padding=10,
-                            border_radius=8
-                        )
-
-                        self.video_controls.append({
-                            'video': video, 'checkbox': checkbox, 'container': row,
-                            'status_icon': status_icon, 'progress_bar': progress_bar, 'show_file_btn': show_btn
-                        })
-                        self.video_list.controls.append(row)
-
-                    async def update_ui_success():
-                        self.loading_progress.visible = False
-                        self.status_text.value = f"✅ Found {len(self.videos)} videos"
-                        self.status_text.color = ft.Colors.GREEN_ACCENT
-                        self.select_all_checkbox.visible = True
-                        self.video_list_container.visible = True
-                        self.download_info.value = f"📥 {len(self.videos)} videos selected"
-                        self.download_btn.visible = True
-                        self.fetch_btn.disabled = False
-                        self.page.update()
-
-                    self.page.run_task(update_ui_success)
+                info = core.fetch_playlist(url)
+                self.videos = self.videos_from_info(info, url)
+
+                self.video_list.controls.clear()
+                self.video_controls.clear()
+
+                for video in self.videos:
+                    control = self.build_video_row(video)
+                    self.video_controls.append(control)
+                    self.video_list.controls.append(control['container'])
+                memory_profiler.checkpoint(f"playlist_loaded[{len(self.videos)}]")
+
+                async def update_ui_success():
+                    self.loading_progress.visible = False
+                    self.status_text.value = f"✅ Found {len(self.videos)} videos"
+                    self.status_text.color = ft.Colors.GREEN_ACCENT
+                    self.select_all_checkbox.visible = True
+                    self.video_list_container.visible = True
+                    self.download_info.value = f"📥 {len(self.videos)} videos selected"
+                    self.download_btn.visible = True
+                    self.fetch_btn.disabled = False
+                    self.page.update()
+
+                self.page.run_task(update_ui_success)
 
             except Exception as ex:
                 from utils import translate_error
@@ -376,8 +408,28 @@ class PlaylistDownloader:
         selected_videos = [v for v in self.videos if v.selected]
         if not selected_videos: return
 
+        budget, budget_error = parse_budget(self.max_size_field.value, self.max_kbps_field.value)
+        if budget_error:
+            self.status_text.value = f"❌ {budget_error}"
+            self.status_text.color = ft.Colors.RED_ACCENT
+            self.page.update()
+            return
+
+        # Per-item clip ranges
+        for control in self.video_controls:
+            if not control['video'].selected:
+                continue
+            time_range, range_error = parse_clip_spec(control['clip_field'].value)
+            control['clip_field'].error_text = range_error
+            if range_error:
+                self.status_text.value = f"❌ {control['video'].title}: {range_error}"
+                self.status_text.color = ft.Colors.RED_ACCENT
+                self.page.update()
+                return
+            control['video'].time_range = time_range
+
         # Check FFmpeg installation
-        ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed()
+        ffmpeg_ok, ffmpeg_error = check_ffmpeg_installed(wait=False)
         if not ffmpeg_ok:
             self.status_text.value = f"❌ Error: {ffmpeg_error}"
             self.status_text.color = ft.Colors.RED_ACCENT
@@ -390,16 +442,25 @@ class PlaylistDownloader:
         self.status_text.value = f"Downloading: 0/{len(selected_videos)}"
         self.page.update()
 
-        def download_single_video(control):
+        selected_controls = [c for c in self.video_controls if c['video'].selected]
+        selected_urls = [core.entry_url(c['video'].url) for c in selected_controls]
+
+        @tracer.traced("download_single_video")
+        def download_single_video(index, control):
             video = control['video']
+            if core.extraction_pool.enabled:
+                # Keep the extraction processes busy resolving the next videos while this one downloads
+                core.extraction_pool.prefetch(selected_urls[index + 1:index + 1 + core.extraction_pool.processes])
             with self.ui_lock:
                 control['status_icon'].name = ft.Icons.DOWNLOADING
                 control['status_icon'].color = ft.Colors.BLUE_ACCENT
                 control['progress_bar'].visible = True
                 self.page.update()
 
+            job = None
             try:
-                video_url = video.url if video.url.startswith('http') else f"https://www.youtube.com/watch?v={video.url}"
+                video_url = core.entry_url(video.url)
+                job = metrics.start_job('playlist', video_url)
                 
                 def progress_hook(d):
                     if d['status'] == 'downloading':
@@ -410,23 +471,17 @@ class PlaylistDownloader:
                         except Exception:
                             pass
 
-                ydl_opts = {
-                    'outtmpl': f'{self.download_path}/%(title)s.%(ext)s',
-                    'progress_hooks': [progress_hook],
-                    'quiet': True, 'no_warnings': True
-                }
-                
-                if self.download_mode.value == "audio":
-                    ydl_opts.update({'format': 'bestaudio/best', 'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '192'}]})
-                else:
-                    ydl_opts.update({'format': 'bestvideo[vcodec=h264][ext=mp4]+bestaudio[acodec=aac][ext=m4a]/best[ext=mp4]/best', 'merge_output_format': 'mp4'})
-
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(video_url, download=False)
-                    filename = ydl.prepare_filename(info)
-                    if self.download_mode.value == "audio": filename = filename.rsplit('.', 1)[0] + '.mp3'
-                    ydl.download([video_url])
-                    video.file_path = filename
+                result = core.download(
+                    video_url,
+                    self.download_path,
+                    mode=self.download_mode.value,
+                    time_range=video.time_range,
+                    budget=budget,
+                    progress_hooks=[progress_hook],
+                    job=job,
+                )
+                video.file_path = result['filename']
+                job.finish()
 
                 with self.ui_lock:
                     control['status_icon'].name = ft.Icons.CHECK_CIRCLE
@@ -437,6 +492,8 @@ class PlaylistDownloader:
                 return True
 
             except Exception as ex:
+                if job:
+                    job.finish(ok=False, error=ex)
                 with self.ui_lock:
                     control['status_icon'].name = ft.Icons.ERROR
                     control['status_icon'].color = ft.Colors.RED_ACCENT
@@ -445,16 +502,20 @@ class PlaylistDownloader:
                 return False
 
         def download_thread():
-            selected_controls = [c for c in self.video_controls if c['video'].selected]
             completed = 0
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
-                future_to_control = {executor.submit(download_single_video, control): control for control in selected_controls}
-                for future in concurrent.futures.as_completed(future_to_control):
-                    if future.result(): completed += 1
-                    with self.ui_lock:
-                        self.status_text.value = f"Downloading: {completed}/{len(selected_controls)}"
-                        self.page.update()
-
+            if self.daemon:
+                completed = self.download_via_daemon(selected_controls, budget)
+            else:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+                    future_to_control = {executor.submit(download_single_video, index, control): control
+                                         for index, control in enumerate(selected_controls)}
+                    for future in concurrent.futures.as_completed(future_to_control):
+                        if future.result(): completed += 1
+                        with self.ui_lock:
+                            self.status_text.value = f"Downloading: {completed}/{len(selected_controls)}"
+                            self.page.update()
+
+            memory_profiler.checkpoint(f"playlist_downloaded[{completed}]")
             with self.ui_lock:
                 self.status_text.value = f"✅ {completed} videos downloaded!"
                 self.download_btn.disabled = False
@@ -464,6 +525,63 @@ class PlaylistDownloader:
 
         threading.Thread(target=download_thread, daemon=True).start()
 
+    def download_via_daemon(self, controls, budget):
+        """Submit the selected videos as engine jobs and mirror their progress; returns completed count."""
+        by_job = {}
+        for control in controls:
+            video = control['video']
+            try:
+                jobs = self.daemon.submit(
+                    url=core.entry_url(video.url),
+                    mode=self.download_mode.value,
+                    time_range=list(video.time_range) if video.time_range else None,
+                    budget=budget,
+                    output_dir=self.download_path,
+                )
+            except Exception:
+                with self.ui_lock:
+                    control['status_icon'].name = ft.Icons.ERROR
+                    control['status_icon'].color = ft.Colors.RED_ACCENT
+                    self.page.update()
+                continue
+            by_job.setdefault(jobs[0]['id'], []).append(control)
+
+        completed = [0]
+        finished = set()
+
+        def on_update(job):
+            if job['id'] in finished:
+                return
+            if job['status'] in ('done', 'error', 'cancelled'):
+                finished.add(job['id'])
+            for control in by_job.get(job['id'], []):
+                with self.ui_lock:
+                    if job['status'] == 'running':
+                        control['status_icon'].name = ft.Icons.DOWNLOADING
+                        control['status_icon'].color = ft.Colors.BLUE_ACCENT
+                        control['progress_bar'].visible = True
+                        control['progress_bar'].value = (job['percent'] or 0) / 100
+                    elif job['status'] == 'done':
+                        control['video'].file_path = job['result']['filename']
+                        control['status_icon'].name = ft.Icons.CHECK_CIRCLE
+                        control['status_icon'].color = ft.Colors.GREEN_ACCENT
+                        control['progress_bar'].visible = False
+                        control['show_file_btn'].visible = True
+                    elif job['status'] in ('error', 'cancelled'):
+                        control['status_icon'].name = ft.Icons.ERROR
+                        control['status_icon'].color = ft.Colors.RED_ACCENT
+                        control['progress_bar'].visible = False
+                    else:
+                        continue
+                    if job['status'] == 'done':
+                        completed[0] += 1
+                        self.status_text.value = f"Downloading: {completed[0]}/{len(controls)}"
+                    self.page.update()
+
+        if by_job:
+            self.daemon.wait(list(by_job), on_update)
+        return completed[0]
+
     def on_keyboard(self, e: ft.KeyboardEvent):
         import platform
         ctrl = e.ctrl or (e.meta and platform.system() == "Darwin")
@@ -489,7 +607,8 @@ class PlaylistDownloader:
 
 
 def main(page: ft.Page):
+    profiler.instrument_page(tracer.instrument_page(page))
     PlaylistDownloader(page)
 
 if __name__ == "__main__":
-    ft.run(main)
+    ft.run(main, assets_dir=str(ASSETS_DIR))